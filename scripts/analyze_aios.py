@@ -9,7 +9,7 @@ from pathlib import Path
 src_dir = str(Path(__file__).parent.parent / "src")
 sys.path.append(src_dir)
 
-from analyzer import CodeAnalyzer
+from analyzer import CodeAnalyzer, ReportGenerator
 
 async def main():
     """Analyze the AIOS repository using Chron AI analyzer"""
@@ -61,6 +61,12 @@ async def main():
                 print(f"- {rec}")
             print()
             
+        # Structured scores for scripts/update_articles.py; the markdown report is written up by hand
+        report_path = ReportGenerator(result, "https://github.com/agiresearch/AIOS").save_json(
+            str(Path(__file__).parent.parent / "reports/analysis"), "aios"
+        )
+        print(f"\nStructured report written to {report_path}")
+            
         print("\nAnalysis completed successfully.")
         return 0
         
@@ -9,7 +9,7 @@ from pathlib import Path
 src_dir = str(Path(__file__).parent.parent / "src")
 sys.path.append(src_dir)
 
-from analyzer import CodeAnalyzer
+from analyzer import CodeAnalyzer, ReportGenerator
 
 async def main():
     """Analyze AI projects using Chron AI analyzer"""
@@ -80,6 +80,13 @@ async def main():
         print("4.0-5.9:  Fair       - Basic implementation, needs significant work")
         print("0.0-3.9:  Limited    - Major improvements required\n")
             
+        # Structured scores for scripts/update_articles.py; the markdown report is written up by hand
+        project = repo_url.rstrip("/").split("/")[-1].lower()
+        report_path = ReportGenerator(result, repo_url).save_json(
+            str(Path(__file__).parent.parent / "reports/analysis"), project
+        )
+        print(f"Structured report written to {report_path}\n")
+            
         print("Analysis completed successfully.")
         return 0
         
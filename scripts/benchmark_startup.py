@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Add the src directory to Python path
+src_dir = str(Path(__file__).parent.parent / "src")
+
+# Statements timed for each entry point
+TARGETS = {
+    "analyzer": "import analyzer; analyzer.CodeAnalyzer",
+    "main": "import main",
+}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Parse -X importtime output into (module, cumulative_us, depth) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            rows.append((match.group(4), int(match.group(2)), depth))
+    return rows
+
+def measure(statement: str) -> Dict:
+    """Run one fresh interpreter and time its imports"""
+    env = dict(os.environ, PYTHONPATH=src_dir, PYTHONDONTWRITEBYTECODE="")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        env=env, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    top_level = [(name, us) for name, us, depth in parse_importtime(proc.stderr) if depth == 0]
+    return {
+        "wall_ms": wall_ms,
+        "import_ms": sum(us for _, us in top_level) / 1000,
+        "modules": {name: us / 1000 for name, us in top_level},
+    }
+
+def benchmark(statement: str, runs: int, top: int) -> Dict:
+    """Take the median over several runs and list the slowest top-level imports"""
+    samples = [measure(statement) for _ in range(runs)]
+    slowest = sorted(samples[-1]["modules"].items(), key=lambda item: item[1], reverse=True)
+    return {
+        "wall_ms": statistics.median(s["wall_ms"] for s in samples),
+        "import_ms": statistics.median(s["import_ms"] for s in samples),
+        "slowest_imports": [{"module": name, "ms": round(ms, 2)} for name, ms in slowest[:top]],
+    }
+
+def main():
+    """Track interpreter startup and import time of the analyzer entry points"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--runs", type=int, default=5, help="Interpreter runs per target")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative import time regression over the baseline")
+    args = parser.parse_args()
+
+    results = {}
+    for name, statement in TARGETS.items():
+        try:
+            results[name] = benchmark(statement, args.runs, args.top)
+        except RuntimeError as e:
+            print(f"{name}: failed to import ({e})", file=sys.stderr)
+            return 1
+        print(f"{name}: imports {results[name]['import_ms']:.1f} ms, "
+              f"interpreter wall {results[name]['wall_ms']:.1f} ms")
+        for entry in results[name]["slowest_imports"]:
+            print(f"    {entry['ms']:8.2f} ms  {entry['module']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = [
+            name for name, result in results.items()
+            if name in baseline and
+            result["import_ms"] > baseline[name]["import_ms"] * (1 + args.tolerance)
+        ]
+        for name in regressions:
+            print(f"Regression: {name} imports took {results[name]['import_ms']:.1f} ms "
+                  f"(baseline {baseline[name]['import_ms']:.1f} ms)", file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
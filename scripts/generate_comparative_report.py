@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+import sys
+import argparse
+from pathlib import Path
+
+# Add the src directory to Python path
+src_dir = str(Path(__file__).parent.parent / "src")
+sys.path.append(src_dir)
+
+from analyzer.report_renderer import render_comparative, structured_from_stored
+from analyzer.result_store import ResultStore
+
+def render_report(store: ResultStore, limit: int) -> str:
+    """Render the comparative report from the latest stored results"""
+    return render_comparative(structured_from_stored(r) for r in store.top(n=limit))
+
+def main():
+    """Generate the comparative report from the result store"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--db", help="Result store database (defaults to the service store)")
+    parser.add_argument("--limit", type=int, default=10, help="Number of projects to include")
+    parser.add_argument("--output", help="Write the report here instead of stdout")
+    args = parser.parse_args()
+
+    report = render_report(ResultStore(args.db), args.limit)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+        print(f"Wrote comparative report to {args.output}")
+    else:
+        print(report)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
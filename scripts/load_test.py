@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+import os
+import sys
+import glob
+import json
+import time
+import random
+import shutil
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.error
+import urllib.request
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+src_dir = str(Path(__file__).parent.parent / "src")
+
+SCENARIOS = ("hit", "cold", "huge")
+
+# Request body of each scenario; huge repositories ask for every component
+# explicitly, which is not a standard request, so they are analyzed each time
+# over a warm clone and file cache instead of being served from the store
+SCENARIO_OPTIONS = {
+    "hit": {},
+    "cold": {},
+    "huge": {"components": ["code_quality", "ai_framework", "execution", "security"]},
+}
+
+# Synthetic sources with the patterns the analyzers look for; {salt} keeps
+# the blobs of different repositories apart so cold clones miss the file cache
+TEMPLATES = {
+    ".py": (
+        "import torch\nimport logging\n\n"
+        "class Model{i}(torch.nn.Module):\n"
+        "    \"\"\"Model {i} of {salt}\"\"\"\n"
+        "    def forward(self, x):\n"
+        "        try:\n"
+        "            return self.layer(x) * {i}\n"
+        "        except RuntimeError as e:\n"
+        "            logging.error(\"inference failed: %s\", e)\n"
+        "            raise\n"
+    ),
+    ".rs": (
+        "/// Agent {i} of {salt}\n"
+        "pub fn infer_{i}(input: &str) -> Result<String, String> {{\n"
+        "    if input.is_empty() {{ return Err(\"empty\".to_string()); }}\n"
+        "    Ok(format!(\"{{}}-{i}\", input))\n"
+        "}}\n"
+    ),
+    ".ts": (
+        "// Client {i} of {salt}\n"
+        "export async function complete{i}(prompt: string): Promise<string> {{\n"
+        "  try {{\n"
+        "    const response = await fetch(\"/v1/complete\", {{ method: \"POST\", body: prompt }});\n"
+        "    return await response.text();\n"
+        "  }} catch (error) {{\n"
+        "    throw new Error(`completion {i} failed: ${{error}}`);\n"
+        "  }}\n"
+        "}}\n"
+    ),
+}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port} after {timeout:.0f}s")
+
+def make_repo(path: str, files: int, salt: str):
+    """A git repository of files synthetic sources spread over packages of 50"""
+    extensions = list(TEMPLATES)
+    for i in range(files):
+        extension = extensions[i % len(extensions)]
+        directory = os.path.join(path, f"pkg{i // 50}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"module{i}{extension}"), "w") as f:
+            f.write(TEMPLATES[extension].format(i=i, salt=salt))
+    git = ["git", "-c", "user.name=load-test", "-c", "user.email=load-test@localhost"]
+    subprocess.run(git + ["init", "-q"], cwd=path, check=True)
+    subprocess.run(git + ["add", "-A"], cwd=path, check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "synthetic"], cwd=path, check=True)
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Scenario shares from e.g. hit=70,cold=20,huge=10"""
+    shares = {}
+    for item in mix.split(","):
+        name, _, share = item.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name.strip()!r}, expected one of {', '.join(SCENARIOS)}")
+        shares[name.strip()] = float(share)
+    return shares
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile, None without values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))]
+
+def summarize(samples: List[Tuple[str, float, Optional[str]]], elapsed: float) -> Dict:
+    """Throughput, latency percentiles and error rate, overall and per scenario"""
+    def stats(rows):
+        latencies = [latency * 1000 for _, latency, error in rows if error is None]
+        errors = sum(1 for _, _, error in rows if error is not None)
+        return {
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate": errors / len(rows) if rows else 0.0,
+            "throughput": len(rows) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+        }
+    summary = {"elapsed_s": elapsed, "overall": stats(samples), "scenarios": {}}
+    for scenario in SCENARIOS:
+        rows = [sample for sample in samples if sample[0] == scenario]
+        if rows:
+            summary["scenarios"][scenario] = stats(rows)
+    # The first error messages tell apart timeouts, clone failures and crashes
+    summary["sample_errors"] = sorted({error for _, _, error in samples if error is not None})[:5]
+    return summary
+
+def post(url: str, body: Dict, timeout: float) -> Optional[str]:
+    """POST a request and return None on success, or what went wrong"""
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}, method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return None if response.status == 200 else f"HTTP {response.status}"
+    except urllib.error.HTTPError as e:
+        return f"HTTP {e.code}: {e.read()[:200].decode('utf-8', 'replace')}"
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+class LoadTest:
+    """Synthetic repositories behind git daemon and the analysis service in front of them"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.workdir = tempfile.mkdtemp(prefix="chron-load-")
+        self.repos = os.path.join(self.workdir, "repos")
+        os.makedirs(self.repos)
+        self.run_id = os.path.basename(self.workdir).replace("_", "-")
+        self.processes: List[subprocess.Popen] = []
+        self.names: List[str] = []
+        self.repo_base = ""
+        self.service = args.url
+
+    def repo(self, kind: str, files: int, index: int = 0) -> str:
+        """URL of a new synthetic repository"""
+        name = f"{self.run_id}-{kind}{index}"
+        make_repo(os.path.join(self.repos, name), files, salt=name)
+        self.names.append(name)
+        return f"{self.repo_base}/{name}"
+
+    def start(self):
+        if self.args.transport == "daemon":
+            port = free_port()
+            self.processes.append(subprocess.Popen(
+                ["git", "daemon", "--reuseaddr", "--export-all", f"--base-path={self.repos}",
+                 "--listen=127.0.0.1", f"--port={port}", self.repos],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            ))
+            wait_for_port(port)
+            self.repo_base = f"git://127.0.0.1:{port}"
+        else:
+            self.repo_base = f"file://{self.repos}"
+
+        if self.service is None:
+            port = free_port()
+            env = dict(
+                os.environ,
+                CHRON_DATA_DIR=os.path.join(self.workdir, "data"),
+                CHRON_WARM_TOP_N="0",
+                CHRON_ANALYSIS_TIMEOUT=str(self.args.timeout),
+            )
+            self.processes.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", src_dir,
+                 "--host", "127.0.0.1", "--port", str(port), "--workers", str(self.args.workers),
+                 "--log-level", "warning"],
+                env=env
+            ))
+            wait_for_port(port, timeout=60)
+            self.service = f"http://127.0.0.1:{port}"
+
+    def stop(self):
+        for process in reversed(self.processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        # Clones the service made of the synthetic repositories, and their lock files
+        for name in self.names:
+            for path in glob.glob(f"/tmp/analysis_{name}_*"):
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def plan(self) -> List[Tuple[str, Dict]]:
+        """Requests in the order they are sent, with every repository created beforehand"""
+        rng = random.Random(self.args.seed)
+        shares = parse_mix(self.args.mix)
+        kinds = rng.choices(list(shares), weights=list(shares.values()), k=self.args.requests)
+        targets = {}
+        if "hit" in kinds:
+            targets["hit"] = self.repo("hot", self.args.repo_files)
+        if "huge" in kinds:
+            targets["huge"] = self.repo("huge", self.args.huge_files)
+        requests = []
+        for i, kind in enumerate(kinds):
+            repo_url = self.repo("cold", self.args.repo_files, i) if kind == "cold" else targets[kind]
+            requests.append((kind, dict(SCENARIO_OPTIONS[kind], repo_url=repo_url, timeout=self.args.timeout)))
+        # Hot and huge repositories are cloned and stored before timing starts
+        self.warmup = [(kind, dict(SCENARIO_OPTIONS[kind], repo_url=url)) for kind, url in targets.items()]
+        return requests
+
+    def run(self, requests: List[Tuple[str, Dict]]) -> Dict:
+        url = f"{self.service}/analyze"
+        for kind, body in self.warmup:
+            error = post(url, body, self.args.timeout + 30)
+            if error is not None:
+                raise RuntimeError(f"Warm-up of {kind} failed: {error}")
+
+        def send(request: Tuple[str, Dict]) -> Tuple[str, float, Optional[str]]:
+            kind, body = request
+            started = time.perf_counter()
+            error = post(url, body, self.args.timeout + 30)
+            return kind, time.perf_counter() - started, error
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.concurrency) as executor:
+            samples = list(executor.map(send, requests))
+        return summarize(samples, time.perf_counter() - started)
+
+def report(summary: Dict):
+    def ms(value: Optional[float]) -> str:
+        return f"{value:8.1f}" if value is not None else "       -"
+    overall = summary["overall"]
+    print(f"{overall['requests']} requests in {summary['elapsed_s']:.1f} s: "
+          f"{overall['throughput']:.2f} req/s, {overall['error_rate']:.1%} errors")
+    print(f"  {'scenario':10} {'requests':>8} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, stats in [("overall", overall), *summary["scenarios"].items()]:
+        print(f"  {name:10} {stats['requests']:8d} {stats['error_rate']:7.1%} "
+              f"{ms(stats['p50_ms'])} {ms(stats['p95_ms'])} {ms(stats['p99_ms'])}")
+    for error in summary["sample_errors"]:
+        print(f"  error: {error}", file=sys.stderr)
+
+def main():
+    """Measure throughput, latency and errors of /analyze under a mix of synthetic requests"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--requests", type=int, default=200, help="Requests to send after warm-up")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--mix", default="hit=70,cold=20,huge=10",
+                        help="Scenario shares: hit (served from the result store), cold (fresh clone), "
+                             "huge (full pass over a large repository)")
+    parser.add_argument("--repo-files", type=int, default=60, help="Files in hit and cold repositories")
+    parser.add_argument("--huge-files", type=int, default=3000, help="Files in the huge repository")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes of the service")
+    parser.add_argument("--transport", choices=("daemon", "file"), default="daemon",
+                        help="Serve repositories through git daemon, or as file:// URLs")
+    parser.add_argument("--url", help="Load an already running service instead of starting src/main.py")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Analysis timeout of each request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative p95 latency or throughput regression over the baseline")
+    args = parser.parse_args()
+
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    test = LoadTest(args)
+    try:
+        test.start()
+        requests = test.plan()
+        summary = test.run(requests)
+    except RuntimeError as e:
+        print(f"Load test failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        test.stop()
+
+    summary["config"] = {key: getattr(args, key) for key in
+                         ("requests", "concurrency", "mix", "repo_files", "huge_files", "workers", "transport")}
+    report(summary)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = []
+        for name, stats in [("overall", summary["overall"]), *summary["scenarios"].items()]:
+            before = baseline["overall"] if name == "overall" else baseline.get("scenarios", {}).get(name)
+            if before is None:
+                continue
+            if stats["p95_ms"] and before["p95_ms"] and stats["p95_ms"] > before["p95_ms"] * (1 + args.tolerance):
+                regressions.append(f"{name} p95 {stats['p95_ms']:.1f} ms (baseline {before['p95_ms']:.1f} ms)")
+            if stats["error_rate"] > before["error_rate"]:
+                regressions.append(f"{name} error rate {stats['error_rate']:.1%} (baseline {before['error_rate']:.1%})")
+        if summary["overall"]["throughput"] < baseline["overall"]["throughput"] * (1 - args.tolerance):
+            regressions.append(f"throughput {summary['overall']['throughput']:.2f} req/s "
+                               f"(baseline {baseline['overall']['throughput']:.2f} req/s)")
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
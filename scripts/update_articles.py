@@ -1,74 +1,53 @@
 #!/usr/bin/env python3
-import re
-import glob
-import os
+import sys
+import argparse
 from pathlib import Path
 
-def extract_scores(report_path):
-    """Extract scores from analysis report"""
-    with open(report_path, "r") as f:
-        content = f.read()
-    
-    # Extract scores using regex
-    ai_score = re.search(r"AI Framework.*?(\d+\.\d+)/10", content, re.DOTALL)
-    code_score = re.search(r"Code Quality.*?(\d+\.\d+)/10", content, re.DOTALL)
-    exec_score = re.search(r"Execution.*?(\d+\.\d+)/10", content, re.DOTALL)
-    security_score = re.search(r"Security.*?(\d+\.\d+)/10", content, re.DOTALL)
-    overall_score = re.search(r"Final Score:\s*(\d+\.\d+)/10", content)
-    
-    # Print debug info
-    print(f"Extracting scores from {report_path}:")
-    print(f"AI Framework Score: {ai_score.group(1) if ai_score else 'Not found'}")
-    print(f"Code Quality Score: {code_score.group(1) if code_score else 'Not found'}")
-    print(f"Execution Score: {exec_score.group(1) if exec_score else 'Not found'}")
-    print(f"Security Score: {security_score.group(1) if security_score else 'Not found'}")
-    print(f"Overall Score: {overall_score.group(1) if overall_score else 'Not found'}\n")
-    
-    return {
-        "ai_score": ai_score.group(1) if ai_score else "0.0",
-        "code_score": code_score.group(1) if code_score else "0.0",
-        "exec_score": exec_score.group(1) if exec_score else "0.0",
-        "security_score": security_score.group(1) if security_score else "0.0",
-        "overall_score": overall_score.group(1) if overall_score else "0.0"
-    }
+# Add the src directory to Python path
+src_dir = str(Path(__file__).parent.parent / "src")
+sys.path.append(src_dir)
 
-def update_article(article_path, scores):
-    """Update article with actual scores"""
-    with open(article_path, "r") as f:
-        content = f.read()
-    
-    # Replace placeholders with actual scores
-    content = content.replace("{ai_score}", scores["ai_score"])
-    content = content.replace("{code_score}", scores["code_score"])
-    content = content.replace("{exec_score}", scores["exec_score"])
-    content = content.replace("{security_score}", scores["security_score"])
-    content = content.replace("{overall_score}", scores["overall_score"])
-    
-    with open(article_path, "w") as f:
-        f.write(content)
+from analyzer.report_renderer import ArticleRenderer, load_structured_results, structured_from_stored, template_project
 
 def main():
-    """Update all Medium articles with scores from analysis reports"""
+    """Render all Medium articles from structured analysis results in one batch"""
     # Get the project root directory
-    script_dir = Path(__file__).parent
-    project_root = script_dir.parent
+    project_root = Path(__file__).parent.parent
+    
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--reports", default=str(project_root / "reports/analysis"),
+                        help="Directory of <project>_analysis_report.json files, or .md reports without one")
+    parser.add_argument("--db", help="Also use the latest results from this result store")
+    parser.add_argument("--templates", default=str(project_root / "reports/templates"),
+                        help="Directory of article templates")
+    parser.add_argument("--output", default=str(project_root / "reports/medium"),
+                        help="Directory the rendered articles are written to")
+    parser.add_argument("--comparative", help="Also render the comparative report to this file name")
+    args = parser.parse_args()
     
-    # Process each project
-    for report_path in glob.glob(str(project_root / "reports/analysis/*_analysis_report.md")):
-        match = re.search(r"(\w+)_analysis_report", report_path)
-        if not match:
-            print(f"Could not extract project name from {report_path}")
-            continue
+    results = load_structured_results(args.reports)
+    if args.db:
+        from analyzer.result_store import ResultStore
+        for stored in ResultStore(args.db).top(n=1_000_000):
+            data = structured_from_stored(stored)
+            results.setdefault(data["project"], data)
             
-        project = match.group(1)
-        scores = extract_scores(report_path)
-        article_path = project_root / f"reports/medium/{project}_article.md"
+    if not results:
+        print(f"No analysis results found in {args.reports}")
+        return 1
         
-        if os.path.exists(article_path):
-            update_article(str(article_path), scores)
-            print(f"Updated article for {project} with scores: {scores}")
-        else:
-            print(f"Article not found: {article_path}")
+    renderer = ArticleRenderer(args.templates)
+    for name in renderer.templates:
+        project = template_project(name)
+        if project is not None and project not in results:
+            print(f"No structured results for {project}, skipping {name}")
+        missing = renderer.missing_fields(name, results)
+        if missing:
+            print(f"Results do not fill {', '.join(missing)}, skipping {name}")
+            
+    for path in renderer.write_all(results, args.output, comparative=args.comparative):
+        print(f"Rendered {path}")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
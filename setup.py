@@ -5,21 +5,36 @@ setup(
     version="0.1.0",
     packages=find_packages(where="src"),
     package_dir={"": "src"},
+    package_data={"analyzer": ["signatures.json"]},
     install_requires=[
         "fastapi>=0.104.1",
         "uvicorn>=0.24.0",
         "pydantic>=2.4.2",
         "gitpython>=3.1.40",
-        "pytest>=7.4.3",
-        "pytest-asyncio>=0.21.1",
-        "pylint>=3.0.2",
         "radon>=6.0.1",
-        "bandit>=1.7.5",
-        "tensorflow-hub>=0.15.0",
-        "torch>=2.2.0",
-        "transformers>=4.35.2",
-        "solana>=0.30.2",
-        "anchorpy>=0.18.0",
+        "numpy>=1.24.0",
     ],
+    extras_require={
+        "dev": [
+            "pytest>=7.4.3",
+            "pytest-asyncio>=0.21.1",
+            "pylint>=3.0.2",
+            "bandit>=1.7.5",
+        ],
+        "ml": [
+            "tensorflow-hub>=0.15.0",
+            "torch>=2.2.0",
+            "transformers>=4.35.2",
+        ],
+        "fast": [
+            "msgpack>=1.0.7",
+            "orjson>=3.9.10",
+            "zstandard>=0.22.0",
+        ],
+        "solana": [
+            "solana>=0.30.2",
+            "anchorpy>=0.18.0",
+        ],
+    },
     python_requires=">=3.8",
 )
@@ -1,6 +1,44 @@
-from .code_analyzer import CodeAnalyzer
-from .ai_detector import AIFrameworkDetector
-from .execution_verifier import ExecutionVerifier
-from .report_generator import ReportGenerator
+import importlib
+from typing import TYPE_CHECKING
 
-__all__ = ['CodeAnalyzer', 'AIFrameworkDetector', 'ExecutionVerifier', 'ReportGenerator']
+# Public names and the submodule that defines them. Submodules are imported
+# on first attribute access so that importing the package stays cheap.
+_EXPORTS = {
+    'CodeAnalyzer': '.code_analyzer',
+    'AnalysisEngine': '.engine',
+    'AIFrameworkDetector': '.ai_detector',
+    'ExecutionVerifier': '.execution_verifier',
+    'ReportGenerator': '.report_generator',
+    'AnalysisBudget': '.sampling',
+    'ResultStore': '.result_store',
+    'FingerprintIndex': '.fingerprint_index',
+    'FileResultCache': '.file_cache',
+    'AnalyzerPlugin': '.plugins',
+    'register_plugin': '.plugins',
+}
+
+__all__ = ['CodeAnalyzer', 'AnalysisEngine', 'AIFrameworkDetector', 'ExecutionVerifier', 'ReportGenerator', 'AnalysisBudget',
+           'ResultStore', 'FingerprintIndex', 'FileResultCache', 'AnalyzerPlugin', 'register_plugin']
+
+if TYPE_CHECKING:
+    from .code_analyzer import CodeAnalyzer
+    from .engine import AnalysisEngine
+    from .ai_detector import AIFrameworkDetector
+    from .execution_verifier import ExecutionVerifier
+    from .report_generator import ReportGenerator
+    from .sampling import AnalysisBudget
+    from .result_store import ResultStore
+    from .fingerprint_index import FingerprintIndex
+    from .file_cache import FileResultCache
+    from .plugins import AnalyzerPlugin, register_plugin
+
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,108 +1,80 @@
 import os
-from typing import Dict, List, Set
+from typing import Dict, Iterator, List, Optional, Set
+from .scanner import SOURCE_EXTENSIONS, read_source_text
+from .signatures import Signatures, current_signatures
 
 class AIFrameworkDetector:
-    """Detects AI/ML frameworks and validates their implementation"""
+    """
+    Detects AI/ML frameworks and validates their implementation
+    Holds only the framework signatures; the repository and files to
+    inspect are passed to each call, so one detector can be shared.
+    """
     
-    KNOWN_AI_FRAMEWORKS = {
-        'tensorflow': {
-            'imports': {'import tensorflow', 'import tf'},
-            'patterns': {'model = tf', 'keras.Sequential', 'keras.layers'}
-        },
-        'pytorch': {
-            'imports': {'import torch', 'from torch'},
-            'patterns': {'torch.nn', 'torch.optim', 'model.forward'}
-        },
-        'transformers': {
-            'imports': {'from transformers', 'import transformers'},
-            'patterns': {'AutoModel', 'AutoTokenizer', 'pipeline'}
-        },
-        'openai': {
-            'imports': {'import openai', 'from openai', 'OpenAI', 'import { Configuration, OpenAIApi }'},
-            'patterns': {
-                'openai.Completion', 'openai.ChatCompletion', 
-                'new OpenAI(', 'OpenAIApi', 'gpt-4', 'gpt-3.5-turbo',
-                'createChatCompletion', 'createCompletion'
-            }
-        },
-        'langchain': {
-            'imports': {'from langchain', 'import langchain', 'import { LangChain }'},
-            'patterns': {'LLMChain', 'PromptTemplate', 'ChatPromptTemplate'}
-        },
-        'rig': {
-            'imports': {'use rig', 'from rig'},
-            'patterns': {'CompletionModel', 'EmbeddingModel', 'Agent'}
-        },
-        'react-ai': {
-            'imports': {'import { useCompletion }', 'import { useChat }', 'import { useModel }'},
-            'patterns': {
-                'useCompletion', 'useChat', 'useModel',
-                'generateText', 'generateCompletion',
-                'model: registry.languageModel'
-            }
-        },
-        'next-ai': {
-            'imports': {'import { OpenAIStream }', 'import { LangChainStream }'},
-            'patterns': {
-                'OpenAIStream', 'LangChainStream',
-                'experimental_StreamData',
-                'createParser', 'EventSource'
-            }
-        }
-    }
-    
-    def __init__(self, repo_path: str):
-        self.repo_path = repo_path
+    def __init__(self, signatures: Optional[Signatures] = None):
+        # Framework imports and usage patterns, from the signature database
+        self.signatures = signatures or current_signatures()
         
-    async def detect_frameworks(self) -> float:
+    async def detect_frameworks(self, repo_path: str, files: Optional[List[str]] = None) -> float:
         """
-        Detect AI frameworks and validate their implementation
+        Detect AI frameworks in a repository, or in the given files of it, and validate their implementation
         Returns a score between 0 and 1
         """
-        self.framework_scores = {}
-        detected = self._find_framework_implementations()
-        if not detected:
-            return 0.0
+        return self.aggregate([
+            self.score_content(read_source_text(file_path)) for file_path in self._source_files(repo_path, files)
+        ])
+        
+    @staticmethod
+    def _source_files(repo_path: str, files: Optional[List[str]]) -> Iterator[str]:
+        """Yield the files to inspect, walking the repository unless a file list was given"""
+        if files is not None:
+            yield from files
+            return
             
-        # Calculate weighted score based on implementation quality
-        total_score = sum(self.framework_scores.values())
-        max_possible = len(self.framework_scores) * 1.0
+        for root, _, names in os.walk(repo_path):
+            for name in names:
+                if name.endswith(SOURCE_EXTENSIONS):  # Support Python, Rust, and TypeScript/JavaScript
+                    yield os.path.join(root, name)
         
-        return min(1.0, total_score / max_possible if max_possible > 0 else 0.0)
+    def score_content(self, content: str) -> Dict[str, float]:
+        """Score the evidence for each framework found in a single file"""
+        scores = {}
+        for framework, (imports, patterns) in self.signatures.frameworks.items():
+            score = 0
+            # Check imports
+            if any(pattern in content for pattern in imports):
+                score += 0.5
+            # Check actual implementation patterns
+            if any(pattern in content for pattern in patterns):
+                score += 0.5
+                
+            if score > 0:
+                scores[framework] = score
+        return scores
         
-    def _find_framework_implementations(self) -> Set[str]:
-        """Find AI framework implementations in the codebase"""
-        detected_frameworks = set()
-        framework_scores = {}
+    @staticmethod
+    def merge_scores(file_scores: List[Dict[str, float]]) -> Dict[str, float]:
+        """Keep the strongest evidence seen for each framework across files"""
+        framework_scores: Dict[str, float] = {}
+        for scores in file_scores:
+            for framework, score in scores.items():
+                framework_scores[framework] = max(score, framework_scores.get(framework, 0))
+        return framework_scores
         
-        for root, _, files in os.walk(self.repo_path):
-            for file in files:
-                if not file.endswith(('.py', '.rs', '.ts', '.tsx', '.js', '.jsx')):  # Support Python, Rust, and TypeScript/JavaScript
-                    continue
-                    
-                with open(os.path.join(root, file), 'r') as f:
-                    content = f.read()
-                    
-                for framework, patterns in self.KNOWN_AI_FRAMEWORKS.items():
-                    score = 0
-                    # Check imports
-                    if any(pattern in content for pattern in patterns['imports']):
-                        score += 0.5
-                    # Check actual implementation patterns
-                    if any(pattern in content for pattern in patterns['patterns']):
-                        score += 0.5
-                        
-                    if score > 0:
-                        framework_scores[framework] = max(
-                            score,
-                            framework_scores.get(framework, 0)
-                        )
-                        if score > 0.7:  # Strong evidence of implementation
-                            detected_frameworks.add(framework)
+    @classmethod
+    def aggregate(cls, file_scores: List[Dict[str, float]]) -> float:
+        """Combine per-file framework scores into the repository score"""
+        framework_scores = cls.merge_scores(file_scores)
+        if not any(score > 0.7 for score in framework_scores.values()):
+            return 0.0
+        return cls._score_frameworks(framework_scores)
+        
+    @staticmethod
+    def _score_frameworks(framework_scores: Dict[str, float]) -> float:
+        """Calculate weighted score based on implementation quality"""
+        total_score = sum(framework_scores.values())
+        max_possible = len(framework_scores) * 1.0
         
-        # Update instance variable for use in scoring
-        self.framework_scores = framework_scores
-        return detected_frameworks
+        return min(1.0, total_score / max_possible if max_possible > 0 else 0.0)
         
     def _analyze_implementation(self, frameworks: Set[str]) -> float:
         """
@@ -110,4 +82,4 @@ class AIFrameworkDetector:
         Returns a score between 0 and 1
         """
         # TODO: Implement deeper analysis of framework usage
-        return len(frameworks) / len(self.KNOWN_AI_FRAMEWORKS)
+        return len(frameworks) / len(self.signatures.frameworks)
@@ -0,0 +1,97 @@
+import re
+from typing import Any, Dict, List
+from .plugins import AnalyzerPlugin, register_plugin
+
+ANCHOR_DEPENDENCY = re.compile(r'^\s*anchor-lang\s*=', re.MULTILINE)
+PROGRAM_ATTRIBUTE = re.compile(r'#\[program\]')
+ACCOUNTS_STRUCT = re.compile(
+    r'#\[derive\([^)]*\bAccounts\b[^)]*\)\]\s*(?:#\[[^\]]*\]\s*)*pub\s+struct\s+(\w+)[^{]*\{(.*?)\n\}',
+    re.DOTALL
+)
+UNCHECKED_FIELD = re.compile(r'^\s*pub\s+(\w+)\s*:\s*(AccountInfo|UncheckedAccount)\s*<')
+
+# Line-level rules: (rule id, pattern, message)
+LINE_RULES = [
+    ('init-if-needed', re.compile(r'\binit_if_needed\b'),
+     'init_if_needed allows reinitialization attacks unless the account state is checked'),
+    ('unwrap-in-program', re.compile(r'\.unwrap\(\)'),
+     'unwrap() in program code aborts the transaction without a descriptive error'),
+    ('unchecked-arithmetic', re.compile(r'\b\w+\s*[+\-*]=\s*\w'),
+     'Arithmetic assignment without checked_* may overflow'),
+]
+
+@register_plugin
+class AnchorChecks(AnalyzerPlugin):
+    """Security checks for Solana programs written with the Anchor framework"""
+
+    name = 'anchor'
+    requires = ('files', 'sources', 'manifests')
+
+    def analyze(self, inputs: Dict[str, Any]) -> Dict:
+        manifests = inputs['manifests']
+        applicable = (
+            any(path.split('/')[-1] == 'Anchor.toml' for path in manifests) or
+            any(ANCHOR_DEPENDENCY.search(content) for path, content in manifests.items()
+                if path.endswith('Cargo.toml'))
+        )
+        if not applicable:
+            return {'applicable': False, 'programs': 0, 'findings': [], 'score': None}
+
+        programs = 0
+        findings: List[Dict] = []
+        for source_file in inputs['files']:
+            if source_file.language != 'rust':
+                continue
+            content = inputs['sources'][source_file.rel_path]
+            findings.extend(self._check_accounts(source_file.rel_path, content))
+            # Line rules only apply to the instruction handlers of a program module
+            if PROGRAM_ATTRIBUTE.search(content):
+                programs += 1
+                findings.extend(self._check_lines(source_file.rel_path, content))
+
+        return {
+            'applicable': True,
+            'programs': programs,
+            'findings': findings,
+            'score': max(0.0, 1 - 0.1 * len(findings)),
+        }
+
+    @staticmethod
+    def _check_accounts(rel_path: str, content: str) -> List[Dict]:
+        """Accounts structs: unchecked accounts need a /// CHECK: comment, and someone must sign"""
+        findings = []
+        for match in ACCOUNTS_STRUCT.finditer(content):
+            struct, body = match.group(1), match.group(2)
+            body_line = content.count('\n', 0, match.start(2)) + 1
+            lines = body.split('\n')
+            for i, line in enumerate(lines):
+                field = UNCHECKED_FIELD.match(line)
+                if field is None:
+                    continue
+                preceding = [l.strip() for l in lines[max(0, i - 4):i]]
+                if not any(l.startswith('/// CHECK') for l in preceding):
+                    findings.append({
+                        'rule': 'unchecked-account',
+                        'file': rel_path,
+                        'line': body_line + i,
+                        'message': f"{struct}.{field.group(1)} is an unchecked {field.group(2)} without a /// CHECK: comment",
+                    })
+            if 'Signer<' not in body and 'signer' not in body:
+                findings.append({
+                    'rule': 'missing-signer',
+                    'file': rel_path,
+                    'line': content.count('\n', 0, match.start()) + 1,
+                    'message': f"{struct} requires no signer",
+                })
+        return findings
+
+    @staticmethod
+    def _check_lines(rel_path: str, content: str) -> List[Dict]:
+        findings = []
+        for number, line in enumerate(content.split('\n'), 1):
+            if line.lstrip().startswith('//'):
+                continue
+            for rule, pattern, message in LINE_RULES:
+                if pattern.search(line):
+                    findings.append({'rule': rule, 'file': rel_path, 'line': number, 'message': message})
+        return findings
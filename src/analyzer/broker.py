@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple, Type
+from .result_store import default_data_path
+
+QUEUED = 'queued'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+@dataclass
+class Job:
+    """An analysis request travelling through the broker"""
+    id: int
+    payload: Dict
+    status: str
+    attempts: int
+    lease_owner: Optional[str] = None
+    lease_expires: Optional[float] = None
+    heartbeat_at: Optional[float] = None
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+class Broker(ABC):
+    """
+    Work queue between the API front end and analysis workers
+    Workers lease jobs for a limited time and must heartbeat to keep them;
+    a job whose lease expires is handed to another worker until it runs
+    out of attempts.
+    """
+
+    def __init__(self, max_attempts: int = 3):
+        self.max_attempts = max_attempts
+
+    @abstractmethod
+    def submit(self, payload: Dict) -> int:
+        """Queue a job and return its id"""
+
+    @abstractmethod
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        """Claim the oldest runnable job, including jobs whose lease expired"""
+
+    @abstractmethod
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+        """Extend a lease; False when the worker no longer owns the job"""
+
+    @abstractmethod
+    def complete(self, job_id: int, worker_id: str, result: Dict) -> bool:
+        """Record a job's result; False when the lease was lost meanwhile"""
+
+    @abstractmethod
+    def fail(self, job_id: int, worker_id: str, error: str, retry: bool = True) -> bool:
+        """Record a failure, requeueing the job while attempts remain"""
+
+    @abstractmethod
+    def cancel(self, job_id: int, reason: str = 'cancelled') -> bool:
+        """Fail an unfinished job for good; its worker notices on the next heartbeat"""
+
+    @abstractmethod
+    def get(self, job_id: int) -> Optional[Job]:
+        """Current state of a job"""
+
+    def publish(self, job_id: int, worker_id: str, event: Dict) -> bool:
+        """Record a progress event of a leased job; brokers without progress support drop it"""
+        return True
+
+    def events(self, job_id: int, after: int = 0) -> List[Tuple[int, Dict]]:
+        """Progress events of an unfinished job published after sequence number after"""
+        return []
+
+    async def wait(self, job_id: int, timeout: Optional[float] = None, poll_interval: float = 0.2) -> Job:
+        """Wait for a job to finish, for fan-in of worker results"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                raise KeyError(f"Unknown job {job_id}")
+            if job.finished:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                raise asyncio.TimeoutError(f"Job {job_id} did not finish within {timeout}s")
+            await asyncio.sleep(poll_interval)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    heartbeat_at REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_runnable ON jobs (status, id);
+CREATE TABLE IF NOT EXISTS job_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id INTEGER NOT NULL,
+    event TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_events ON job_events (job_id, seq);
+"""
+
+class SQLiteBroker(Broker):
+    """Broker backed by a local SQLite file, shared by processes on one host"""
+
+    def __init__(self, db_path: Optional[str] = None, max_attempts: int = 3):
+        super().__init__(max_attempts)
+        self.db_path = db_path or default_data_path('broker.db')
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+
+    def submit(self, payload: Dict) -> int:
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                'INSERT INTO jobs (payload, status, created_at, updated_at) VALUES (?, ?, ?, ?)',
+                (json.dumps(payload), QUEUED, now, now)
+            )
+            return cursor.lastrowid
+
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        now = time.time()
+        with self._transaction() as conn:
+            # Jobs abandoned by dead workers that used up their attempts fail for good
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = 'lease expired', lease_owner = NULL, updated_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, now, LEASED, now, self.max_attempts)
+            )
+            row = conn.execute(
+                'SELECT id FROM jobs WHERE status = ? OR (status = ? AND lease_expires < ?) ORDER BY id LIMIT 1',
+                (QUEUED, LEASED, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                'UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, heartbeat_at = ?, '
+                'attempts = attempts + 1, updated_at = ? WHERE id = ?',
+                (LEASED, worker_id, now + lease_seconds, now, now, row['id'])
+            )
+            return self._job(conn.execute('SELECT * FROM jobs WHERE id = ?', (row['id'],)).fetchone())
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                'UPDATE jobs SET lease_expires = ?, heartbeat_at = ?, updated_at = ? '
+                'WHERE id = ? AND status = ? AND lease_owner = ?',
+                (now + lease_seconds, now, now, job_id, LEASED, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: Dict) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                'UPDATE jobs SET status = ?, result = ?, error = NULL, lease_owner = NULL, updated_at = ? '
+                'WHERE id = ? AND status = ? AND lease_owner = ?',
+                (DONE, json.dumps(result), time.time(), job_id, LEASED, worker_id)
+            )
+            if cursor.rowcount != 1:
+                return False
+            self._clear_events(conn, job_id)
+            return True
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry: bool = True) -> bool:
+        with self._transaction() as conn:
+            row = conn.execute(
+                'SELECT attempts FROM jobs WHERE id = ? AND status = ? AND lease_owner = ?',
+                (job_id, LEASED, worker_id)
+            ).fetchone()
+            if row is None:
+                return False
+            status = QUEUED if retry and row['attempts'] < self.max_attempts else FAILED
+            conn.execute(
+                'UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, '
+                'updated_at = ? WHERE id = ?',
+                (status, error, time.time(), job_id)
+            )
+            self._clear_events(conn, job_id)
+            return True
+
+    def cancel(self, job_id: int, reason: str = 'cancelled') -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                'UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, '
+                'updated_at = ? WHERE id = ? AND status IN (?, ?)',
+                (FAILED, reason, time.time(), job_id, QUEUED, LEASED)
+            )
+            if cursor.rowcount != 1:
+                return False
+            self._clear_events(conn, job_id)
+            return True
+
+    def publish(self, job_id: int, worker_id: str, event: Dict) -> bool:
+        with self._transaction() as conn:
+            # Only the current lease owner may publish, not a worker that lost the job
+            cursor = conn.execute(
+                'INSERT INTO job_events (job_id, event) '
+                'SELECT id, ? FROM jobs WHERE id = ? AND status = ? AND lease_owner = ?',
+                (json.dumps(event), job_id, LEASED, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def events(self, job_id: int, after: int = 0) -> List[Tuple[int, Dict]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT seq, event FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq',
+                (job_id, after)
+            ).fetchall()
+        return [(row['seq'], json.loads(row['event'])) for row in rows]
+
+    @staticmethod
+    def _clear_events(conn: sqlite3.Connection, job_id: int):
+        """Drop the progress events of a job that stopped running"""
+        conn.execute('DELETE FROM job_events WHERE job_id = ?', (job_id,))
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._job(row) if row is not None else None
+
+    @staticmethod
+    def _job(row: sqlite3.Row) -> Job:
+        return Job(
+            id=row['id'],
+            payload=json.loads(row['payload']),
+            status=row['status'],
+            attempts=row['attempts'],
+            lease_owner=row['lease_owner'],
+            lease_expires=row['lease_expires'],
+            heartbeat_at=row['heartbeat_at'],
+            result=json.loads(row['result']) if row['result'] else None,
+            error=row['error']
+        )
+
+# Broker implementations by URL scheme; other backends register themselves here
+BROKERS: Dict[str, Type[Broker]] = {
+    'sqlite': SQLiteBroker,
+}
+
+def register_broker(scheme: str, broker_class: Type[Broker]):
+    """Make a broker implementation available to create_broker"""
+    BROKERS[scheme] = broker_class
+
+def create_broker(url: str, **kwargs) -> Broker:
+    """Create a broker from a URL such as sqlite:///var/lib/chron/broker.db"""
+    scheme, _, location = url.partition('://')
+    if scheme not in BROKERS:
+        raise ValueError(f"Unknown broker scheme: {scheme}")
+    return BROKERS[scheme](location or None, **kwargs)
@@ -0,0 +1,86 @@
+import os
+import time
+import threading
+from typing import Optional
+
+class AnalysisCancelled(Exception):
+    """Raised inside an analysis stage once its token is cancelled"""
+
+class DeadlineExceeded(AnalysisCancelled):
+    """The analysis ran past its deadline"""
+
+class ResourceLimitExceeded(AnalysisCancelled):
+    """The analysis used more CPU time or memory than allowed"""
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        # ru_maxrss is the peak, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+class CancellationToken:
+    """
+    Cooperative cancellation shared by every stage of one analysis
+    Stages call check() between units of work; the token trips when it is
+    cancelled explicitly (e.g. the client disconnected), when the deadline
+    passes, or when the CPU time or memory limit is exceeded.
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        cpu_limit: Optional[float] = None,
+        memory_limit: Optional[int] = None
+    ):
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.cpu_limit = cpu_limit
+        self.memory_limit = memory_limit
+        self._cpu_start = time.process_time()
+        self._cancelled = threading.Event()
+        self.reason: Optional[str] = None
+        self.error: Optional[AnalysisCancelled] = None
+
+    def cancel(self, reason: str = 'cancelled', error: type = AnalysisCancelled):
+        """Cancel the analysis; safe to call from any thread"""
+        if not self._cancelled.is_set():
+            self.reason = reason
+            self.error = error(reason)
+            self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._cancelled.is_set():
+            return True
+        try:
+            self._check_limits()
+        except AnalysisCancelled:
+            return True
+        return False
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline, None without a deadline"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        """Raise if the analysis should stop"""
+        if not self._cancelled.is_set():
+            self._check_limits()
+        if self.error is not None:
+            raise self.error
+
+    def _check_limits(self):
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel('deadline exceeded', DeadlineExceeded)
+        elif self.cpu_limit is not None and time.process_time() - self._cpu_start > self.cpu_limit:
+            self.cancel('cpu time limit exceeded', ResourceLimitExceeded)
+        elif self.memory_limit is not None and current_rss() > self.memory_limit:
+            self.cancel('memory limit exceeded', ResourceLimitExceeded)
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,227 @@
+import os
+import re
+import fcntl
+import shutil
+import asyncio
+import hashlib
+import weakref
+import contextlib
+from collections import deque
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, FrozenSet, Optional, Tuple
+from .cancellation import CancellationToken
+
+# How often a running clone checks its cancellation token
+POLL_INTERVAL = 0.25
+
+PROGRESS_SEPARATOR = re.compile(rb'[\r\n]')
+
+# Directory holding the local clones analyses share
+CHECKOUT_ROOT = '/tmp'
+
+# Characters of a repository name kept in its clone's directory name
+UNSAFE_NAME = re.compile(r'[^A-Za-z0-9._-]')
+
+# One lock per clone, held while the clone is fetched, checked out or read;
+# a lock no analysis holds or waits for is dropped. Other processes on the
+# host are kept out by a flock on the clone's lock file, taken after it
+_checkout_locks: 'weakref.WeakValueDictionary[str, asyncio.Lock]' = weakref.WeakValueDictionary()
+
+# Clones held, with the task holding each, so a checkout nested in another
+# reuses it; tasks started inside a checkout inherit the variable but not the clone
+_held_checkouts: ContextVar[FrozenSet[Tuple[str, asyncio.Task]]] = ContextVar('held_checkouts', default=frozenset())
+
+class CloneError(RuntimeError):
+    """git clone exited with an error"""
+
+def open_repository(repo_path: Optional[str]):
+    """
+    GitPython repository of a local checkout
+    GitPython opens the process's working directory for a None path, so a
+    missing path is refused instead of reading some other repository.
+    """
+    if not repo_path:
+        raise ValueError("No local checkout to open")
+    from git import Repo  # Deferred: GitPython is only needed for git metadata
+    return Repo(repo_path)
+
+def checkout_path(repo_url: str) -> str:
+    """
+    Local clone of a repository, keyed by its full URL
+    Repositories of the same name under different owners or hosts get
+    different clones; the name is kept for readability.
+    """
+    name = UNSAFE_NAME.sub('_', repo_url.rstrip('/').split('/')[-1]) or 'repository'
+    digest = hashlib.sha1(repo_url.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(CHECKOUT_ROOT, f"analysis_{name}_{digest}")
+
+def checkout_lock(path: str) -> asyncio.Lock:
+    """The lock serializing every use of the clone at path in this process"""
+    lock = _checkout_locks.get(path)
+    if lock is None:
+        lock = _checkout_locks[path] = asyncio.Lock()
+    return lock
+
+def checkout_held(path: str) -> bool:
+    """Whether the current task already holds the clone at path"""
+    return (path, asyncio.current_task()) in _held_checkouts.get()
+
+@contextlib.asynccontextmanager
+async def hold_checkout(path: str, cancellation: Optional[CancellationToken] = None) -> AsyncIterator[None]:
+    """
+    Hold the clone at path for the duration of the block, waiting for its locks first
+    Tasks of this process queue on the clone's asyncio lock; the holder then
+    takes an exclusive flock on path.lock, which keeps out other processes
+    sharing the checkout root, such as several workers on one host. The
+    lock file stays in place, so every process always locks the same file.
+    """
+    async with checkout_lock(path):
+        with open(f"{path}.lock", 'a') as lock_file:
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if cancellation is not None:
+                        cancellation.check()
+                    await asyncio.sleep(POLL_INTERVAL)
+            token = _held_checkouts.set(_held_checkouts.get() | {(path, asyncio.current_task())})
+            try:
+                yield
+            finally:
+                _held_checkouts.reset(token)
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+async def clone_repository(
+    repo_url: str,
+    path: str,
+    cancellation: Optional[CancellationToken] = None,
+    on_progress: Optional[Callable[[str], None]] = None
+):
+    """
+    Clone a repository with git, killing the clone when the token trips
+    GitPython's clone cannot be interrupted, so git runs as an asyncio
+    subprocess; the event loop stays free and a deadline or disconnect
+    stops the transfer instead of waiting for it. Progress lines from git
+    are passed to on_progress. A partial checkout is removed on failure.
+    """
+    from git import Git  # Deferred: only for its protocol safety check
+    Git.check_unsafe_protocols(repo_url)
+
+    process = await asyncio.create_subprocess_exec(
+        'git', 'clone', '--progress', '--', repo_url, path,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+        # Never block on a credential prompt for private or missing repositories
+        env=dict(os.environ, GIT_TERMINAL_PROMPT='0')
+    )
+    tail = deque(maxlen=10)
+    buffer = b''
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(process.stderr.read(4096), timeout=POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                chunk = None
+            if cancellation is not None:
+                cancellation.check()
+            if chunk == b'':
+                if buffer:
+                    tail.append(buffer.decode('utf-8', 'replace'))
+                break
+            if chunk:
+                *lines, buffer = PROGRESS_SEPARATOR.split(buffer + chunk)
+                for line in lines:
+                    if line:
+                        text = line.decode('utf-8', 'replace')
+                        tail.append(text)
+                        if on_progress is not None:
+                            on_progress(text)
+        returncode = await process.wait()
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+
+    if returncode != 0:
+        shutil.rmtree(path, ignore_errors=True)
+        raise CloneError(f"git clone of {repo_url} failed: {' '.join(tail) or f'exit code {returncode}'}")
+
+# Seconds to wait for a remote to list its refs
+REMOTE_TIMEOUT = 15.0
+
+async def remote_head(repo_url: str, timeout: float = REMOTE_TIMEOUT) -> Optional[str]:
+    """Commit at the remote's HEAD, without cloning; None when the remote cannot be reached"""
+    from git import Git  # Deferred: only for its protocol safety check
+    try:
+        Git.check_unsafe_protocols(repo_url)
+    except Exception:
+        return None
+    process = await asyncio.create_subprocess_exec(
+        'git', 'ls-remote', '--', repo_url, 'HEAD',
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        env=dict(os.environ, GIT_TERMINAL_PROMPT='0')
+    )
+    try:
+        output, _ = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return None
+    if process.returncode != 0 or not output:
+        return None
+    return output.split()[0].decode()
+
+async def update_repository(
+    path: str,
+    commit: Optional[str] = None,
+    cancellation: Optional[CancellationToken] = None
+):
+    """
+    Fetch the remote's HEAD into an existing clone and check it out
+    Without a commit the clone moves to whatever HEAD the remote has; with
+    one, the clone is left alone when that commit is already checked out.
+    """
+    if commit is not None:
+        current = await _git(path, 'rev-parse', 'HEAD', cancellation=cancellation, check=False)
+        if current.strip() == commit:
+            return
+    await _git(path, 'fetch', '--quiet', 'origin', 'HEAD', cancellation=cancellation)
+    await _git(path, 'checkout', '--quiet', '--force', commit or 'FETCH_HEAD', cancellation=cancellation)
+
+async def _git(
+    path: str,
+    *args: str,
+    cancellation: Optional[CancellationToken] = None,
+    check: bool = True
+) -> str:
+    """Run git in a clone, killing it when the token trips"""
+    process = await asyncio.create_subprocess_exec(
+        'git', *args, cwd=path,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=dict(os.environ, GIT_TERMINAL_PROMPT='0')
+    )
+    communicate = asyncio.ensure_future(process.communicate())
+    try:
+        while True:
+            done, _ = await asyncio.wait({communicate}, timeout=POLL_INTERVAL)
+            if done:
+                break
+            if cancellation is not None:
+                cancellation.check()
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+        await asyncio.gather(communicate, return_exceptions=True)
+        raise
+    output, error = communicate.result()
+    if check and process.returncode != 0:
+        raise CloneError(f"git {args[0]} in {path} failed: {error.decode('utf-8', 'replace').strip()}")
+    return output.decode('utf-8', 'replace')
@@ -1,308 +1,1171 @@
+import io
 import os
-import re
-from git import Repo
-from typing import Dict, List, Optional
-from dataclasses import dataclass
-import radon.complexity as radon_cc
-from radon.raw import analyze
-from radon.metrics import h_visit
+import random
+import shutil
+import asyncio
+import contextlib
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
+from .cancellation import AnalysisCancelled, CancellationToken
+from .engine import AnalysisEngine, current_engine
+from .execution_verifier import FileExecution
+from .memory import Admission, MemoryGovernor, MemoryTracker, estimate_memory
+from .progress import AnalysisProgress
+from .sampling import AnalysisBudget, bootstrap_intervals, stratified_sample, stratum_key
+from .secrets import SecretFinding
+from .scanner import (
+    LANGUAGE_EXTENSIONS, RepositoryScan, SourceFile, blob_hash, decode_source, read_manifests, read_sources,
+    scan_repository
+)
+
+if TYPE_CHECKING:
+    from .file_cache import FileResultCache
+    from .fingerprint_index import FingerprintBatch, FingerprintIndex
+    from .history import ScoreDiff, ScoreHistory
+    from .import_graph import ImportGraph
+    from .notebook import Notebook
+    from .plugins import AnalyzerPlugin
+    from .workspace import WorkspaceMember
+
+COMPONENTS: Tuple[str, ...] = ('code_quality', 'ai_framework', 'execution', 'security')
+
+OVERALL_WEIGHTS: Dict[str, float] = {
+    'ai_framework': 0.3,  # 30% - AI Framework Implementation
+    'code_quality': 0.3,  # 30% - Code Quality & Patterns
+    'execution': 0.3,     # 30% - Execution & Performance
+    'security': 0.1       # 10% - Security Measures
+}
+
+# Execution evidence only comes from these languages; other files need not be read for it
+EXECUTION_LANGUAGES = ('python', 'rust')
 
 @dataclass
 class AnalysisResult:
-    code_quality_score: float
-    ai_framework_score: float
-    execution_score: float
-    security_score: float
+    # None for components the analysis was not asked for; see score()
+    code_quality_score: Optional[float]
+    ai_framework_score: Optional[float]
+    execution_score: Optional[float]
+    security_score: Optional[float]
     issues: List[Dict]
     recommendations: List[str]
+    confidence_intervals: Optional[Dict[str, Tuple[float, float]]] = None
+    files_analyzed: int = 0
+    files_total: int = 0
+    breakdown: Optional[Dict] = None
+    overlap_percentage: Optional[float] = None
+    overlapping_repositories: Optional[Dict[str, int]] = None
+    truncated: bool = False
+    truncation_reason: Optional[str] = None
+    plugin_results: Optional[Dict[str, Dict]] = None
+    # Version of the signature database the scores were computed with
+    signature_version: Optional[str] = None
+    # Entry points and reachable files when scoring was restricted to reachable code
+    reachability: Optional[Dict] = None
+    # Per-member scores of a monorepo when workspace scoring was requested
+    workspace: Optional[Dict] = None
+    # Blobs scanned and credentials found in the git history when requested
+    secret_history: Optional[Dict] = None
+    # Admission decision, estimate and per-stage peaks when memory is governed
+    memory: Optional[Dict] = None
     
+    def __post_init__(self):
+        # Set by CodeAnalyzer to compute skipped components on first access
+        self._evaluate: Optional[Callable[[str], float]] = None
+        
+    @property
+    def sampled(self) -> bool:
+        """Whether the scores were estimated from a sample of the repository"""
+        return self.files_analyzed < self.files_total
+        
+    @property
+    def components(self) -> Tuple[str, ...]:
+        """Components whose scores have been evaluated"""
+        return tuple(c for c in COMPONENTS if getattr(self, f'{c}_score') is not None)
+        
+    def score(self, component: str) -> float:
+        """Score of a component, evaluating it on first access if the analysis skipped it"""
+        value = getattr(self, f'{component}_score')
+        if value is None:
+            if self._evaluate is None:
+                raise ValueError(f"Component {component} was not evaluated")
+            value = self._evaluate(component)
+            setattr(self, f'{component}_score', value)
+        return value
+        
     def calculate_overall_score(self) -> float:
         """Calculate overall project score using 30/30/30/10 weight distribution"""
-        weights = {
-            'ai_framework': 0.3,  # 30% - AI Framework Implementation
-            'code_quality': 0.3,  # 30% - Code Quality & Patterns
-            'execution': 0.3,     # 30% - Execution & Performance
-            'security': 0.1       # 10% - Security Measures
-        }
+        return sum(weight * self.score(component) for component, weight in OVERALL_WEIGHTS.items())
+
+# FileScores attribute holding each component's per-file evidence
+FILE_FIELDS = {
+    'code_quality': 'code_quality',
+    'ai_framework': 'frameworks',
+    'execution': 'execution',
+    'security': 'security',
+}
+
+@dataclass
+class FileScores:
+    """Per-file scores of the shared file pass; None for components not evaluated yet"""
+    source: SourceFile
+    code_quality: Optional[float] = None
+    security: Optional[float] = None
+    frameworks: Optional[Dict[str, float]] = None
+    execution: Optional[FileExecution] = None
+    # Credentials found by the secret scanner, as [rule, line, preview] and, in
+    # notebooks, the cell the line counts in; filled with security
+    secrets: Optional[List[List]] = None
+    content_hash: str = ''
+    
+    def missing(self, components: Iterable[str]) -> List[str]:
+        """Components among the given ones without a score for this file"""
+        return [c for c in components if getattr(self, FILE_FIELDS[c]) is None]
         
-        return (
-            weights['ai_framework'] * self.ai_framework_score +
-            weights['code_quality'] * self.code_quality_score +
-            weights['execution'] * self.execution_score +
-            weights['security'] * self.security_score
-        )
+    def to_dict(self) -> Dict:
+        """Content-dependent scores, for caching by content hash"""
+        data = {}
+        if self.code_quality is not None:
+            data['code_quality'] = self.code_quality
+        if self.security is not None:
+            data['security'] = self.security
+            data['secrets'] = self.secrets
+        if self.frameworks is not None:
+            data['frameworks'] = self.frameworks
+        if self.execution is not None:
+            data['execution'] = [
+                self.execution.is_python, self.execution.valid_syntax, self.execution.checks_passed,
+                self.execution.checks_total
+            ]
+        return data
+        
+    def merge(self, data: Dict):
+        """Fill scores still missing from a cached entry for identical content"""
+        if self.code_quality is None:
+            self.code_quality = data.get('code_quality')
+        if self.security is None:
+            self.security = data.get('security')
+            self.secrets = data.get('secrets')
+        if self.frameworks is None:
+            self.frameworks = data.get('frameworks')
+        if self.execution is None and 'execution' in data:
+            self.execution = FileExecution(*data['execution'])
+            
+    @classmethod
+    def from_dict(cls, source: SourceFile, content_hash: str, data: Dict) -> 'FileScores':
+        """Rebuild cached scores for a file with identical content"""
+        record = cls(source=source, content_hash=content_hash)
+        record.merge(data)
+        return record
+
+@dataclass
+class AnalysisRun:
+    """
+    State of one analysis, passed explicitly to every stage of it
+    CodeAnalyzer keeps only the repository and the long-lived stores, and
+    the engine only compiled rules, so concurrent analyses never share
+    anything mutable but the stores, which lock themselves.
+    """
+    engine: AnalysisEngine
+    components: Tuple[str, ...]
+    cancellation: CancellationToken
+    progress: AnalysisProgress
+    # Local checkout the run reads, set once it holds the clone
+    repo_path: Optional[str] = None
+    # Fingerprints of the files read, when overlap detection runs
+    fingerprints: Optional['FingerprintBatch'] = None
+    truncated: bool = False
+    # Files counted for framework and execution scores when restricted to reachable code
+    reachable: Optional[Set[str]] = None
+    reachability: Optional[Dict] = None
+    entry_points: Optional[List[str]] = None
+    # Contents the file pass reads, kept when plugins or the import graph need them
+    shared_sources: Optional[Dict[str, str]] = None
+    file_pass_done: Optional[asyncio.Future] = None
+    history_findings: Optional[List[Dict]] = None
+    secret_history: Optional[Dict] = None
+    members: Optional[List['WorkspaceMember']] = None
+    cached_members: Set[str] = field(default_factory=set)
+    # Scores of every blob seen in a history or diff run by (language, blob id)
+    seen_blobs: Dict[Tuple[str, str], Dict] = field(default_factory=dict)
+    blobs_scored: int = 0
+    blobs_reused: int = 0
 
 class CodeAnalyzer:
-    def __init__(self, repo_url: str):
+    """
+    Analyzes one repository with a shared engine
+    Each analyze(), analyze_history() or analyze_diff() call keeps its
+    state in its own AnalysisRun, so calls may run concurrently. Without
+    an engine, each run takes the process's current_engine() as it starts.
+    """
+    
+    def __init__(
+        self,
+        repo_url: str,
+        fingerprint_index: Optional['FingerprintIndex'] = None,
+        file_cache: Optional['FileResultCache'] = None,
+        memory: Optional[MemoryGovernor] = None,
+        engine: Optional[AnalysisEngine] = None
+    ):
         self.repo_url: str = repo_url
+        # An existing local checkout to analyze instead of a clone; never set by a run
         self.repo_path: Optional[str] = None
+        self.fingerprint_index = fingerprint_index
+        self.file_cache = file_cache
+        self.memory = memory
+        self.engine = engine
+        
+    async def clone_repository(
+        self,
+        cancellation: Optional[CancellationToken] = None,
+        progress: Optional[AnalysisProgress] = None,
+        commit: Optional[str] = None
+    ) -> str:
+        """
+        Clone the repository and return the local path; with a commit, an earlier clone is updated to it
+        The clone is shared by every analysis of the repository on the
+        host, so callers hold it through checkout() while they read it. A
+        new clone is made beside its final path and moved into place once
+        complete, so a clone interrupted by a crash is never taken for one.
+        The path is returned, never kept on the analyzer.
+        """
+        from .clone import checkout_path
+        repo_path = checkout_path(self.repo_url)
+        progress = progress or AnalysisProgress()
         
-    async def clone_repository(self) -> str:
-        """Clone the repository and return the local path"""
-        repo_name = self.repo_url.split('/')[-1]
-        self.repo_path = f"/tmp/analysis_{repo_name}"
+        if not os.path.exists(repo_path):
+            from .clone import clone_repository
+            progress.stage('clone', 'started')
+            partial = f"{repo_path}.partial"
+            shutil.rmtree(partial, ignore_errors=True)
+            await clone_repository(
+                self.repo_url, partial, cancellation,
+                on_progress=progress.clone_line if progress.enabled else None
+            )
+            os.rename(partial, repo_path)
+            progress.stage('clone', 'done')
+        elif commit is not None:
+            from .clone import update_repository
+            progress.stage('fetch', 'started')
+            await update_repository(repo_path, commit, cancellation)
+            progress.stage('fetch', 'done')
+        return repo_path
         
-        if os.path.exists(self.repo_path):
-            return self.repo_path
+    @contextlib.asynccontextmanager
+    async def checkout(
+        self,
+        cancellation: Optional[CancellationToken] = None,
+        progress: Optional[AnalysisProgress] = None,
+        commit: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Hold the repository's clone for the duration of the block, cloned or moved to a commit first, and yield its path
+        The clone's locks are taken before the fetch and checkout and
+        released when the block exits, so no other analysis of the
+        repository, in this process or another on the host, moves its
+        working tree in between. A local checkout set as repo_path, or
+        the clone an enclosing checkout of the same task holds, is used as it is.
+        """
+        if self.repo_path:
+            yield self.repo_path
+            return
+        from .clone import checkout_held, checkout_path, hold_checkout
+        path = checkout_path(self.repo_url)
+        if checkout_held(path):
+            yield path
+            return
+        async with hold_checkout(path, cancellation):
+            yield await self.clone_repository(cancellation, progress, commit)
+                
+    def head_commit(self, repo_path: Optional[str] = None) -> Optional[str]:
+        """Commit checked out in a checkout, repo_path by default, if it is a git checkout"""
+        from .clone import open_repository
+        repo_path = repo_path or self.repo_path
+        if not repo_path:
+            raise ValueError("No local checkout to read the head commit of")
+        try:
+            return open_repository(repo_path).head.commit.hexsha
+        except Exception:
+            return None
             
-        Repo.clone_from(self.repo_url, self.repo_path)
-        return self.repo_path
+    async def analyze(
+        self,
+        budget: Optional[AnalysisBudget] = None,
+        breakdown: bool = False,
+        cancellation: Optional[CancellationToken] = None,
+        progress: Optional[AnalysisProgress] = None,
+        components: Optional[Iterable[str]] = None,
+        plugins: Optional[Iterable[str]] = None,
+        reachable_only: bool = False,
+        entry_points: Optional[Iterable[str]] = None,
+        workspace: bool = False,
+        secret_history: bool = False
+    ) -> AnalysisResult:
+        """
+        Perform complete analysis of the repository
+        With components, only those analyzers run and files are read only
+        when a requested analyzer needs them; the other scores are left
+        None and evaluated on first access through AnalysisResult.score().
+        Overlap detection only runs for a complete analysis, and a
+        breakdown needs every component.
+        With a budget, repositories above its thresholds are scored from a
+        stratified sample unless the resulting intervals are too wide.
+        With breakdown, per-file metric distributions are attached to the result.
+        With a cancellation token, a clone that trips it raises, while a file
+        pass that trips it stops early and returns a truncated result built
+        from the files scored so far.
+        Progress events of every stage are reported through progress.
+        Named analyzer plugins run on the stage scheduler alongside the
+        file pass, sharing its scan and file contents.
+        With reachable_only, framework and execution scores only count
+        files reachable in the import graph from the given entry points
+        (relative paths), or from the detected ones by default; without
+        any entry point, every file counts.
+        With workspace, the members of a Cargo, npm/pnpm or multi-package
+        Python workspace are scored in turn as separate units, each cached
+        by the git tree of its directory, and reported next to the
+        repository scores, which still cover every file.
+        The security score counts a file holding a credential as insecure;
+        with secret_history, every blob in the git history is scanned too,
+        once per blob across analyses, and leaked credentials lower the
+        score even when they are gone from the checkout.
+        With a memory governor, the scan's estimate is admitted before any
+        file is read: the analysis may wait for memory, or be downgraded to
+        a sample that does not escalate, and its result reports the
+        decision with the peak memory of each stage.
+        """
+        run = self._start_run(components, breakdown, cancellation, progress)
+        plugin_instances = []
+        if plugins:
+            from .plugins import load_plugins  # Deferred: only analyses with plugins need the scheduler
+            plugin_instances = load_plugins(plugins)
+        # The clone is held until the analysis returns
+        checkout = contextlib.AsyncExitStack()
+        run.repo_path = await checkout.enter_async_context(self.checkout(run.cancellation, run.progress))
+        
+        complete = run.components == COMPONENTS
+        run.fingerprints = self.fingerprint_index.batch() if complete and self.fingerprint_index is not None else None
+        
+        # Per-stage peaks are tracked, and the analysis admitted by its estimate, when memory is governed
+        tracker = None
+        admission: Optional[Admission] = None
+        result = None
+        if self.memory is not None:
+            tracker = run.progress.memory = MemoryTracker()
+        try:
+            run.cancellation.check()
+            scan = scan_repository(run.repo_path)
+            files = scan.files
+            run.progress.emit('discovered', files=len(files), bytes=sum(f.size for f in files))
+            if self.memory is not None:
+                # Plugins and the import graph keep every source, so admission comes before they start
+                admission = await self._admit(
+                    run, files, breakdown,
+                    retain_sources=bool(plugin_instances) or reachable_only, can_sample=not workspace
+                )
+                budget = admission.budget(budget)
+            plugin_task = self._start_plugins(run, plugin_instances, scan) if plugin_instances else None
+            if workspace:
+                from .workspace import discover_workspace  # Deferred: only workspace analyses need it
+                run.members = discover_workspace(read_manifests(run.repo_path, scan.manifests))
+            if reachable_only:
+                run.entry_points = list(entry_points) if entry_points is not None else None
+                unknown = set(run.entry_points or ()).difference(f.rel_path for f in files)
+                if unknown:
+                    raise ValueError(f"Unknown entry points: {', '.join(sorted(unknown))}")
+                # The import graph is built from the contents the file pass reads
+                if run.shared_sources is None:
+                    run.shared_sources = {}
+            try:
+                result = None
+                if budget is not None and budget.exceeded_by(files):
+                    result = await self._analyze_sample(run, scan, budget, breakdown, reachable_only, secret_history)
+                if result is None:
+                    if run.members is not None:
+                        file_scores = await self._score_workspace(run, files, run.members)
+                    else:
+                        file_scores = await self._score_files(run, files)
+                    if reachable_only:
+                        self._restrict_to_reachable(run, scan)
+                    if secret_history and 'security' in run.components:
+                        await self._scan_secret_history(run, file_scores)
+                    result = self._build_result(run, file_scores, len(files), breakdown)
+            except BaseException:
+                if plugin_task is not None:
+                    plugin_task.cancel()
+                raise
+                
+            if plugin_task is not None:
+                run.file_pass_done.set_result(run.shared_sources or {})
+                result.plugin_results = await plugin_task
+                run.progress.stage('plugins', 'done')
+            # The result's lazy component evaluation keeps the run alive, but not the sources
+            run.shared_sources = None
+            return result
+        finally:
+            await checkout.aclose()
+            if tracker is not None:
+                run.progress.memory = None
+                accounting = tracker.stop()
+                if admission is not None:
+                    self.memory.release(admission, accounting)
+                    if result is not None:
+                        result.memory = dict(admission.to_dict(), **accounting)
         
-    async def analyze(self) -> AnalysisResult:
-        """Perform complete analysis of the repository"""
-        if not self.repo_path:
-            await self.clone_repository()
+    async def analyze_history(
+        self,
+        revision: str = 'HEAD',
+        limit: Optional[int] = None,
+        components: Optional[Iterable[str]] = None,
+        cancellation: Optional[CancellationToken] = None,
+        progress: Optional[AnalysisProgress] = None
+    ) -> 'ScoreHistory':
+        """
+        Score the last limit commits of a revision into a time series, without checking any of them out
+        The first commit's tree is listed in full and each later one is
+        diffed against its predecessor, so only the blobs a commit changes
+        are looked at. Every distinct blob is scored once: versions seen at
+        an earlier commit, or in the file cache, are reused, and the blobs
+        left to score are read through one git cat-file process. Commits
+        follow first parents, so merged branches count as one change. A
+        cancelled run returns the points scored so far, marked truncated.
+        """
+        run = self._start_run(components, False, cancellation, progress)
+        async with self.checkout(run.cancellation, run.progress) as repo_path:
+            run.repo_path = repo_path
+            return await self._analyze_history(run, revision, limit)
             
-        if not self.repo_path:  # Still None after clone attempt
-            raise ValueError("Failed to initialize repository path")
+    async def _analyze_history(self, run: AnalysisRun, revision: str, limit: Optional[int]) -> 'ScoreHistory':
+        """Score the commits of a history run in the held clone"""
+        from .history import (  # Deferred: only history runs need the git plumbing
+            HISTORY_COMMITS, HistoryPoint, ScoreHistory, list_commits, resolve_commit
+        )
+        # git and blob scoring run on worker threads, so the event loop stays free
+        loop = asyncio.get_running_loop()
+        commits = await loop.run_in_executor(
+            None, lambda: list_commits(run.repo_path, resolve_commit(run.repo_path, revision), limit or HISTORY_COMMITS)
+        )
+        history = ScoreHistory(signature_version=run.engine.version)
+        run.progress.stage('history', 'started', commits=len(commits))
+        current: Dict[str, FileScores] = {}
+        previous = None
+        try:
+            for commit, timestamp in commits:
+                run.cancellation.check()
+                changed, deleted, scored = await loop.run_in_executor(
+                    None, self._commit_changes, run, previous, commit
+                )
+                for path in deleted:
+                    current.pop(path, None)
+                current.update(scored)
+                
+                records = [current[path] for path in sorted(current)]
+                scores = self._component_scores(run, records) if records else {}
+                history.points.append(HistoryPoint(
+                    commit=commit, timestamp=timestamp, files=len(records),
+                    changed_files=len(changed) + len(deleted), scores=scores,
+                    overall_score=self._overall_score(scores)
+                ))
+                run.progress.emit('commit', commit=commit, index=len(history.points),
+                                    total=len(commits), scores=scores)
+                previous = commit
+        except AnalysisCancelled as e:
+            history.truncated = True
+            history.truncation_reason = str(e)
+            print(f"History stopped after {len(history.points)} of {len(commits)} commits: {e}")
+        history.blobs_scored, history.blobs_reused = run.blobs_scored, run.blobs_reused
+        run.progress.stage('history', 'truncated' if history.truncated else 'done',
+                             blobs_scored=history.blobs_scored, blobs_reused=history.blobs_reused)
+        return history
+        
+    def _commit_changes(
+        self,
+        run: AnalysisRun,
+        previous: Optional[str],
+        commit: str
+    ) -> Tuple[Dict[str, str], List[str], Dict[str, FileScores]]:
+        """Blobs a commit changes and deletes since the previous one, every blob for the first, and their scores"""
+        from .history import changed_blobs, tree_blobs
+        if previous is None:
+            changed, deleted = tree_blobs(run.repo_path, commit), []
+        else:
+            changed, deleted = changed_blobs(run.repo_path, previous, commit)
+        return changed, deleted, self._score_blobs(run, changed)
+        
+    async def analyze_diff(
+        self,
+        base: str,
+        head: str = 'HEAD',
+        components: Optional[Iterable[str]] = None,
+        cancellation: Optional[CancellationToken] = None,
+        progress: Optional[AnalysisProgress] = None
+    ) -> 'ScoreDiff':
+        """
+        Score how a change from base to head moves the repository, scoring only the files it touches
+        Both refs are resolved in the clone, fetching them from origin when
+        missing, e.g. for pull request heads. The base commit's file scores
+        come from the file cache in one lookup once any diff or history has
+        seen its tree; only the blobs that differ between the two trees are
+        read and scored on top. Credentials are compared by rule, path and
+        preview, so moved lines are neither introduced nor removed.
+        """
+        run = self._start_run(components, False, cancellation, progress)
+        async with self.checkout(run.cancellation, run.progress) as repo_path:
+            run.repo_path = repo_path
+            return await self._analyze_diff(run, base, head)
             
-        # Initialize sub-analyzers
-        from .ai_detector import AIFrameworkDetector
-        from .execution_verifier import ExecutionVerifier
+    async def _analyze_diff(self, run: AnalysisRun, base: str, head: str) -> 'ScoreDiff':
+        """Score the change of a diff run in the held clone"""
+        from .history import ScoreDiff, resolve_commit  # Deferred: only diff runs need the git plumbing
+        # git and blob scoring run on worker threads, so the event loop stays free
+        loop = asyncio.get_running_loop()
+        base_commit, head_commit = await loop.run_in_executor(
+            None, lambda: (resolve_commit(run.repo_path, base), resolve_commit(run.repo_path, head))
+        )
+        run.progress.stage('diff', 'started', base=base_commit, head=head_commit)
+        
+        base_records, base_cached, head_records, changed, deleted = await loop.run_in_executor(
+            None, self._diff_records, run, base_commit, head_commit
+        )
         
-        ai_detector = AIFrameworkDetector(self.repo_path)
-        execution_verifier = ExecutionVerifier(self.repo_path)
+        base_list = [base_records[path] for path in sorted(base_records)]
+        head_list = [head_records[path] for path in sorted(head_records)]
+        base_scores = self._component_scores(run, base_list) if base_list else {}
+        head_scores = self._component_scores(run, head_list) if head_list else {}
+        base_issues, head_issues = self._collect_issues(run, base_list), self._collect_issues(run, head_list)
+        issue_key = lambda issue: (issue['type'], issue['rule'], issue['path'], issue['preview'])
+        base_keys, head_keys = set(map(issue_key, base_issues)), set(map(issue_key, head_issues))
         
-        # Perform analysis
-        ai_score = await ai_detector.detect_frameworks()
-        exec_score = await execution_verifier.verify_execution()
+        diff = ScoreDiff(
+            base=base_commit,
+            head=head_commit,
+            base_scores=base_scores,
+            head_scores=head_scores,
+            delta={c: head_scores[c] - base_scores.get(c, 0.0) for c in head_scores},
+            base_overall_score=self._overall_score(base_scores),
+            head_overall_score=self._overall_score(head_scores),
+            files=[
+                {'path': path, 'status': 'modified' if path in base_records else 'added'} for path in sorted(changed)
+            ] + [{'path': path, 'status': 'deleted'} for path in sorted(deleted) if path in base_records],
+            introduced_issues=[issue for issue in head_issues if issue_key(issue) not in base_keys],
+            removed_issues=[issue for issue in base_issues if issue_key(issue) not in head_keys],
+            blobs_scored=run.blobs_scored,
+            base_cached=base_cached,
+            signature_version=run.engine.version
+        )
+        run.progress.stage('diff', 'done', files=len(diff.files), blobs_scored=diff.blobs_scored)
+        return diff
         
-        # Calculate overall scores and collect issues
-        return AnalysisResult(
-            code_quality_score=self._analyze_code_quality(),
-            ai_framework_score=ai_score,
-            execution_score=exec_score,
-            security_score=self._analyze_security(),
-            issues=self._collect_issues(),
-            recommendations=self._generate_recommendations()
+    def _diff_records(
+        self,
+        run: AnalysisRun,
+        base_commit: str,
+        head_commit: str
+    ) -> Tuple[Dict[str, FileScores], bool, Dict[str, FileScores], Dict[str, str], List[str]]:
+        """
+        File scores of the base and head commits, scoring only the blobs that differ
+        Returns the base records, whether they all came from the cache, the
+        head records, and the changed and deleted paths.
+        """
+        from .history import changed_blobs
+        base_records, base_cached = self._commit_scores(run, base_commit)
+        changed, deleted = changed_blobs(run.repo_path, base_commit, head_commit)
+        head_records = {path: record for path, record in base_records.items() if path not in deleted}
+        head_records.update(self._score_blobs(run, changed))
+        self._store_commit_scores(run, head_commit, head_records)
+        return base_records, base_cached, head_records, changed, deleted
+        
+    def _start_run(
+        self,
+        components: Optional[Iterable[str]],
+        breakdown: bool,
+        cancellation: Optional[CancellationToken],
+        progress: Optional[AnalysisProgress]
+    ) -> AnalysisRun:
+        """State of a new run; signatures may be reloaded between runs, never during one"""
+        return AnalysisRun(
+            engine=self.engine or current_engine(),
+            components=self._select_components(components, breakdown),
+            cancellation=cancellation or CancellationToken(),
+            progress=progress or AnalysisProgress()
         )
         
-    def _analyze_code_quality(self) -> float:
-        """Analyze code quality focusing on AI implementation patterns"""
-        total_score = 0.0
-        file_count = 0
-        
-        # AI code quality patterns
-        ai_patterns = {
-            'model_configuration': r'(model_config|ModelConfig|configuration)\s*=',
-            'prompt_templates': r'(PROMPT_TEMPLATE|system_prompt|user_prompt)\s*=',
-            'error_handling': r'try\s*{.*?}\s*catch.*?{.*?}',
-            'logging': r'(log|logger|console)\.(info|error|debug)',
-            'type_annotations': r':\s*(str|int|float|bool|List|Dict|Any)',
-            'documentation': r'("""|\'\'\'|\#\s*@)',
-            'testing': r'(test_|assert|expect)',
-            'modular_structure': r'(class|def|interface|type)\s+\w+',
+    @staticmethod
+    def _overall_score(scores: Dict[str, float]) -> Optional[float]:
+        """Weighted overall score of a complete set of component scores"""
+        if len(scores) < len(OVERALL_WEIGHTS):
+            return None
+        return sum(weight * scores[component] for component, weight in OVERALL_WEIGHTS.items())
+        
+    def _commit_scores(self, run: AnalysisRun, commit: str) -> Tuple[Dict[str, FileScores], bool]:
+        """File scores of every source file in a commit, and whether they all came from the tree's cache entry"""
+        from .history import commit_scores_cache_key, tree_blobs, tree_id
+        cached = None
+        if self.file_cache is not None:
+            key = commit_scores_cache_key(tree_id(run.repo_path, commit), run.engine.version)
+            cached = self.file_cache.get(key)
+        if cached is None:
+            records = self._score_blobs(run, tree_blobs(run.repo_path, commit))
+            self._store_commit_scores(run, commit, records)
+            return records, False
+            
+        records = {}
+        for path, content_hash, data in zip(cached['files'], cached['hashes'], cached['scores']):
+            language = LANGUAGE_EXTENSIONS[os.path.splitext(path)[1]]
+            records[path] = FileScores.from_dict(
+                SourceFile(os.path.join(run.repo_path, path), path, language, 0), content_hash, data
+            )
+        # Components the cached entry was stored without are scored now
+        incomplete = {
+            path: record.content_hash for path, record in records.items()
+            if self._components_to_read(record, run.components)
         }
+        if incomplete:
+            records.update(self._score_blobs(run, incomplete))
+            self._store_commit_scores(run, commit, records)
+        return records, not incomplete
         
-        for root, _, files in os.walk(self.repo_path):
-            for file in files:
-                if not file.endswith(('.py', '.rs', '.ts', '.tsx', '.js', '.jsx')):
-                    continue
-                    
-                file_path = os.path.join(root, file)
-                file_count += 1
+    def _store_commit_scores(self, run: AnalysisRun, commit: str, records: Dict[str, FileScores]):
+        """Cache the file scores of a commit under its tree id"""
+        if self.file_cache is None:
+            return
+        from .history import commit_scores_cache_key, tree_id
+        paths = sorted(records)
+        self.file_cache.put(commit_scores_cache_key(tree_id(run.repo_path, commit), run.engine.version), {
+            'files': paths,
+            'hashes': [records[path].content_hash for path in paths],
+            'scores': [records[path].to_dict() for path in paths],
+        })
+        
+    def _score_blobs(self, run: AnalysisRun, blobs: Dict[str, str]) -> Dict[str, FileScores]:
+        """
+        Scores of files given as blob ids by path, reading only blobs not scored before
+        Blobs already seen in this run or found in the file cache are
+        reused; the rest are read through one git cat-file process.
+        """
+        from .history import read_blobs
+        records: Dict[str, FileScores] = {}
+        unread: Dict[str, List[FileScores]] = {}
+        for path, blob in blobs.items():
+            language = LANGUAGE_EXTENSIONS[os.path.splitext(path)[1]]
+            record = FileScores(
+                source=SourceFile(os.path.join(run.repo_path, path), path, language, 0),
+                content_hash=blob
+            )
+            records[path] = record
+            if (language, blob) in run.seen_blobs:
+                record.merge(run.seen_blobs[(language, blob)])
+                run.blobs_reused += 1
+                continue
+            if self.file_cache is not None:
+                from .file_cache import file_cache_key
+                cached = self.file_cache.get(file_cache_key(language, blob, run.engine.version))
+                if cached is not None:
+                    record.merge(cached)
+            if self._components_to_read(record, run.components):
+                unread.setdefault(blob, []).append(record)
+            else:
+                run.blobs_reused += 1
+                run.seen_blobs[(language, blob)] = record.to_dict()
                 
-                try:
-                    # Base quality score
-                    if file.endswith('.py'):
-                        base_score = self._analyze_python_quality(file_path)
-                    elif file.endswith('.rs'):
-                        base_score = self._analyze_rust_quality(file_path)
-                    else:
-                        base_score = self._analyze_typescript_quality(file_path)
-                    
-                    # AI-specific quality score
-                    with open(file_path, 'r') as f:
-                        content = f.read()
-                    ai_score = sum(
-                        1 for pattern in ai_patterns.values()
-                        if re.search(pattern, content)
-                    ) / len(ai_patterns)
-                    
-                    # Combined score with emphasis on AI patterns
-                    total_score += (base_score * 0.4 + ai_score * 0.6)
-                except Exception as e:
-                    print(f"Error analyzing {file}: {e}")
+        read = list(read_blobs(run.repo_path, list(unread)))
+        # Blobs git could not read score as empty files
+        read += [(blob, b'') for blob in unread.keys() - {blob for blob, _ in read}]
+        for blob, data in read:
+            run.cancellation.check()
+            for record in unread[blob]:
+                # A blob at several paths is scored once per language
+                key = (record.source.language, blob)
+                if key in run.seen_blobs:
+                    record.merge(run.seen_blobs[key])
+                    run.blobs_reused += 1
                     continue
+                self._score_blob(run, record, data)
+                run.seen_blobs[key] = record.to_dict()
+                run.blobs_scored += 1
+        return records
+        
+    def _score_blob(self, run: AnalysisRun, record: FileScores, data: bytes):
+        """Score a file of a past commit from its blob, caching the scores by blob id"""
+        source_file = record.source
+        notebook = None
+        if source_file.is_notebook:
+            from .notebook import Notebook, parse_notebook  # Deferred: only repositories with notebooks need it
+            try:
+                notebook = parse_notebook(io.BytesIO(data), len(data))
+            except ValueError as e:
+                print(f"Error reading {source_file.rel_path}@{record.content_hash[:12]}: {e}")
+                notebook = Notebook(code='', content_hash=record.content_hash)
+            content = notebook.code
+        else:
+            try:
+                content = decode_source(data)
+            except UnicodeDecodeError as e:
+                print(f"Error reading {source_file.rel_path}@{record.content_hash[:12]}: {e}")
+                content = ''
+        source_file.size = len(data)
+        run.engine.score_content(record, self._components_to_read(record, run.components), content, notebook)
+        if self.file_cache is not None:
+            from .file_cache import file_cache_key
+            key = file_cache_key(source_file.language, record.content_hash, run.engine.version)
+            self.file_cache.put(key, record.to_dict())
+            
+    def _start_plugins(self, run: AnalysisRun, plugins: List['AnalyzerPlugin'], scan: RepositoryScan) -> asyncio.Future:
+        """Schedule plugins on the scan already made; those reading sources wait for the file pass"""
+        from .plugins import AnalysisContext, StageScheduler
+        scheduler = StageScheduler()
+        context = AnalysisContext(run.repo_path, run.cancellation)
+        context.seed('scan', scan)
+        # Contents the file pass reads are kept for plugins instead of read again
+        run.file_pass_done = asyncio.get_running_loop().create_future()
+        context.seed('file_pass', run.file_pass_done)
+        if 'file_pass' in scheduler.required_inputs(plugins):
+            run.shared_sources = {}
+        return asyncio.ensure_future(scheduler.run(context, plugins))
         
-        return total_score / max(file_count, 1)
+    async def _admit(
+        self,
+        run: AnalysisRun,
+        files: List[SourceFile],
+        breakdown: bool,
+        retain_sources: bool,
+        can_sample: bool
+    ) -> Admission:
+        """Reserve the estimated memory of the analysis, waiting or downgrading as the governor decides"""
+        estimate = estimate_memory(
+            files, retain_sources=retain_sources, fingerprints=run.fingerprints is not None, breakdown=breakdown
+        )
+        admission = await self.memory.admit(estimate, run.cancellation, can_sample=can_sample)
+        run.progress.stage('admission', admission.decision, **admission.to_dict())
+        return admission
+        
+    @staticmethod
+    def _select_components(components: Optional[Iterable[str]], breakdown: bool) -> Tuple[str, ...]:
+        """Requested components in canonical order, all of them by default"""
+        if components is None or breakdown:
+            return COMPONENTS
+        requested = set(components)
+        unknown = requested.difference(COMPONENTS)
+        if unknown:
+            raise ValueError(f"Unknown components: {', '.join(sorted(unknown))}")
+        if not requested:
+            raise ValueError("At least one component is required")
+        return tuple(c for c in COMPONENTS if c in requested)
+        
+    async def _score_files(self, run: AnalysisRun, files: List[SourceFile]) -> List[FileScores]:
+        """Score files in order until done or the cancellation token trips"""
+        file_scores = []
+        run.progress.stage('files', 'started', total=len(files))
+        try:
+            for source_file in files:
+                run.cancellation.check()
+                file_scores.append(self._score_file(run, source_file))
+                if run.progress.due('scanned'):
+                    self._report_scanned(run, file_scores, len(files))
+                # Let a disconnect watcher or progress stream on the same event loop run
+                await asyncio.sleep(0)
+        except AnalysisCancelled as e:
+            run.truncated = True
+            print(f"Analysis stopped after {len(file_scores)} of {len(files)} files: {e}")
+        self._report_scanned(run, file_scores, len(files))
+        run.progress.stage('files', 'truncated' if run.truncated else 'done')
+        return file_scores
         
-    def _analyze_python_quality(self, file_path: str) -> float:
-        """Analyze Python code quality using radon"""
-        with open(file_path, 'r') as f:
-            content = f.read()
+    async def _score_workspace(self, run: AnalysisRun, files: List[SourceFile], members: List['WorkspaceMember']) -> List[FileScores]:
+        """
+        Score each member, then the files outside them, one unit after the other
+        Scoring is CPU-bound Python, so units run in turn on a worker thread
+        rather than side by side; the event loop stays free, and shared
+        sources and fingerprints fill in the same order on every run.
+        """
+        from .workspace import partition_files
+        partition, unassigned = partition_files(files, members)
+        trees = self._member_trees(run, partition) if self.file_cache is not None else {}
+        units = [(member, partition[member.path]) for member in members] + [(None, unassigned)]
+        run.progress.stage('files', 'started', total=len(files), members=len(members))
+        loop = asyncio.get_running_loop()
+        scored: Dict[str, FileScores] = {}
+        for member, unit_files in units:
+            if not unit_files:
+                continue
+            member, records = await loop.run_in_executor(None, self._score_unit, run, member, unit_files, trees)
+            scored.update((record.source.rel_path, record) for record in records)
+            if member is not None:
+                run.progress.emit('member', path=member.path, name=member.name, files=len(records),
+                                    cached=member.path in run.cached_members)
+            if run.truncated:
+                break
+                
+        file_scores = [scored[f.rel_path] for f in files if f.rel_path in scored]
+        if run.truncated:
+            print(f"Analysis stopped after {len(file_scores)} of {len(files)} files: {run.cancellation.reason}")
+        self._report_scanned(run, file_scores, len(files))
+        run.progress.stage('files', 'truncated' if run.truncated else 'done')
+        return file_scores
+        
+    def _score_unit(
+        self,
+        run: AnalysisRun,
+        member: Optional['WorkspaceMember'],
+        files: List[SourceFile],
+        trees: Dict[str, str]
+    ) -> Tuple[Optional['WorkspaceMember'], List[FileScores]]:
+        """Score the files of one member, starting from its cached scores when its tree is unchanged"""
+        from .workspace import workspace_member_cache_key
+        cache_key = None
+        cached = None
+        tree = trees.get(member.path) if member is not None else None
+        if tree is not None:
+            cache_key = workspace_member_cache_key(member.path, tree, run.engine.version)
+            cached = self.file_cache.get(cache_key)
+            # A checkout with files added or removed since the commit is scored again
+            if cached is not None and cached['files'] != [f.rel_path for f in files]:
+                cached = None
+                
+        records = []
+        changed = cached is None
+        try:
+            for i, source_file in enumerate(files):
+                run.cancellation.check()
+                if cached is None:
+                    records.append(self._score_file(run, source_file))
+                    continue
+                record = FileScores.from_dict(source_file, cached['hashes'][i], cached['scores'][i])
+                changed = changed or bool(record.missing(run.components))
+                self._fill_scores(run, record, run.components, fingerprint=run.fingerprints is not None)
+                records.append(record)
+        except AnalysisCancelled:
+            run.truncated = True
+            return member, records
             
-        # Calculate cyclomatic complexity
-        blocks = radon_cc.cc_visit(content)
-        if blocks:
-            complexity_scores = [block.complexity for block in blocks]
-            avg_complexity = sum(complexity_scores) / len(complexity_scores)
-            complexity_score = max(0, 1 - (avg_complexity / 10))  # Normalize, lower is better
-        else:
-            complexity_score = 1.0
+        if cached is not None and not changed:
+            run.cached_members.add(member.path)
+        elif cache_key is not None:
+            self.file_cache.put(cache_key, {
+                'files': [record.source.rel_path for record in records],
+                'hashes': [record.content_hash for record in records],
+                'scores': [record.to_dict() for record in records],
+            })
+        return member, records
+        
+    def _member_trees(self, run: AnalysisRun, partition: Dict[str, List[SourceFile]]) -> Dict[str, str]:
+        """Git tree id of each member directory at HEAD, for members tracked by git"""
+        from .clone import open_repository
+        try:
+            root = open_repository(run.repo_path).head.commit.tree
+        except Exception:
+            return {}
+        trees = {}
+        for path in partition:
+            try:
+                trees[path] = (root / path).hexsha if path else root.hexsha
+            except KeyError:
+                pass
+        return trees
+        
+    def _workspace_summary(self, run: AnalysisRun, file_scores: List[FileScores]) -> Dict:
+        """Scores of each member from the file scores behind the repository result"""
+        from .workspace import partition_files
+        by_path = {record.source.rel_path: record for record in file_scores}
+        partition, unassigned = partition_files([record.source for record in file_scores], run.members)
+        summary = []
+        for member in run.members:
+            records = [by_path[f.rel_path] for f in partition[member.path]]
+            summary.append({
+                'name': member.name,
+                'path': member.path,
+                'kind': member.kind,
+                'files': len(records),
+                'scores': self._component_scores(run, records) if records else {},
+                'cached': member.path in run.cached_members,
+            })
+        return {'members': summary, 'unassigned_files': len(unassigned)}
+        
+    def _report_scanned(self, run: AnalysisRun, file_scores: List[FileScores], total: int):
+        """Emit files scored so far and the component scores they add up to"""
+        if not run.progress.enabled:
+            return
+        run.progress.emit(
+            'scanned', files=len(file_scores), total=total,
+            scores=self._component_scores(run, file_scores)
+        )
+        
+    async def _analyze_sample(
+        self,
+        run: AnalysisRun,
+        scan: RepositoryScan,
+        budget: AnalysisBudget,
+        breakdown: bool,
+        reachable_only: bool = False,
+        secret_history: bool = False
+    ) -> Optional[AnalysisResult]:
+        """Estimate component scores from a sample, or None when a full scan is needed"""
+        files = scan.files
+        rng = random.Random(budget.seed)
+        sample = stratified_sample(files, budget.sample_size, rng)
+        run.progress.stage('sample', 'started', files=len(sample))
+        
+        groups: Dict[Tuple[str, str], List[FileScores]] = {}
+        for record in await self._score_files(run, sample):
+            groups.setdefault(stratum_key(record.source), []).append(record)
             
-        # Calculate maintainability index
-        mi_score = h_visit(content)
-        mi_normalized = max(0, min(1, mi_score / 100))  # Convert to 0-1 scale
-        
-        # Raw metrics
-        raw_metrics = analyze(content)
-        loc = raw_metrics.loc
-        lloc = raw_metrics.lloc
-        comments = raw_metrics.comments
-        
-        # Calculate documentation ratio
-        doc_ratio = comments / max(lloc, 1) if lloc > 0 else 0
-        doc_score = min(1, doc_ratio * 2)  # Scale up to reward documentation
-        
-        # Weighted average of all metrics
-        return (complexity_score * 0.4 + mi_normalized * 0.4 + doc_score * 0.2)
-        
-    def _analyze_rust_quality(self, file_path: str) -> float:
-        """Analyze Rust code quality using basic metrics"""
-        with open(file_path, 'r') as f:
-            content = f.read()
+        file_scores = [record for members in groups.values() for record in members]
+        if reachable_only:
+            self._restrict_to_reachable(run, scan)
+        if secret_history and 'security' in run.components:
+            await self._scan_secret_history(run, file_scores)
+        intervals = bootstrap_intervals(
+            groups, lambda records: self._component_scores(run, records),
+            budget.bootstrap_rounds, budget.confidence, rng
+        )
+        # Without time left to escalate, the partial sample is reported as it is
+        if not run.truncated and any(high - low > budget.max_interval_width for low, high in intervals.values()):
+            print(f"Sample of {len(sample)} files too uncertain, escalating to full scan")
+            run.progress.stage('sample', 'escalated', intervals=intervals)
+            return None
+        run.progress.stage('sample', 'done', intervals=intervals)
             
-        # Count lines of code and comments
-        lines = content.split('\n')
-        total_lines = len(lines)
-        comment_lines = len([l for l in lines if l.strip().startswith('//') or l.strip().startswith('/*')])
-        doc_lines = len([l for l in lines if l.strip().startswith('///')])
-        
-        # Calculate documentation ratio
-        doc_ratio = (comment_lines + doc_lines) / max(total_lines, 1)
-        doc_score = min(1, doc_ratio * 2)
-        
-        # Check for proper error handling
-        error_handling_patterns = [
-            r'Result<.*>',
-            r'Option<.*>',
-            r'match .*',
-            r'\.unwrap_or\(',
-            r'\.unwrap_or_else\(',
-            r'\.map_err\(',
-        ]
-        error_handling_score = sum(
-            1 for pattern in error_handling_patterns
-            if re.search(pattern, content)
-        ) / len(error_handling_patterns)
-        
-        # Check for proper type annotations and documentation
-        type_patterns = [
-            r'pub struct .*',
-            r'pub enum .*',
-            r'pub trait .*',
-            r'pub fn .*',
-            r'impl .*',
-        ]
-        type_score = sum(
-            1 for pattern in type_patterns
-            if re.search(pattern, content)
-        ) / max(len(type_patterns), 1)
-        
-        # Weighted average of all metrics
-        return (doc_score * 0.3 + error_handling_score * 0.4 + type_score * 0.3)
-        
-    def _analyze_typescript_quality(self, file_path: str) -> float:
-        """Analyze TypeScript/JavaScript code quality"""
-        with open(file_path, 'r') as f:
-            content = f.read()
+        result = self._build_result(run, file_scores, len(files), breakdown)
+        result.confidence_intervals = intervals
+        return result
+        
+    def _build_result(self, run: AnalysisRun, file_scores: List[FileScores], files_total: int, breakdown: bool) -> AnalysisResult:
+        """Assemble the analysis result from the per-file scores"""
+        scores = self._component_scores(run, file_scores)
+        
+        metrics_breakdown = None
+        if breakdown:
+            from .metrics_table import FileMetricsTable  # Deferred: pulls in NumPy
+            metrics_breakdown = FileMetricsTable.from_file_scores(file_scores).breakdown()
+            run.progress.stage('breakdown', 'done')
+        
+        truncated = run.truncated
+        overlap = None
+        if run.fingerprints is not None:
+            fingerprints = run.fingerprints.flush()
+            overlap = self.fingerprint_index.match(self.repo_url, fingerprints)
+            # A partial file set would replace the repository's complete one
+            if not truncated:
+                self.fingerprint_index.add(self.repo_url, fingerprints)
+            run.progress.stage('fingerprints', 'done', overlap_percentage=overlap.percentage)
             
-        # Count lines of code and comments
-        lines = content.split('\n')
-        total_lines = len(lines)
-        comment_lines = len([l for l in lines if l.strip().startswith('//') or l.strip().startswith('/*')])
-        
-        # Calculate documentation ratio
-        doc_ratio = comment_lines / max(total_lines, 1)
-        doc_score = min(1, doc_ratio * 2)
-        
-        # Check for proper type annotations (TypeScript)
-        type_patterns = [
-            r'interface\s+\w+',
-            r'type\s+\w+\s*=',
-            r':\s*(string|number|boolean|any)\b',
-            r'<\w+\s*extends\s*\w+>',
-            r'as\s+const',
-        ]
-        type_score = sum(
-            1 for pattern in type_patterns
-            if re.search(pattern, content)
-        ) / len(type_patterns)
-        
-        # Check for React/Next.js best practices
-        react_patterns = [
-            r'export\s+(default\s+)?function\s+\w+',
-            r'const\s+\w+\s*=\s*\([^)]*\)\s*:',
-            r'useState<',
-            r'useEffect',
-            r'Props\>',
-        ]
-        react_score = sum(
-            1 for pattern in react_patterns
-            if re.search(pattern, content)
-        ) / len(react_patterns)
-        
-        # Check for error handling
-        error_patterns = [
-            r'try\s*{',
-            r'catch\s*\(',
-            r'throw\s+new\s+Error',
-            r'Promise\.catch',
-            r'Error\>',
-        ]
-        error_score = sum(
-            1 for pattern in error_patterns
-            if re.search(pattern, content)
-        ) / len(error_patterns)
-        
-        # Weighted average of all metrics
-        return (doc_score * 0.2 + type_score * 0.3 + react_score * 0.3 + error_score * 0.2)
-        
-    def _analyze_security(self) -> float:
-        """Analyze security issues"""
-        total_score = 0.0
-        file_count = 0
-        
-        security_patterns = {
-            'api_key_exposure': r'(API_KEY|OPENAI_KEY|ANTHROPIC_KEY|COHERE_KEY|SECRET_KEY)\s*=\s*["\'][^"\']+["\']',
-            'model_input_validation': r'(validate_prompt|sanitize_input|clean_text)\s*\(',
-            'token_limit_check': r'(max_tokens|token_limit|check_length)\s*[=<>]',
-            'rate_limiting': r'(RateLimit|rateLimiter|throttle|delay)\s*\(',
-            'error_handling': r'try\s*{.*?}\s*catch.*?{.*?}',
-            'secure_api_calls': r'https?://[^"\']+api[^"\']*',
-            'input_sanitization': r'(sanitize|escape|clean|validate).*?(input|text|prompt)',
-            'model_output_validation': r'(validate_response|check_output|filter_result)',
+        # Calculate overall scores and collect issues
+        result = AnalysisResult(
+            code_quality_score=scores.get('code_quality'),
+            ai_framework_score=scores.get('ai_framework'),
+            execution_score=scores.get('execution'),
+            security_score=scores.get('security'),
+            issues=self._collect_issues(run, file_scores),
+            recommendations=self._generate_recommendations(),
+            files_analyzed=len(file_scores),
+            files_total=files_total,
+            breakdown=metrics_breakdown,
+            overlap_percentage=overlap.percentage if overlap else None,
+            overlapping_repositories=overlap.repositories if overlap else None,
+            truncated=truncated,
+            truncation_reason=run.cancellation.reason if truncated else None,
+            signature_version=run.engine.version,
+            reachability=run.reachability,
+            workspace=self._workspace_summary(run, file_scores) if run.members is not None else None,
+            secret_history=run.secret_history
+        )
+        result._evaluate = lambda component: self._evaluate_component(run, file_scores, component)
+        return result
+        
+    def _restrict_to_reachable(self, run: AnalysisRun, scan: RepositoryScan):
+        """Limit framework and execution scoring to files reachable from the entry points"""
+        if run.reachability is not None or run.truncated:
+            return  # Built already, or a partial pass left too little to build it from
+        graph = self._import_graph(run, scan)
+        entries = graph.entry_points if run.entry_points is None else graph.index_of(run.entry_points)
+        reachable = graph.reachable(entries)
+        run.reachable = reachable if entries else None
+        run.reachability = {
+            'entry_points': [graph.files[i] for i in entries],
+            'files': len(graph.files),
+            'edges': graph.edge_count,
+            'reachable_files': len(reachable) if entries else len(graph.files),
+            'restricted': bool(entries),
         }
+        run.progress.stage('import_graph', 'done', **run.reachability)
         
-        for root, _, files in os.walk(self.repo_path):
-            for file in files:
-                if not file.endswith(('.py', '.rs', '.ts', '.tsx', '.js', '.jsx')):
-                    continue
-                    
-                file_path = os.path.join(root, file)
-                file_count += 1
+    def _import_graph(self, run: AnalysisRun, scan: RepositoryScan) -> 'ImportGraph':
+        """The import graph of the checkout, cached per commit"""
+        from .import_graph import ImportGraph, import_graph_cache_key  # Deferred: only reachability needs it
+        cache_key = None
+        if self.file_cache is not None:
+            commit = self.head_commit(run.repo_path)
+            cache_key = import_graph_cache_key(commit) if commit else None
+        paths = [f.rel_path for f in scan.files]
+        if cache_key is not None:
+            cached = self.file_cache.get(cache_key)
+            # A checkout with files added or removed since the commit is rebuilt
+            if cached is not None and cached['files'] == paths:
+                return ImportGraph.from_dict(cached)
+        sources = read_sources(scan.files, run.shared_sources or {}, run.cancellation.check)
+        graph = ImportGraph.build(scan.files, sources, read_manifests(run.repo_path, scan.manifests))
+        if cache_key is not None:
+            self.file_cache.put(cache_key, graph.to_dict())
+        return graph
+        
+    async def _scan_secret_history(self, run: AnalysisRun, file_scores: List[FileScores]):
+        """
+        Scan the git history for credentials, picking up where the last scan of the repository stopped
+        The cached scan of a repository records the commit it reached, so
+        only blobs added since are read; credentials still in the checkout
+        are reported by the file pass and left out here.
+        """
+        from .secrets import SECRETS_VERSION  # Deferred: only history scans need git
+        commit = self.head_commit(run.repo_path)
+        if commit is None:
+            return
+        cache_key = f"secret-history:{SECRETS_VERSION}:{self.repo_url}"
+        cached = self.file_cache.get(cache_key) if self.file_cache is not None else None
+        since = cached['commit'] if cached is not None and self._is_ancestor(run.repo_path, cached['commit']) else None
+        if since is None:
+            cached = None
+            
+        run.progress.stage('secret_history', 'started', incremental=since is not None)
+        findings = list(cached['findings']) if cached else []
+        blobs = cached['blobs'] if cached else 0
+        if since != commit:
+            try:
+                scanned, new = await asyncio.get_running_loop().run_in_executor(
+                    None, lambda: run.engine.secret_scanner.scan_history(run.repo_path, since, check=run.cancellation.check)
+                )
+            except AnalysisCancelled as e:
+                # The scores stand without the history, but the result is partial
+                run.truncated = True
+                print(f"History scan stopped: {e}")
+                run.progress.stage('secret_history', 'truncated')
+                return
+            blobs += scanned
+            findings.extend(finding.to_issue() for finding in new)
+            if self.file_cache is not None:
+                self.file_cache.put(cache_key, {'commit': commit, 'blobs': blobs, 'findings': findings})
                 
-                try:
-                    with open(file_path, 'r') as f:
-                        content = f.read()
-                    
-                    # Check for security patterns
-                    security_issues = sum(1 for pattern in security_patterns.values()
-                                       if not re.search(pattern, content))
+        current = {record.content_hash for record in file_scores}
+        run.history_findings = [f for f in findings if f['blob'] not in current]
+        run.secret_history = {
+            'commit': commit,
+            'blobs_scanned': blobs,
+            'findings': len(run.history_findings),
+            'incremental': since is not None,
+        }
+        run.progress.stage('secret_history', 'done', **run.secret_history)
+        
+    @staticmethod
+    def _is_ancestor(repo_path: str, commit: str) -> bool:
+        """Whether a commit is in the history of HEAD, so scanning from it misses nothing"""
+        import subprocess
+        result = subprocess.run(
+            ['git', 'merge-base', '--is-ancestor', commit, 'HEAD'],
+            cwd=repo_path, capture_output=True
+        )
+        return result.returncode == 0
+        
+    def _evaluate_component(self, run: AnalysisRun, file_scores: List[FileScores], component: str) -> float:
+        """Score a skipped component over the files the analysis covered"""
+        for record in file_scores:
+            self._fill_scores(run, record, (component,))
+        return self._component_scores(run, file_scores, (component,))[component]
+        
+    def _score_file(self, run: AnalysisRun, source_file: SourceFile) -> FileScores:
+        """Score a file for the requested components"""
+        record = FileScores(source=source_file)
+        self._fill_scores(run, record, run.components, fingerprint=run.fingerprints is not None)
+        return record
+        
+    def _fill_scores(
+        self,
+        run: AnalysisRun,
+        record: FileScores,
+        components: Tuple[str, ...],
+        fingerprint: bool = False
+    ):
+        """Read a file once and compute its missing component scores, unless its content was seen before"""
+        source_file = record.source
+        missing = self._components_to_read(record, components)
+        if not missing and not fingerprint:
+            return
+            
+        notebook = None
+        if source_file.is_notebook:
+            notebook = self._read_notebook(source_file)
+            content_hash, content = notebook.content_hash, notebook.code
+        else:
+            try:
+                with open(source_file.path, 'rb') as f:
+                    data = f.read()
+            except OSError as e:
+                print(f"Error reading {source_file.rel_path}: {e}")
+                data = b''
+            content_hash = blob_hash(data)
+            
+            try:
+                content = decode_source(data)
+            except UnicodeDecodeError as e:
+                print(f"Error reading {source_file.rel_path}: {e}")
+                content = ''
+        record.content_hash = content_hash
+        if run.shared_sources is not None:
+            run.shared_sources[source_file.rel_path] = content
+            
+        if fingerprint:
+            run.fingerprints.add(source_file.rel_path, content_hash, content)
+            
+        cache_key = None
+        if self.file_cache is not None and missing:
+            from .file_cache import file_cache_key
+            cache_key = file_cache_key(source_file.language, content_hash, run.engine.version)
+            cached = self.file_cache.get(cache_key)
+            if cached is not None:
+                record.merge(cached)
+                missing = record.missing(missing)
+                if not missing:
+                    return
                     
-                    # Calculate security score (inverse of issues)
-                    score = 1 - (security_issues / len(security_patterns))
-                    total_score += max(0, score)  # Ensure non-negative
-                except Exception as e:
-                    print(f"Error analyzing security for {file}: {e}")
-                    continue
+        run.engine.score_content(record, missing, content, notebook)
+        if cache_key is not None:
+            self.file_cache.put(cache_key, record.to_dict())
+            
+    @staticmethod
+    def _components_to_read(record: FileScores, components: Tuple[str, ...]) -> List[str]:
+        """Missing components of a file that need its content; execution evidence of other languages is empty"""
+        missing = record.missing(components)
+        if 'execution' in missing and record.source.language not in EXECUTION_LANGUAGES:
+            record.execution = FileExecution(is_python=False, valid_syntax=False, checks_passed=0)
+            missing.remove('execution')
+        return missing
         
-        return total_score / max(file_count, 1)
+    @staticmethod
+    def _read_notebook(source_file: SourceFile) -> 'Notebook':
+        """Code cells of a notebook with their line positions, streamed past the outputs"""
+        from .notebook import Notebook, read_notebook  # Deferred: only repositories with notebooks need it
+        try:
+            return read_notebook(source_file.path)
+        except (OSError, ValueError) as e:
+            print(f"Error reading {source_file.rel_path}: {e}")
+            return Notebook(code='', content_hash=blob_hash(b''))
+            
+    def _component_scores(
+        self,
+        run: AnalysisRun,
+        file_scores: List[FileScores],
+        components: Optional[Tuple[str, ...]] = None
+    ) -> Dict[str, float]:
+        """Aggregate per-file scores into the requested component scores, over reachable code when restricted"""
+        return run.engine.component_scores(
+            file_scores, components or run.components, run.reachable, history_secrets=bool(run.history_findings)
+        )
         
-    def _collect_issues(self) -> List[Dict]:
+    def _collect_issues(self, run: AnalysisRun, file_scores: List[FileScores]) -> List[Dict]:
         """Collect all identified issues"""
-        return []
+        issues = [
+            SecretFinding(rule, record.source.rel_path, line, preview, cell=cell[0] if cell else None).to_issue()
+            for record in file_scores if record.secrets
+            for rule, line, preview, *cell in record.secrets
+        ]
+        return issues + (run.history_findings or [])
         
     def _generate_recommendations(self) -> List[str]:
         """Generate recommendations based on analysis"""
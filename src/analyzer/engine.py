@@ -0,0 +1,244 @@
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Pattern, Set, Tuple
+from .ai_detector import AIFrameworkDetector
+from .execution_verifier import ExecutionVerifier
+from .scanner import SourceFile
+from .secrets import SecretFinding, SecretScanner
+from .signatures import Signatures, current_signatures
+from .syntax import STRUCTURED_LANGUAGES, SyntaxTree, parse_source
+
+if TYPE_CHECKING:
+    from .code_analyzer import FileScores
+    from .notebook import Notebook
+
+# Factor on the security score when credentials were committed in the past
+HISTORY_SECRET_PENALTY = 0.5
+
+class AnalysisEngine:
+    """
+    Scores files with the matchers compiled from one version of the signatures
+    An engine holds no state of any analysis: every method works on the
+    records and content it is given, so one engine serves any number of
+    concurrent analyses, on any thread. Building one compiles the secret
+    rules and binds the framework detector and execution verifier to the
+    signatures; current_engine() keeps one per process.
+    """
+
+    def __init__(self, signatures: Optional[Signatures] = None, secret_scanner: Optional[SecretScanner] = None):
+        self.signatures = signatures or current_signatures()
+        self.ai_detector = AIFrameworkDetector(signatures=self.signatures)
+        self.execution_verifier = ExecutionVerifier(signatures=self.signatures)
+        self.secret_scanner = secret_scanner or SecretScanner()
+
+    @property
+    def version(self) -> str:
+        """Version of the signatures, part of every cache key of scores computed by this engine"""
+        return self.signatures.version
+
+    def score_content(
+        self,
+        record: 'FileScores',
+        missing: Iterable[str],
+        content: str,
+        notebook: Optional['Notebook'] = None
+    ):
+        """
+        Compute the missing component scores of a file from its decoded content
+        For a notebook, content is the code of its cells and secrets are
+        located by cell and line within the cell.
+        """
+        source_file = record.source
+        content_hash = record.content_hash
+        # Parsed once and shared by the quality, security and execution checks
+        tree = None
+        if source_file.language in STRUCTURED_LANGUAGES and set(missing) & {'code_quality', 'security', 'execution'}:
+            tree = parse_source(source_file.language, content, content_hash)
+
+        if 'code_quality' in missing:
+            record.code_quality = self.analyze_file_quality(source_file, content, tree)
+        if 'security' in missing:
+            findings = self.secret_scanner.scan(content, source_file.rel_path)
+            record.secrets = [self._secret_location(f, notebook) for f in findings]
+            # A leaked credential outweighs any safeguard the file has
+            record.security = 0.0 if findings else self.analyze_file_security(source_file, content, tree)
+        if 'ai_framework' in missing:
+            record.frameworks = self.ai_detector.score_content(content)
+        if 'execution' in missing:
+            record.execution = self.execution_verifier.check_content(source_file.path, content, tree)
+
+    @staticmethod
+    def _secret_location(finding: SecretFinding, notebook: Optional['Notebook']) -> List:
+        """A finding as [rule, line, preview], with the cell appended for a notebook"""
+        if notebook is None:
+            return [finding.rule, finding.line, finding.preview]
+        cell, line = notebook.locate(finding.line)
+        return [finding.rule, line, finding.preview, cell]
+
+    def component_scores(
+        self,
+        file_scores: List['FileScores'],
+        components: Tuple[str, ...],
+        reachable: Optional[Set[str]] = None,
+        history_secrets: bool = False
+    ) -> Dict[str, float]:
+        """
+        Aggregate per-file scores into the given component scores
+        With reachable, framework and execution evidence only counts in those
+        files; history_secrets applies the penalty for credentials leaked in
+        the git history.
+        """
+        file_count = max(len(file_scores), 1)
+        reachable_scores = file_scores if reachable is None else [
+            s for s in file_scores if s.source.rel_path in reachable
+        ]
+        scores = {}
+        if 'code_quality' in components:
+            scores['code_quality'] = sum(s.code_quality for s in file_scores) / file_count
+        if 'ai_framework' in components:
+            scores['ai_framework'] = self.ai_detector.aggregate([s.frameworks for s in reachable_scores])
+        if 'execution' in components:
+            scores['execution'] = self.execution_verifier.aggregate([s.execution for s in reachable_scores])
+        if 'security' in components:
+            scores['security'] = sum(s.security for s in file_scores) / file_count
+            if history_secrets:
+                scores['security'] *= HISTORY_SECRET_PENALTY
+        return scores
+
+    def analyze_file_quality(
+        self,
+        source_file: SourceFile,
+        content: str,
+        tree: Optional[SyntaxTree] = None
+    ) -> float:
+        """Analyze code quality of a single file focusing on AI implementation patterns"""
+        try:
+            # Base quality score
+            if source_file.language == 'python':
+                base_score = self._analyze_python_quality(content)
+            else:
+                tree = tree or parse_source(source_file.language, content)
+                if source_file.language == 'rust':
+                    base_score = self._analyze_rust_quality(tree)
+                else:
+                    base_score = self._analyze_typescript_quality(tree)
+                content = tree.searchable
+
+            # AI-specific quality score
+            ai_score = self._pattern_share(self.signatures.quality_patterns, content)
+
+            # Combined score with emphasis on AI patterns
+            return base_score * 0.4 + ai_score * 0.6
+        except Exception as e:
+            print(f"Error analyzing {source_file.rel_path}: {e}")
+            return 0.0
+
+    def _analyze_python_quality(self, content: str) -> float:
+        """Analyze Python code quality using radon"""
+        # Deferred: radon is only needed once Python files are scored
+        import radon.complexity as radon_cc
+        from radon.raw import analyze
+        from radon.metrics import h_visit
+
+        # Calculate cyclomatic complexity
+        blocks = radon_cc.cc_visit(content)
+        if blocks:
+            complexity_scores = [block.complexity for block in blocks]
+            avg_complexity = sum(complexity_scores) / len(complexity_scores)
+            complexity_score = max(0, 1 - (avg_complexity / 10))  # Normalize, lower is better
+        else:
+            complexity_score = 1.0
+
+        # Calculate maintainability index
+        mi_score = h_visit(content)
+        mi_normalized = max(0, min(1, mi_score / 100))  # Convert to 0-1 scale
+
+        # Raw metrics
+        raw_metrics = analyze(content)
+        loc = raw_metrics.loc
+        lloc = raw_metrics.lloc
+        comments = raw_metrics.comments
+
+        # Calculate documentation ratio
+        doc_ratio = comments / max(lloc, 1) if lloc > 0 else 0
+        doc_score = min(1, doc_ratio * 2)  # Scale up to reward documentation
+
+        # Weighted average of all metrics
+        return (complexity_score * 0.4 + mi_normalized * 0.4 + doc_score * 0.2)
+
+    def _analyze_rust_quality(self, tree: SyntaxTree) -> float:
+        """Analyze Rust code quality using basic metrics"""
+        # Calculate documentation ratio from comment and doc comment lines
+        doc_ratio = (len(tree.comment_lines) + len(tree.doc_lines)) / max(tree.line_count, 1)
+        doc_score = min(1, doc_ratio * 2)
+
+        # Check for proper error handling
+        rust_quality = self.signatures.rust_quality
+        error_handling_score = self._pattern_share(rust_quality['error_handling'], tree.searchable)
+
+        # Check for proper type annotations and documentation in item signatures
+        type_score = self._pattern_share(rust_quality['types'], tree.outline)
+
+        # Weighted average of all metrics
+        return (doc_score * 0.3 + error_handling_score * 0.4 + type_score * 0.3)
+
+    def _analyze_typescript_quality(self, tree: SyntaxTree) -> float:
+        """Analyze TypeScript/JavaScript code quality"""
+        # Calculate documentation ratio
+        doc_ratio = len(tree.comment_lines) / max(tree.line_count, 1)
+        doc_score = min(1, doc_ratio * 2)
+
+        # Check for proper type annotations (TypeScript)
+        typescript_quality = self.signatures.typescript_quality
+        code = tree.searchable
+        type_score = self._pattern_share(typescript_quality['types'], code)
+
+        # Check for React/Next.js best practices
+        react_score = self._pattern_share(typescript_quality['react'], code)
+
+        # Check for error handling
+        error_score = self._pattern_share(typescript_quality['error_handling'], code)
+
+        # Weighted average of all metrics
+        return (doc_score * 0.2 + type_score * 0.3 + react_score * 0.3 + error_score * 0.2)
+
+    def analyze_file_security(
+        self,
+        source_file: SourceFile,
+        content: str,
+        tree: Optional[SyntaxTree] = None
+    ) -> float:
+        """Analyze security issues in a single file"""
+        try:
+            # Check for security patterns, ignoring comments in parsed files
+            # Calculate security score (inverse of missing safeguards)
+            text = tree.searchable if tree is not None else content
+            score = self._pattern_share(self.signatures.security_patterns, text)
+            return max(0, score)  # Ensure non-negative
+        except Exception as e:
+            print(f"Error analyzing security for {source_file.rel_path}: {e}")
+            return 0.0
+
+    @staticmethod
+    def _pattern_share(patterns: List[Pattern], content: str) -> float:
+        """Fraction of the patterns found in the content"""
+        return sum(1 for pattern in patterns if pattern.search(content)) / max(len(patterns), 1)
+
+_engine: Optional[AnalysisEngine] = None
+_engine_lock = threading.Lock()
+
+def current_engine() -> AnalysisEngine:
+    """
+    The shared engine of the current signatures, rebuilt once after they are reloaded
+    Analyses hold on to the engine they started with, so a reload never
+    changes the rules in the middle of one.
+    """
+    global _engine
+    signatures = current_signatures()
+    engine = _engine
+    if engine is not None and engine.signatures is signatures:
+        return engine
+    with _engine_lock:
+        if _engine is None or _engine.signatures is not signatures:
+            # The compiled secret rules do not depend on the signatures
+            _engine = AnalysisEngine(signatures, _engine.secret_scanner if _engine is not None else None)
+        return _engine
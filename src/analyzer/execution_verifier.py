@@ -1,24 +1,52 @@
 import os
-import re
 import ast
-from typing import List, Dict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator, List, Dict, Optional
+from .scanner import read_source_text
+from .signatures import Signatures, current_signatures
+
+if TYPE_CHECKING:
+    from .syntax import SyntaxTree
+
+# Files execution evidence is gathered from; notebooks count through their code cells
+EXECUTION_EXTENSIONS = ('.py', '.ipynb', '.rs')
+
+@dataclass
+class FileExecution:
+    """Execution evidence gathered from a single file"""
+    is_python: bool
+    valid_syntax: bool
+    checks_passed: int
+    # Checks the file was matched against, which change with the signatures; 0 for other languages
+    checks_total: int = 0
 
 class ExecutionVerifier:
-    """Verifies if the code can actually execute and perform AI operations"""
+    """
+    Verifies if the code can actually execute and perform AI operations
+    Holds only the execution checks; the repository and files to inspect
+    are passed to each call, so one verifier can be shared.
+    """
     
-    def __init__(self, repo_path: str):
-        self.repo_path = repo_path
+    def __init__(self, signatures: Optional[Signatures] = None):
+        self.signatures = signatures or current_signatures()
         
-    async def verify_execution(self) -> float:
+    async def verify_execution(self, repo_path: str, files: Optional[List[str]] = None) -> float:
         """
-        Verify if the code can execute and perform AI operations
+        Verify if the code of a repository, or the given files of it, can execute and perform AI operations
         Returns a score between 0 and 1
         """
+        records = []
+        for file_path in self._source_files(repo_path, files):
+            records.append(self.check_content(file_path, read_source_text(file_path)))
+        return self.aggregate(records)
+        
+    def aggregate(self, records: List[FileExecution]) -> float:
+        """Combine per-file execution evidence into the repository score"""
         # Check for basic executability
-        syntax_score = self._check_syntax()
+        syntax_score = self._check_syntax(records)
         
         # Check for proper AI function implementation
-        implementation_score = await self._check_implementation()
+        implementation_score = self._check_implementation(records)
         
         # Check for proper dependency management
         dependency_score = self._check_dependencies()
@@ -27,106 +55,56 @@ class ExecutionVerifier:
         # Implementation is most important, followed by syntax, then dependencies
         return (syntax_score * 0.25 + implementation_score * 0.65 + dependency_score * 0.1)
         
-    def _check_syntax(self) -> float:
-        """Check if the code has valid syntax"""
-        valid_files = 0
-        total_files = 0
+    @staticmethod
+    def _source_files(repo_path: str, files: Optional[List[str]]) -> Iterator[str]:
+        """Yield the files to inspect, walking the repository unless a file list was given"""
+        if files is not None:
+            yield from (path for path in files if path.endswith(EXECUTION_EXTENSIONS))
+            return
+            
+        for root, _, names in os.walk(repo_path):
+            for name in names:
+                if name.endswith(EXECUTION_EXTENSIONS):
+                    yield os.path.join(root, name)
         
-        for root, _, files in os.walk(self.repo_path):
-            for file in files:
-                if not file.endswith('.py'):
-                    continue
-                    
-                total_files += 1
-                try:
-                    with open(os.path.join(root, file), 'r') as f:
-                        ast.parse(f.read())
-                    valid_files += 1
-                except SyntaxError:
-                    continue
-                    
+    def check_content(self, file_path: str, content: str, tree: Optional['SyntaxTree'] = None) -> FileExecution:
+        """
+        Gather syntax and implementation evidence for a single file
+        With a syntax tree, checks match its code and item headers, so
+        commented-out code and split signatures are handled.
+        """
+        is_python = file_path.endswith(('.py', '.ipynb'))
+        valid_syntax = False
+        if is_python:
+            try:
+                ast.parse(content)
+                valid_syntax = True
+            except SyntaxError:
+                pass
+                
+        checks_passed = checks_total = 0
+        if file_path.endswith(EXECUTION_EXTENSIONS):
+            # Model initialization, inference methods, AI error handling and
+            # model configuration, each compiled into a single regex
+            text = tree.searchable if tree is not None else content
+            checks = self.signatures.execution_checks
+            checks_passed = sum(1 for check in checks if check.search(text))
+            checks_total = len(checks)
+            
+        return FileExecution(is_python, valid_syntax, checks_passed, checks_total)
+        
+    def _check_syntax(self, records: List[FileExecution]) -> float:
+        """Check if the code has valid syntax"""
+        total_files = sum(1 for record in records if record.is_python)
+        valid_files = sum(1 for record in records if record.valid_syntax)
         return valid_files / max(total_files, 1)
         
-    async def _check_implementation(self) -> float:
+    def _check_implementation(self, records: List[FileExecution]) -> float:
         """Check if AI-related functions are properly implemented"""
-        implementation_score = 0.0
-        total_checks = 0
-        
-        for root, _, files in os.walk(self.repo_path):
-            for file in files:
-                if not file.endswith(('.py', '.rs')):
-                    continue
-                    
-                with open(os.path.join(root, file), 'r') as f:
-                    content = f.read()
-                
-                # Check for AI model initialization
-                if self._check_model_init(content):
-                    implementation_score += 1
-                    total_checks += 1
-                
-                # Check for inference/prediction methods
-                if self._check_inference_methods(content):
-                    implementation_score += 1
-                    total_checks += 1
-                
-                # Check for proper error handling in AI operations
-                if self._check_ai_error_handling(content):
-                    implementation_score += 1
-                    total_checks += 1
-                    
-                # Check for model configuration
-                if self._check_model_config(content):
-                    implementation_score += 1
-                    total_checks += 1
-        
+        implementation_score = float(sum(record.checks_passed for record in records))
+        total_checks = sum(record.checks_passed for record in records)
         return implementation_score / max(total_checks, 1)
         
-    def _check_model_init(self, content: str) -> bool:
-        """Check for proper model initialization"""
-        patterns = [
-            r'CompletionModel::new',
-            r'EmbeddingModel::new',
-            r'Agent::new',
-            r'model\s*=\s*[A-Za-z]+Model\(',
-            r'torch\.nn\.Module',
-            r'keras\.Model',
-        ]
-        return any(re.search(pattern, content) for pattern in patterns)
-        
-    def _check_inference_methods(self, content: str) -> bool:
-        """Check for inference/prediction methods"""
-        patterns = [
-            r'async\s+fn\s+completion',
-            r'async\s+fn\s+embed',
-            r'fn\s+forward',
-            r'def\s+predict',
-            r'def\s+forward',
-            r'model\.predict',
-        ]
-        return any(re.search(pattern, content) for pattern in patterns)
-        
-    def _check_ai_error_handling(self, content: str) -> bool:
-        """Check for AI-specific error handling"""
-        patterns = [
-            r'CompletionError',
-            r'EmbeddingError',
-            r'Result<.*Response',
-            r'try:.*except\s+(torch|tensorflow|transformers)',
-        ]
-        return any(re.search(pattern, content) for pattern in patterns)
-        
-    def _check_model_config(self, content: str) -> bool:
-        """Check for model configuration"""
-        patterns = [
-            r'temperature\s*=',
-            r'max_tokens\s*=',
-            r'model_name\s*=',
-            r'batch_size\s*=',
-            r'learning_rate\s*=',
-        ]
-        return any(re.search(pattern, content) for pattern in patterns)
-        
     def _check_dependencies(self) -> float:
         """Check if all required dependencies are properly specified"""
         # TODO: Implement dependency verification
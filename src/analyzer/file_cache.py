@@ -0,0 +1,158 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from .result_store import default_data_path
+from .serialization import SerializationError, dumps, loads
+
+# Bump when per-file scoring changes so stale entries are never reused
+SCORES_VERSION = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total_bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO usage (id, total_bytes) VALUES (0, 0);
+"""
+
+def file_cache_key(language: str, content_hash: str, signature_version: str) -> str:
+    """
+    Cache key of a file's scores; language matters because scoring is per
+    language, and the signature version because scores depend on the patterns
+    """
+    return f"{SCORES_VERSION}:{signature_version}:{language}:{content_hash}"
+
+class FileResultCache:
+    """
+    Cross-repository cache of per-file results keyed by content hash
+    Entries live in a shared SQLite file bounded to max_bytes; the least
+    recently used entries are evicted first. Writers serialize through
+    BEGIN IMMEDIATE transactions, so several worker processes can share one
+    cache file. A small in-process LRU sits in front of the database.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_bytes: int = 256 * 1024 * 1024,
+        memory_entries: int = 4096,
+        touch_interval: float = 60.0
+    ):
+        self.db_path = db_path or default_data_path('file_cache.db')
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self._memory: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Autocommit mode; transactions are opened explicitly where needed
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Look up a cached result, refreshing its recency"""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return value
+
+        with self._connect() as conn:
+            row = conn.execute('SELECT value, last_access FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            now = time.time()
+            # Only write recency back occasionally to keep lookups read-mostly
+            if now - row[1] > self.touch_interval:
+                conn.execute('UPDATE entries SET last_access = ? WHERE key = ?', (now, key))
+
+        try:
+            value = loads(row[0])
+        except SerializationError:
+            # Written by a newer schema or with a format this process lacks
+            self.misses += 1
+            return None
+        self._remember(key, value)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Dict):
+        """Store a result and evict least recently used entries beyond the size bound"""
+        blob = dumps(value)
+        self._remember(key, value)
+
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                old = conn.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+                conn.execute(
+                    'INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)',
+                    (key, blob, len(blob), time.time())
+                )
+                delta = len(blob) - (old[0] if old else 0)
+                conn.execute('UPDATE usage SET total_bytes = total_bytes + ? WHERE id = 0', (delta,))
+                self._evict(conn)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop the oldest entries until usage is back under 90% of the bound"""
+        total = conn.execute('SELECT total_bytes FROM usage WHERE id = 0').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY last_access'):
+            if total - freed <= target:
+                break
+            victims.append((key,))
+            freed += size
+        conn.executemany('DELETE FROM entries WHERE key = ?', victims)
+        conn.execute('UPDATE usage SET total_bytes = total_bytes - ? WHERE id = 0', (freed,))
+        with self._lock:
+            for (key,) in victims:
+                self._memory.pop(key, None)
+
+    def _remember(self, key: str, value: Dict):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def size_bytes(self) -> int:
+        """Bytes of cached results currently stored"""
+        with self._connect() as conn:
+            return conn.execute('SELECT total_bytes FROM usage WHERE id = 0').fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
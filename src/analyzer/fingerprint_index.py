@@ -0,0 +1,301 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from .result_store import default_data_path
+
+# Universal hashing modulus; products of two values below it fit in int64
+MERSENNE_PRIME = (1 << 31) - 1
+
+TOKEN = re.compile(r'\w+|[^\w\s]')
+
+# Files whose stored signatures are looked up, or matched, in one query; below SQLite's bound parameter limit
+FINGERPRINT_BATCH = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    content_hash TEXT PRIMARY KEY,
+    signature BLOB
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, content_hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_lsh_buckets_content ON lsh_buckets (content_hash);
+CREATE TABLE IF NOT EXISTS repo_files (
+    repo_url TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    PRIMARY KEY (repo_url, content_hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_repo_files_content ON repo_files (content_hash);
+"""
+
+@dataclass
+class FileFingerprint:
+    """Content hash and MinHash signature of one file"""
+    rel_path: str
+    content_hash: str
+    signature: Optional[np.ndarray]
+
+@dataclass
+class OverlapReport:
+    """How much of a repository matches previously analyzed code"""
+    matched_files: int
+    total_files: int
+    repositories: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def percentage(self) -> float:
+        return 100.0 * self.matched_files / self.total_files if self.total_files else 0.0
+
+class FingerprintIndex:
+    """
+    Persistent MinHash/LSH index of analyzed file contents
+    Identical content is recognised by its blob hash; near-duplicates are
+    found through LSH band buckets and confirmed by their estimated Jaccard
+    similarity. Per-file scores for seen content live in the FileResultCache.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 5,
+        min_tokens: int = 20,
+        threshold: float = 0.8,
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.db_path = db_path or default_data_path('fingerprints.db')
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_tokens = min_tokens
+        self.threshold = threshold
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.int64)
+        self._b = rng.randint(0, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.int64)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def signature(self, content: str) -> Optional[np.ndarray]:
+        """MinHash signature over token shingles, or None for files too small to compare"""
+        tokens = TOKEN.findall(content)
+        if len(tokens) < max(self.min_tokens, self.shingle_size):
+            return None
+
+        k = self.shingle_size
+        shingles = {' '.join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), 'little') for s in shingles),
+            dtype=np.uint64, count=len(shingles)
+        )
+        values = (hashes % np.uint64(MERSENNE_PRIME)).astype(np.int64)
+
+        # Apply every permutation to a chunk of shingles at once
+        signature = np.full(self.num_perm, MERSENNE_PRIME, dtype=np.int64)
+        for start in range(0, len(values), 4096):
+            chunk = values[None, start:start + 4096]
+            permuted = (self._a * chunk + self._b) % MERSENNE_PRIME
+            np.minimum(signature, permuted.min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+    def _buckets(self, signature: np.ndarray) -> List[str]:
+        return [
+            hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).hexdigest()
+            for band in range(self.bands)
+        ]
+
+    def fingerprint(self, rel_path: str, content_hash: str, content: str) -> FileFingerprint:
+        """Fingerprint a file, reusing the stored signature of content indexed before"""
+        return self.fingerprint_many([(rel_path, content_hash, content)])[0]
+
+    def fingerprint_many(self, files: List[Tuple[str, str, str]]) -> List[FileFingerprint]:
+        """
+        Fingerprint (rel_path, content_hash, content) triples in order
+        Stored signatures of every file are read over one connection, in one
+        query per FINGERPRINT_BATCH files; only content not indexed before
+        is hashed.
+        """
+        stored: Dict[str, Optional[bytes]] = {}
+        hashes = sorted({content_hash for _, content_hash, _ in files})
+        if hashes:
+            with self._connect() as conn:
+                stored.update(_select_in(conn, 'SELECT content_hash, signature FROM fingerprints WHERE content_hash IN ({})', hashes))
+        fingerprints = []
+        for rel_path, content_hash, content in files:
+            if content_hash in stored:
+                data = stored[content_hash]
+                signature = np.frombuffer(data, dtype=np.uint32) if data is not None else None
+            else:
+                signature = self.signature(content)
+            fingerprints.append(FileFingerprint(rel_path, content_hash, signature))
+        return fingerprints
+
+    def batch(self) -> 'FingerprintBatch':
+        """Collector of one analysis's fingerprints"""
+        return FingerprintBatch(self)
+
+    def match(self, repo_url: str, fingerprints: List[FileFingerprint]) -> OverlapReport:
+        """
+        Find files identical or near-identical to code from other repositories
+        Files are matched FINGERPRINT_BATCH at a time: their LSH buckets are
+        probed through a temporary table in one join, and the candidates'
+        signatures and repositories are read with IN queries, so the number
+        of queries grows with the batches rather than with the files.
+        """
+        comparable = [fp for fp in fingerprints if fp.signature is not None]
+        report = OverlapReport(matched_files=0, total_files=len(comparable))
+        if not comparable:
+            return report
+
+        with self._connect() as conn:
+            conn.execute('CREATE TEMP TABLE IF NOT EXISTS probe (band INTEGER, bucket TEXT, file INTEGER)')
+            for start in range(0, len(comparable), FINGERPRINT_BATCH):
+                chunk = comparable[start:start + FINGERPRINT_BATCH]
+                for repos in self._match_batch(conn, repo_url, chunk):
+                    if repos:
+                        report.matched_files += 1
+                        for repo in repos:
+                            report.repositories[repo] = report.repositories.get(repo, 0) + 1
+        return report
+
+    def _match_batch(self, conn: sqlite3.Connection, repo_url: str, batch: List[FileFingerprint]) -> List[Set[str]]:
+        """Other repositories holding each file of a batch, or code similar enough to it"""
+        conn.execute('DELETE FROM probe')
+        conn.executemany('INSERT INTO probe (band, bucket, file) VALUES (?, ?, ?)', [
+            (band, bucket, i) for i, fp in enumerate(batch) for band, bucket in enumerate(self._buckets(fp.signature))
+        ])
+        candidates: List[Set[str]] = [set() for _ in batch]
+        for i, content_hash in conn.execute(
+            'SELECT probe.file, lsh_buckets.content_hash FROM probe '
+            'JOIN lsh_buckets ON lsh_buckets.band = probe.band AND lsh_buckets.bucket = probe.bucket'
+        ):
+            if content_hash != batch[i].content_hash:
+                candidates[i].add(content_hash)
+
+        signatures = dict(_select_in(
+            conn, 'SELECT content_hash, signature FROM fingerprints WHERE content_hash IN ({})',
+            sorted(set().union(*candidates))
+        ))
+        confirmed: List[Set[str]] = []
+        for fp, hashes in zip(batch, candidates):
+            similar = {fp.content_hash}
+            for content_hash in hashes:
+                data = signatures.get(content_hash)
+                if data is not None and np.mean(np.frombuffer(data, dtype=np.uint32) == fp.signature) >= self.threshold:
+                    similar.add(content_hash)
+            confirmed.append(similar)
+
+        holders: Dict[str, Set[str]] = {}
+        for content_hash, repo in _select_in(
+            conn, 'SELECT content_hash, repo_url FROM repo_files WHERE content_hash IN ({}) AND repo_url != ?',
+            sorted(set().union(*confirmed)), (repo_url,)
+        ):
+            holders.setdefault(content_hash, set()).add(repo)
+        return [set().union(*(holders.get(content_hash, ()) for content_hash in similar)) for similar in confirmed]
+
+    def add(self, repo_url: str, fingerprints: List[FileFingerprint]):
+        """
+        Record a repository's files and their signatures, replacing the files recorded for it before
+        Content the repository no longer holds, and no other repository
+        does, loses its signature and LSH buckets in the same transaction,
+        so the index only grows with code some repository still contains.
+        """
+        with self._connect() as conn:
+            # Files removed from the repository no longer match other repositories
+            previous = [row[0] for row in conn.execute('SELECT content_hash FROM repo_files WHERE repo_url = ?', (repo_url,))]
+            conn.execute('DELETE FROM repo_files WHERE repo_url = ?', (repo_url,))
+            conn.executemany(
+                'INSERT OR IGNORE INTO fingerprints (content_hash, signature) VALUES (?, ?)',
+                [
+                    (fp.content_hash, fp.signature.tobytes() if fp.signature is not None else None)
+                    for fp in fingerprints
+                ]
+            )
+            conn.executemany(
+                'INSERT OR IGNORE INTO lsh_buckets (band, bucket, content_hash) VALUES (?, ?, ?)',
+                [
+                    (band, bucket, fp.content_hash)
+                    for fp in fingerprints if fp.signature is not None
+                    for band, bucket in enumerate(self._buckets(fp.signature))
+                ]
+            )
+            conn.executemany(
+                'INSERT OR IGNORE INTO repo_files (repo_url, content_hash) VALUES (?, ?)',
+                [(repo_url, fp.content_hash) for fp in fingerprints]
+            )
+            dropped = sorted(set(previous).difference(fp.content_hash for fp in fingerprints))
+            held = {row[0] for row in _select_in(
+                conn, 'SELECT DISTINCT content_hash FROM repo_files WHERE content_hash IN ({})', dropped
+            )}
+            orphaned = [content_hash for content_hash in dropped if content_hash not in held]
+            for start in range(0, len(orphaned), FINGERPRINT_BATCH):
+                chunk = orphaned[start:start + FINGERPRINT_BATCH]
+                placeholders = ', '.join('?' * len(chunk))
+                conn.execute(f'DELETE FROM lsh_buckets WHERE content_hash IN ({placeholders})', chunk)
+                conn.execute(f'DELETE FROM fingerprints WHERE content_hash IN ({placeholders})', chunk)
+
+def _select_in(
+    conn: sqlite3.Connection,
+    query: str,
+    values: Sequence[str],
+    params: Tuple = ()
+) -> Iterable[Tuple]:
+    """Rows of a query whose {} placeholder is an IN list of values, FINGERPRINT_BATCH values per statement"""
+    for start in range(0, len(values), FINGERPRINT_BATCH):
+        chunk = list(values[start:start + FINGERPRINT_BATCH])
+        yield from conn.execute(query.format(', '.join('?' * len(chunk))), chunk + list(params))
+
+class FingerprintBatch:
+    """
+    Fingerprints of one analysis, looked up in batches as the file pass goes
+    Files wait in a buffer of FINGERPRINT_BATCH contents, so memory stays
+    bounded; each full buffer costs one signature lookup. Safe to add to
+    from several threads.
+    """
+
+    def __init__(self, index: FingerprintIndex, size: int = FINGERPRINT_BATCH):
+        self.index = index
+        self.size = size
+        self._pending: List[Tuple[str, str, str]] = []
+        self._done: List[FileFingerprint] = []
+        self._lock = threading.Lock()
+
+    def add(self, rel_path: str, content_hash: str, content: str):
+        with self._lock:
+            self._pending.append((rel_path, content_hash, content))
+            if len(self._pending) >= self.size:
+                self._done.extend(self.index.fingerprint_many(self._pending))
+                self._pending = []
+
+    def flush(self) -> List[FileFingerprint]:
+        """Every fingerprint added so far, in the order the files were added"""
+        with self._lock:
+            if self._pending:
+                self._done.extend(self.index.fingerprint_many(self._pending))
+                self._pending = []
+            return list(self._done)
@@ -0,0 +1,183 @@
+import os
+import posixpath
+import subprocess
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+from .scanner import LANGUAGE_EXTENSIONS
+
+# Commits scored by default, counting back from the revision
+HISTORY_COMMITS = 100
+
+@dataclass
+class HistoryPoint:
+    """Component scores of the source files at one commit"""
+    commit: str
+    # Committer time, seconds since the epoch
+    timestamp: int
+    files: int
+    # Source files added, modified or deleted since the previous point
+    changed_files: int
+    scores: Dict[str, float]
+    overall_score: Optional[float] = None
+
+@dataclass
+class ScoreHistory:
+    """Time series of scores over a range of commits, oldest first"""
+    points: List[HistoryPoint] = field(default_factory=list)
+    # Distinct blobs scored in this run, and blob versions taken from earlier commits or the file cache
+    blobs_scored: int = 0
+    blobs_reused: int = 0
+    truncated: bool = False
+    truncation_reason: Optional[str] = None
+    signature_version: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+@dataclass
+class ScoreDiff:
+    """How the scores and findings of a repository move from a base commit to a head commit"""
+    base: str
+    head: str
+    base_scores: Dict[str, float]
+    head_scores: Dict[str, float]
+    # Head minus base, per component
+    delta: Dict[str, float]
+    base_overall_score: Optional[float] = None
+    head_overall_score: Optional[float] = None
+    # Changed source files as {path, status}, status one of added, modified or deleted
+    files: List[Dict] = field(default_factory=list)
+    introduced_issues: List[Dict] = field(default_factory=list)
+    removed_issues: List[Dict] = field(default_factory=list)
+    blobs_scored: int = 0
+    # Whether the base scores came from the cache entry of its tree
+    base_cached: bool = False
+    signature_version: Optional[str] = None
+
+    @property
+    def overall_delta(self) -> Optional[float]:
+        if self.base_overall_score is None or self.head_overall_score is None:
+            return None
+        return self.head_overall_score - self.base_overall_score
+
+    def to_dict(self) -> Dict:
+        return dict(asdict(self), overall_delta=self.overall_delta)
+
+class UnknownRevision(ValueError):
+    """A ref that is neither in the clone nor on its origin"""
+
+def commit_scores_cache_key(tree: str, signature_version: str) -> str:
+    """Cache key of the file scores of a commit; the root tree id fixes every file in it"""
+    from .file_cache import SCORES_VERSION  # Deferred: keeps SQLite out of analyzer startup
+    return f"commit-scores:{SCORES_VERSION}:{signature_version}:{tree}"
+
+def source_language(path: str) -> Optional[str]:
+    """Language a path is scored as, None for files the scan skips"""
+    return LANGUAGE_EXTENSIONS.get(posixpath.splitext(path)[1])
+
+def list_commits(repo_path: str, revision: str = 'HEAD', limit: int = HISTORY_COMMITS) -> List[Tuple[str, int]]:
+    """The last limit commits of revision along first parents, as (commit, timestamp), oldest first"""
+    output = _git(repo_path, 'rev-list', '--first-parent', f'--max-count={limit}', '--format=%ct', revision)
+    lines = [line for line in output.splitlines() if line]
+    # Each commit is a "commit <sha>" line followed by its formatted line
+    commits = [(lines[i].split()[1], int(lines[i + 1])) for i in range(0, len(lines) - 1, 2)]
+    return commits[::-1]
+
+def resolve_commit(repo_path: str, ref: str) -> str:
+    """
+    Commit id of a ref, a branch of origin or a ref fetched from origin
+    A clone holds origin's branches as remote-tracking refs only and no
+    pull request refs, so refs not found locally are fetched.
+    """
+    for candidate in (ref, f'origin/{ref}'):
+        result = subprocess.run(
+            ['git', 'rev-parse', '--verify', '--quiet', f'{candidate}^{{commit}}'],
+            cwd=repo_path, capture_output=True, text=True
+        )
+        if result.returncode == 0:
+            return result.stdout.strip()
+    fetch = subprocess.run(
+        ['git', 'fetch', '--quiet', 'origin', ref], cwd=repo_path, capture_output=True, text=True,
+        # Never block on a credential prompt
+        env=dict(os.environ, GIT_TERMINAL_PROMPT='0')
+    )
+    if fetch.returncode != 0:
+        raise UnknownRevision(f"Unknown revision {ref}: {fetch.stderr.strip()}")
+    return _git(repo_path, 'rev-parse', 'FETCH_HEAD^{commit}').strip()
+
+def tree_id(repo_path: str, commit: str) -> str:
+    return _git(repo_path, 'rev-parse', f'{commit}^{{tree}}').strip()
+
+def tree_blobs(repo_path: str, commit: str) -> Dict[str, str]:
+    """Blob id of every source file in a commit's tree, by path"""
+    output = _git(repo_path, 'ls-tree', '-r', '-z', commit)
+    blobs = {}
+    for entry in output.split('\0'):
+        meta, _, path = entry.partition('\t')
+        parts = meta.split()
+        # Regular files only; symlinks are blobs too, submodules are commits
+        if len(parts) == 3 and parts[0].startswith('10') and source_language(path):
+            blobs[path] = parts[2]
+    return blobs
+
+def changed_blobs(repo_path: str, old: str, new: str) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Source files whose blob differs between two commits, from a diff of their trees
+    Returns the new blob id of each added or modified path and the deleted
+    paths; a rename is a deletion and an addition, and unchanged subtrees
+    are never listed.
+    """
+    output = _git(repo_path, 'diff-tree', '-r', '-z', '--no-renames', old, new)
+    changed: Dict[str, str] = {}
+    deleted: List[str] = []
+    # Raw records: ":<old mode> <new mode> <old blob> <new blob> <status>\0<path>\0"
+    fields = output.split('\0')
+    for meta, path in zip(fields[0::2], fields[1::2]):
+        parts = meta.split()
+        if len(parts) != 5 or not source_language(path):
+            continue
+        new_mode, new_blob, status = parts[1], parts[3], parts[4]
+        if status == 'D' or new_mode == '160000':
+            deleted.append(path)
+        elif new_mode.startswith('10'):
+            changed[path] = new_blob
+        else:
+            deleted.append(path)  # Replaced by a symlink
+    return changed, deleted
+
+def read_blobs(
+    repo_path: str,
+    objects: List[str],
+    max_size: Optional[int] = None
+) -> Iterator[Tuple[str, bytes]]:
+    """Contents of the blobs among objects, up to max_size bytes each, through one git cat-file --batch process"""
+    if not objects:
+        return
+    process = subprocess.Popen(
+        ['git', 'cat-file', '--batch'], cwd=repo_path,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE
+    )
+    try:
+        for sha in objects:
+            process.stdin.write(f"{sha}\n".encode())
+            process.stdin.flush()
+            header = process.stdout.readline().split()
+            if len(header) < 3:
+                continue  # missing object
+            kind, size = header[1], int(header[2])
+            if kind != b'blob' or max_size is not None and size > max_size:
+                # Skipped objects are drained without being held in memory
+                while size > 0:
+                    size -= len(process.stdout.read(min(size, 1024 * 1024)))
+                process.stdout.read(1)
+                continue
+            data = process.stdout.read(size)
+            process.stdout.read(1)  # trailing newline
+            yield sha, data
+    finally:
+        process.stdin.close()
+        process.kill()
+        process.wait()
+
+def _git(repo_path: str, *args: str) -> str:
+    return subprocess.run(['git', *args], cwd=repo_path, capture_output=True, text=True, check=True).stdout
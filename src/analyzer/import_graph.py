@@ -0,0 +1,328 @@
+import re
+import json
+import posixpath
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+from .scanner import SourceFile
+
+# Bump when extraction or resolution changes so cached graphs are rebuilt
+GRAPH_VERSION = 2
+
+PY_IMPORT = re.compile(r'^[ \t]*import[ \t]+([\w. \t,]+)', re.MULTILINE)
+PY_FROM_IMPORT = re.compile(r'^[ \t]*from[ \t]+(\.*[\w.]*)[ \t]+import[ \t]+(\([^)]*\)|[^\n#;]+)', re.MULTILINE)
+PY_MAIN_GUARD = re.compile(r'^if\s+__name__\s*==\s*[\'"]__main__[\'"]', re.MULTILINE)
+RUST_MOD = re.compile(r'^[ \t]*(?:pub(?:\([^)]*\))?[ \t]+)?mod[ \t]+(\w+)[ \t]*;', re.MULTILINE)
+RUST_USE = re.compile(r'^[ \t]*(?:pub(?:\([^)]*\))?[ \t]+)?use[ \t]+((?:crate|self|super)(?:::\w+)*)', re.MULTILINE)
+TS_IMPORT = re.compile(
+    r'(?:\bfrom[ \t]*|\bimport[ \t]*|\b(?:require|import)[ \t]*\([ \t]*)[\'"]([^\'"\n]+)[\'"]'
+)
+# name = "package.module:function" in [project.scripts], entry_points or setup.py
+PY_SCRIPT = re.compile(r'[\'"]?[\w.-]+[\'"]?\s*=\s*[\'"]?([A-Za-z_][\w.]*):[\w.]+')
+CARGO_BIN_PATH = re.compile(r'^\s*path\s*=\s*"([^"]+\.rs)"', re.MULTILINE)
+
+TS_EXTENSIONS = ('.ts', '.tsx', '.js', '.jsx')
+RUST_CRATE_ROOTS = ('lib.rs', 'main.rs')
+# Top-level directories of a Python project that are not part of what it ships
+NON_PACKAGE_DIRS = frozenset({
+    'test', 'tests', 'testing', 'example', 'examples', 'docs', 'doc', 'benchmarks', 'scripts',
+})
+
+def import_graph_cache_key(commit_sha: str) -> str:
+    """Cache key of the graph of a commit; its files and imports are fixed by the commit"""
+    return f"import-graph:{GRAPH_VERSION}:{commit_sha}"
+
+def extract_imports(language: str, content: str) -> List[str]:
+    """
+    Import specifiers of a file as written, before resolution
+    Python specifiers are dotted module names that keep their leading dots
+    when relative; names imported with from are listed as submodules too,
+    since they may be modules. Rust specifiers are 'mod:name' declarations
+    and crate/self/super paths of use items; TypeScript specifiers are the
+    module strings of import, export-from and require.
+    """
+    specifiers: List[str] = []
+    if language == 'python':
+        for match in PY_IMPORT.finditer(content):
+            for name in match.group(1).split(','):
+                name = name.split()[0] if name.split() else ''
+                if name:
+                    specifiers.append(name)
+        for match in PY_FROM_IMPORT.finditer(content):
+            module = match.group(1)
+            specifiers.append(module)
+            separator = '' if module.endswith('.') else '.'
+            for name in match.group(2).strip('()').split(','):
+                name = name.split()[0] if name.split() else ''
+                if name.isidentifier():
+                    specifiers.append(f"{module}{separator}{name}")
+    elif language == 'rust':
+        specifiers.extend(f"mod:{name}" for name in RUST_MOD.findall(content))
+        specifiers.extend(RUST_USE.findall(content))
+    else:
+        specifiers.extend(s for s in TS_IMPORT.findall(content) if s.startswith(('.', '/')))
+    return specifiers
+
+class ImportGraph:
+    """
+    Module graph of a repository as an adjacency index
+    Nodes are source files by index into files, edges[i] lists the files
+    file i imports. Construction extracts imports with one regex pass per
+    file and resolves them against dictionaries of module names, so it is
+    linear in repository size.
+    """
+
+    def __init__(self, files: List[str], edges: List[List[int]], entry_points: List[int]):
+        self.files = files
+        self.edges = edges
+        self.entry_points = entry_points
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(targets) for targets in self.edges)
+
+    def reachable(self, entry_points: Optional[Iterable[int]] = None) -> Set[str]:
+        """Files reachable from the entry points, breadth first"""
+        entries = self.entry_points if entry_points is None else list(entry_points)
+        seen = set(entries)
+        queue = deque(entries)
+        while queue:
+            for target in self.edges[queue.popleft()]:
+                if target not in seen:
+                    seen.add(target)
+                    queue.append(target)
+        return {self.files[i] for i in seen}
+
+    def index_of(self, rel_paths: Iterable[str]) -> List[int]:
+        """Node indices of files; unknown paths raise ValueError"""
+        positions = {path: i for i, path in enumerate(self.files)}
+        unknown = [path for path in rel_paths if path not in positions]
+        if unknown:
+            raise ValueError(f"Unknown entry points: {', '.join(unknown)}")
+        return [positions[path] for path in rel_paths]
+
+    def to_dict(self) -> Dict:
+        return {'files': self.files, 'edges': self.edges, 'entry_points': self.entry_points}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ImportGraph':
+        return cls(data['files'], data['edges'], data['entry_points'])
+
+    @classmethod
+    def build(cls, files: List[SourceFile], sources: Dict[str, str], manifests: Dict[str, str]) -> 'ImportGraph':
+        """Build the graph from file contents and package manifests, both by relative path"""
+        paths = [f.rel_path for f in files]
+        resolver = _Resolver(paths)
+        edges = []
+        for source_file in files:
+            content = sources.get(source_file.rel_path, '')
+            targets = resolver.resolve(source_file.rel_path, extract_imports(source_file.language, content))
+            edges.append(sorted(targets))
+        entry_points = resolver.entry_points(files, sources, manifests)
+        return cls(paths, edges, sorted(entry_points))
+
+class _Resolver:
+    """Dictionaries of module names built once per graph, used to resolve specifiers to file indices"""
+
+    def __init__(self, paths: List[str]):
+        self.paths = paths
+        self.positions = {path: i for i, path in enumerate(paths)}
+        self.package_inits = [p for p in paths if p.endswith('/__init__.py')]
+        package_dirs = {posixpath.dirname(p) for p in self.package_inits}
+        self.python_modules: Dict[str, int] = {}
+        self.module_names: Dict[int, str] = {}
+        for i, path in enumerate(paths):
+            if path.endswith('.py'):
+                name = self._module_name(path, package_dirs)
+                self.python_modules.setdefault(name, i)
+                self.module_names[i] = name
+
+    @staticmethod
+    def _module_name(path: str, package_dirs: Set[str]) -> str:
+        """Dotted name from the first directory that is not a package, as seen on sys.path"""
+        directory, file = posixpath.split(path[:-3])
+        parts = [] if file == '__init__' else [file]
+        while directory and directory in package_dirs:
+            directory, package = posixpath.split(directory)
+            parts.append(package)
+        return '.'.join(reversed(parts))
+
+    def resolve(self, path: str, specifiers: List[str]) -> Set[int]:
+        if path.endswith(('.py', '.ipynb')):
+            resolve = self._resolve_python
+        elif path.endswith('.rs'):
+            resolve = self._resolve_rust
+        else:
+            resolve = self._resolve_typescript
+        targets: Set[int] = set()
+        for specifier in specifiers:
+            targets.update(resolve(path, specifier))
+        targets.discard(self.positions[path])
+        return targets
+
+    def _resolve_python(self, path: str, specifier: str) -> List[int]:
+        dots = len(specifier) - len(specifier.lstrip('.'))
+        name = specifier[dots:]
+        if dots:
+            package = self.module_names.get(self.positions[path], '').split('.')
+            # A module's package is its parent; a package's __init__ is the package itself
+            if not path.endswith('/__init__.py'):
+                package = package[:-1]
+            if dots - 1 > len(package):
+                return []
+            base = package[:len(package) - (dots - 1)]
+            name = '.'.join(base + ([name] if name else []))
+        # Importing a.b.c runs a, a.b and a.b.c
+        parts = name.split('.')
+        return [
+            self.python_modules[prefix]
+            for prefix in ('.'.join(parts[:n]) for n in range(1, len(parts) + 1))
+            if prefix in self.python_modules
+        ]
+
+    def _resolve_rust(self, path: str, specifier: str) -> List[int]:
+        directory, file = posixpath.split(path)
+        # Child modules of lib.rs, main.rs and mod.rs live next to them, those of foo.rs in foo/
+        module_dir = directory if file in RUST_CRATE_ROOTS + ('mod.rs',) else posixpath.join(directory, file[:-3])
+        if specifier.startswith('mod:'):
+            return self._rust_module(module_dir, [specifier[4:]])
+        segments = specifier.split('::')
+        head, segments = segments[0], segments[1:]
+        if head == 'crate':
+            base = self._crate_root(directory)
+        elif head == 'super':
+            base = posixpath.dirname(module_dir)
+            while segments and segments[0] == 'super':
+                base, segments = posixpath.dirname(base), segments[1:]
+        else:
+            base = module_dir
+        if base is None:
+            return []
+        return self._rust_module(base, segments)
+
+    def _rust_module(self, base: str, segments: List[str]) -> List[int]:
+        """Files of each module along a path; later segments may name items rather than modules"""
+        targets = []
+        for segment in segments:
+            base = posixpath.join(base, segment)
+            found = [self.positions[p] for p in (base + '.rs', base + '/mod.rs') if p in self.positions]
+            if not found:
+                break
+            targets.extend(found)
+        return targets
+
+    def _crate_root(self, directory: str) -> Optional[str]:
+        """Directory of the nearest enclosing lib.rs or main.rs"""
+        # Walking up also places binaries under src/bin/ in the crate of src/
+        while True:
+            if any(posixpath.join(directory, root) in self.positions for root in RUST_CRATE_ROOTS):
+                return directory
+            if not directory:
+                return None
+            directory = posixpath.dirname(directory)
+
+    def _resolve_typescript(self, path: str, specifier: str) -> List[int]:
+        if specifier.startswith('/'):
+            target = specifier.lstrip('/')
+        else:
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(path), specifier))
+        found = self._typescript_file(target)
+        return [found] if found is not None else []
+
+    def _typescript_file(self, target: str) -> Optional[int]:
+        stem, extension = posixpath.splitext(target)
+        candidates = [target]
+        # ESM TypeScript imports name the compiled .js file
+        if extension in ('.js', '.jsx'):
+            candidates.extend(stem + ext for ext in ('.ts', '.tsx'))
+        candidates.extend(target + ext for ext in TS_EXTENSIONS)
+        candidates.extend(f"{target}/index{ext}" for ext in TS_EXTENSIONS)
+        for candidate in candidates:
+            if candidate in self.positions:
+                return self.positions[candidate]
+        return None
+
+    def entry_points(self, files: List[SourceFile], sources: Dict[str, str], manifests: Dict[str, str]) -> Set[int]:
+        """
+        Files declared or conventionally used as entry points
+        Scripts with a __main__ guard, __main__.py, notebooks, the packages
+        and console scripts of Python manifests, Rust crate roots and
+        binaries, and the main, module, bin and exports targets of
+        package.json.
+        """
+        entries: Set[int] = set()
+        for source_file in files:
+            i = self.positions[source_file.rel_path]
+            name = posixpath.basename(source_file.rel_path)
+            if source_file.language == 'python':
+                # Notebooks are run directly, like scripts
+                if (name == '__main__.py' or source_file.is_notebook
+                        or PY_MAIN_GUARD.search(sources.get(source_file.rel_path, ''))):
+                    entries.add(i)
+            elif source_file.language == 'rust':
+                directory = posixpath.dirname(source_file.rel_path)
+                if name in RUST_CRATE_ROOTS or posixpath.basename(directory) == 'bin':
+                    entries.add(i)
+
+        for manifest, content in manifests.items():
+            directory, name = posixpath.split(manifest)
+            if name in ('pyproject.toml', 'setup.py'):
+                entries.update(self._python_packages(directory))
+                for module in PY_SCRIPT.findall(content):
+                    if module in self.python_modules:
+                        entries.add(self.python_modules[module])
+            elif name == 'Cargo.toml':
+                for target in CARGO_BIN_PATH.findall(content):
+                    target = posixpath.normpath(posixpath.join(directory, target))
+                    if target in self.positions:
+                        entries.add(self.positions[target])
+            elif name == 'package.json':
+                entries.update(self._package_json_entries(directory, content))
+        return entries
+
+    def _python_packages(self, directory: str) -> Set[int]:
+        """__init__.py of the top-level packages next to a Python manifest or in its src/"""
+        entries = set()
+        for root in (directory, posixpath.join(directory, 'src')):
+            prefix = f"{root}/" if root else ''
+            for path in self.package_inits:
+                package = path[len(prefix):].split('/')
+                if path.startswith(prefix) and len(package) == 2 and package[0] not in NON_PACKAGE_DIRS:
+                    entries.add(self.positions[path])
+        return entries
+
+    def _package_json_entries(self, directory: str, content: str) -> Set[int]:
+        try:
+            manifest = json.loads(content)
+        except ValueError:
+            return set()
+        targets: List[str] = []
+
+        def collect(value):
+            if isinstance(value, str):
+                targets.append(value)
+            elif isinstance(value, dict):
+                for item in value.values():
+                    collect(item)
+            elif isinstance(value, list):
+                for item in value:
+                    collect(item)
+
+        for field in ('main', 'module', 'browser', 'bin', 'exports'):
+            if isinstance(manifest, dict):
+                collect(manifest.get(field))
+        entries = set()
+        for target in targets:
+            target = posixpath.normpath(posixpath.join(directory, target))
+            found = self._typescript_file(target)
+            if found is None:
+                # Published entry points are often build output; fall back to the sources
+                relative = posixpath.relpath(target, directory) if directory else target
+                for build_dir in ('dist/', 'lib/', 'build/', 'out/'):
+                    if relative.startswith(build_dir):
+                        found = self._typescript_file(
+                            posixpath.join(directory, 'src', relative[len(build_dir):])
+                        )
+                        break
+            if found is not None:
+                entries.add(found)
+        return entries
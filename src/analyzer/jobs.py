@@ -0,0 +1,183 @@
+import os
+from dataclasses import asdict
+from typing import Dict, Optional
+from .cancellation import CancellationToken
+from .clone import remote_head
+from .code_analyzer import COMPONENTS, CodeAnalyzer
+from .file_cache import FileResultCache
+from .memory import MemoryGovernor
+from .progress import AnalysisProgress
+from .report_generator import ReportGenerator
+from .result_store import ResultStore
+from .sampling import AnalysisBudget
+from .signatures import current_signatures
+
+class ServiceResources:
+    """Long-lived stores shared by every analysis a service process runs"""
+
+    def __init__(
+        self,
+        result_store: ResultStore,
+        file_cache: Optional[FileResultCache] = None,
+        fingerprint_db: Optional[str] = None,
+        fingerprints: bool = True,
+        memory: Optional[MemoryGovernor] = None
+    ):
+        self.result_store = result_store
+        self.file_cache = file_cache
+        self.fingerprint_db = fingerprint_db
+        self.fingerprints = fingerprints
+        # Admission control and memory accounting of /analyze analyses; None admits everything
+        self.memory = memory
+        self._fingerprint_index = None
+
+    @classmethod
+    def from_environment(cls) -> 'ServiceResources':
+        """Open the stores configured through CHRON_* environment variables"""
+        return cls(
+            result_store=ResultStore(os.environ.get("CHRON_RESULT_DB")),
+            file_cache=FileResultCache(
+                os.environ.get("CHRON_FILE_CACHE_DB"),
+                max_bytes=int(os.environ.get("CHRON_FILE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+            ),
+            fingerprint_db=os.environ.get("CHRON_FINGERPRINT_DB"),
+            memory=MemoryGovernor.from_environment()
+        )
+
+    @property
+    def fingerprint_index(self):
+        """Open the near-duplicate index on first use, keeping NumPy out of startup"""
+        if self.fingerprints and self._fingerprint_index is None:
+            from .fingerprint_index import FingerprintIndex
+            self._fingerprint_index = FingerprintIndex(self.fingerprint_db)
+        return self._fingerprint_index
+
+def parse_budget(options: Optional[Dict]) -> Optional[AnalysisBudget]:
+    """Build a budget from request options, ignoring unset fields"""
+    if options is None:
+        return None
+    return AnalysisBudget(**{key: value for key, value in options.items() if value is not None})
+
+# Request options that change what an analysis computes; requests without
+# any of them get the standard result, which is stored and can be served again
+NON_STANDARD_OPTIONS = (
+    'budget', 'breakdown', 'components', 'plugins', 'reachable_only', 'entry_points', 'workspace', 'secret_history'
+)
+
+def is_standard_request(request: Dict) -> bool:
+    return not any(request.get(option) for option in NON_STANDARD_OPTIONS)
+
+def stored_report(result_store: ResultStore, repo_url: str, commit: str) -> Optional[Dict]:
+    """Report of the stored standard result of a repository at a commit, if one is still current"""
+    stored = result_store.find(repo_url, commit)
+    if stored is None or stored.files_analyzed < stored.files_total:
+        return None
+    # Results scored with other signatures, or with the history penalty, are not reused
+    if stored.payload.get('signature_version') != current_signatures().version:
+        return None
+    if stored.payload.get('secret_history') is not None:
+        return None
+    return asdict(ReportGenerator(stored.to_analysis_result()).generate_summary())
+
+async def run_analysis(
+    request: Dict,
+    resources: ServiceResources,
+    cancellation: Optional[CancellationToken] = None,
+    progress: Optional[AnalysisProgress] = None
+) -> Dict:
+    """
+    Analyze the repository of an /analyze request and return the report as a dict
+    Without a token, one is created from the request's timeout. Truncated
+    results, results sampled under memory pressure, results of selected
+    components and results restricted to reachable code are returned but
+    not stored, so they never become the latest result of a repository.
+    A standard request looks up the remote's HEAD first: a stored result
+    for that commit is served as it is, and otherwise an earlier clone is
+    brought up to the commit before it is analyzed. The clone is shared
+    by the repository's analyses on the host and held by one at a time,
+    across worker processes too, from the checkout until the result is
+    stored; a request that waited for it looks in the store again, so
+    workers given the same commit analyze it once.
+    """
+    if cancellation is None:
+        cancellation = CancellationToken(timeout=request.get('timeout'))
+    head = None
+    if is_standard_request(request):
+        head = await remote_head(request['repo_url'])
+        report = stored_report(resources.result_store, request['repo_url'], head) if head else None
+        if report is not None:
+            if progress is not None:
+                progress.stage('result_store', 'hit', commit=head)
+            return report
+    analyzer = CodeAnalyzer(
+        request['repo_url'],
+        fingerprint_index=resources.fingerprint_index,
+        file_cache=resources.file_cache,
+        memory=resources.memory
+    )
+    # The clone's locks, held by one process on the host at a time, cover the checkout until the result is stored
+    async with analyzer.checkout(cancellation, progress, commit=head) as repo_path:
+        if head is not None:
+            # An analysis of the same commit, in this worker or another, may have been stored while this one waited
+            report = stored_report(resources.result_store, request['repo_url'], head)
+            if report is not None:
+                if progress is not None:
+                    progress.stage('result_store', 'hit', commit=head)
+                return report
+        result = await analyzer.analyze(
+            budget=parse_budget(request.get('budget')),
+            breakdown=request.get('breakdown', False),
+            cancellation=cancellation,
+            progress=progress,
+            components=request.get('components'),
+            plugins=request.get('plugins'),
+            reachable_only=request.get('reachable_only', False),
+            entry_points=request.get('entry_points'),
+            workspace=request.get('workspace', False),
+            secret_history=request.get('secret_history', False)
+        )
+        # Only complete analyses become the stored result of a repository
+        complete = not result.truncated and not result.sampled and len(result.components) == len(COMPONENTS)
+        if complete and result.reachability is None:
+            resources.result_store.save(request['repo_url'], result, commit_sha=analyzer.head_commit(repo_path))
+
+    report_generator = ReportGenerator(result)
+    return asdict(report_generator.generate_summary())
+
+async def run_history(
+    request: Dict,
+    resources: ServiceResources,
+    cancellation: Optional[CancellationToken] = None,
+    progress: Optional[AnalysisProgress] = None
+) -> Dict:
+    """Score the recent commits of an /analyze/history request into a time series, oldest first"""
+    if cancellation is None:
+        cancellation = CancellationToken(timeout=request.get('timeout'))
+    analyzer = CodeAnalyzer(request['repo_url'], file_cache=resources.file_cache)
+    history = await analyzer.analyze_history(
+        revision=request.get('revision') or 'HEAD',
+        limit=request.get('commits'),
+        components=request.get('components'),
+        cancellation=cancellation,
+        progress=progress
+    )
+    return history.to_dict()
+
+async def run_diff(
+    request: Dict,
+    resources: ServiceResources,
+    cancellation: Optional[CancellationToken] = None,
+    progress: Optional[AnalysisProgress] = None
+) -> Dict:
+    """Score the change between the base and head refs of an /analyze/diff request"""
+    if cancellation is None:
+        cancellation = CancellationToken(timeout=request.get('timeout'))
+    analyzer = CodeAnalyzer(request['repo_url'], file_cache=resources.file_cache)
+    diff = await analyzer.analyze_diff(
+        base=request['base'],
+        head=request.get('head') or 'HEAD',
+        components=request.get('components'),
+        cancellation=cancellation,
+        progress=progress
+    )
+    return diff.to_dict()
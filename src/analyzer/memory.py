@@ -0,0 +1,324 @@
+import os
+import time
+import asyncio
+import threading
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Deque, Dict, Optional, Sequence
+from .cancellation import CancellationToken, current_rss
+from .sampling import AnalysisBudget
+from .scanner import SourceFile
+
+# Memory an analysis uses before it reads a file: clone bookkeeping, analyzers, the report
+BASE_COST = 16 * 1024 * 1024
+# Per scanned file: its scan and score records, cache entry and issues
+PER_FILE_COST = 4 * 1024
+# Per byte of the largest file while it is decoded and parsed into a syntax tree
+PARSE_FACTOR = 12
+# Per byte of source kept in memory for plugins or the import graph, including parsed forms
+RETAINED_FACTOR = 8
+# Per file, for the near-duplicate fingerprints of a complete analysis
+FINGERPRINT_COST = 2 * 1024
+# Per file, for the metric table of a breakdown
+BREAKDOWN_COST = 1024
+# Share of the memory available at startup that analyses may reserve together
+MEMORY_SHARE = 0.8
+# Smallest sample worth downgrading to; below it the analysis waits for memory instead
+MIN_SAMPLE_SIZE = 100
+# Seconds between admission checks of a queued analysis
+QUEUE_POLL_INTERVAL = 0.25
+# Seconds between resident memory samples while an analysis runs
+SAMPLE_INTERVAL = 0.05
+# Finished analyses whose accounting is kept for the metrics endpoint
+RECENT_ANALYSES = 20
+
+ADMITTED = 'admitted'
+DOWNGRADED = 'downgraded'
+
+def available_memory() -> Optional[int]:
+    """Memory the kernel can hand out without swapping (MemAvailable), None where unknown"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+@dataclass
+class MemoryEstimate:
+    """Peak memory an analysis is expected to need, from the file counts and sizes of its scan"""
+    files: int
+    source_bytes: int
+    largest_file: int
+    retained_bytes: int
+    peak_bytes: int
+
+    def per_file(self) -> float:
+        """Average cost of one more file, for sizing a sample"""
+        if not self.files:
+            return 0.0
+        return (self.peak_bytes - BASE_COST - self.largest_file * PARSE_FACTOR) / self.files
+
+    def sampled(self, sample_size: int) -> 'MemoryEstimate':
+        """Estimate of the same analysis over a sample of sample_size files"""
+        if sample_size >= self.files:
+            return self
+        share = sample_size / self.files
+        return MemoryEstimate(
+            files=sample_size,
+            source_bytes=int(self.source_bytes * share),
+            largest_file=self.largest_file,
+            retained_bytes=int(self.retained_bytes * share),
+            peak_bytes=int(BASE_COST + self.largest_file * PARSE_FACTOR + self.per_file() * sample_size)
+        )
+
+def estimate_memory(
+    files: Sequence[SourceFile],
+    retain_sources: bool = False,
+    fingerprints: bool = False,
+    breakdown: bool = False
+) -> MemoryEstimate:
+    """
+    Estimate the peak memory of analyzing the scanned files
+    The file pass reads one file at a time, so besides a per-file record
+    only the largest file counts in full; sources kept for plugins or the
+    import graph count for every file.
+    """
+    source_bytes = sum(f.size for f in files)
+    largest_file = max((f.size for f in files), default=0)
+    retained_bytes = source_bytes * RETAINED_FACTOR if retain_sources else 0
+    per_file = PER_FILE_COST + (FINGERPRINT_COST if fingerprints else 0) + (BREAKDOWN_COST if breakdown else 0)
+    return MemoryEstimate(
+        files=len(files),
+        source_bytes=source_bytes,
+        largest_file=largest_file,
+        retained_bytes=retained_bytes,
+        peak_bytes=BASE_COST + largest_file * PARSE_FACTOR + retained_bytes + per_file * len(files)
+    )
+
+@dataclass
+class Admission:
+    """How the governor let an analysis run, and the memory reserved for it"""
+    decision: str
+    estimate: MemoryEstimate
+    reserved_bytes: int
+    # Files to sample when the analysis was downgraded, None for a full analysis
+    sample_size: Optional[int] = None
+    queued_seconds: float = 0.0
+
+    def budget(self, budget: Optional[AnalysisBudget]) -> Optional[AnalysisBudget]:
+        """The request's budget, forced down to the admitted sample without escalating to a full scan"""
+        if self.sample_size is None:
+            return budget
+        return replace(
+            budget or AnalysisBudget(),
+            max_files=0,
+            max_bytes=0,
+            sample_size=min(self.sample_size, budget.sample_size) if budget is not None else self.sample_size,
+            max_interval_width=float('inf')
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            'decision': self.decision,
+            'estimated_bytes': self.estimate.peak_bytes,
+            'reserved_bytes': self.reserved_bytes,
+            'sample_size': self.sample_size,
+            'queued_seconds': round(self.queued_seconds, 3),
+        }
+
+class MemoryTracker:
+    """
+    Peak memory of each stage of one analysis
+    A sampler thread reads the resident set size every interval, and the
+    stage events of the analysis's progress close each window: the peak
+    seen since the previous event is charged to the stage that just ended,
+    or to the one running before a stage started. When tracemalloc is
+    tracing, the Python heap peak is recorded too. Both are measured for
+    the whole process, so concurrent analyses see each other's memory.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.started_rss = current_rss()
+        self.peak_rss = self.started_rss
+        # Peak resident and Python heap bytes per stage
+        self.stages: Dict[str, Dict[str, int]] = {}
+        self._current = 'analysis'
+        self._window_peak = self.started_rss
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+
+    def event(self, event: str, fields: Dict):
+        """Close the window at a stage event; the scan ends with the files it discovered"""
+        if event == 'stage':
+            self.stage(fields['stage'], fields['status'])
+        elif event == 'discovered':
+            self.stage('scan', 'done')
+
+    def stage(self, name: str, status: str):
+        with self._lock:
+            self._close_window(name if status != 'started' else self._current)
+            self._current = name if status == 'started' else 'analysis'
+
+    def stop(self) -> Dict:
+        """Stop sampling and return the accounting of the analysis"""
+        self._stopped.set()
+        self._sampler.join()
+        with self._lock:
+            self._close_window(self._current)
+            self._current = 'analysis'
+        return {
+            'peak_rss_bytes': self.peak_rss,
+            'rss_growth_bytes': max(0, self.peak_rss - self.started_rss),
+            'stages': self.stages,
+        }
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            rss = current_rss()
+            with self._lock:
+                self._window_peak = max(self._window_peak, rss)
+
+    def _close_window(self, stage: str):
+        rss = current_rss()
+        peak = max(self._window_peak, rss)
+        self.peak_rss = max(self.peak_rss, peak)
+        record = self.stages.setdefault(stage, {'peak_rss_bytes': 0})
+        record['peak_rss_bytes'] = max(record['peak_rss_bytes'], peak)
+        if tracemalloc.is_tracing():
+            heap_peak = tracemalloc.get_traced_memory()[1]
+            record['peak_python_bytes'] = max(record.get('peak_python_bytes', 0), heap_peak)
+            tracemalloc.reset_peak()
+        self._window_peak = rss
+
+class MemoryGovernor:
+    """
+    Admits analyses by their memory estimate so concurrent ones do not exhaust the process
+    Analyses reserve their estimated peak while they run. One that fits in
+    the unreserved part of the limit, and in the memory the kernel reports
+    available, is admitted; one that does not is downgraded to the largest
+    sample that fits, and when not even MIN_SAMPLE_SIZE files fit it waits
+    for running analyses to finish. An analysis too large for the limit on
+    its own runs once nothing else does. Safe to use from any thread.
+    """
+
+    def __init__(self, limit: Optional[int] = None, poll_interval: float = QUEUE_POLL_INTERVAL):
+        self.limit = limit
+        self.poll_interval = poll_interval
+        self.reserved = 0
+        self.running = 0
+        self.waiting = 0
+        self.counts = {ADMITTED: 0, DOWNGRADED: 0, 'queued': 0}
+        # Highest peak seen per stage over every analysis
+        self.stage_peaks: Dict[str, Dict[str, int]] = {}
+        self.recent: Deque[Dict] = deque(maxlen=RECENT_ANALYSES)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls) -> 'MemoryGovernor':
+        """
+        Limit from CHRON_MEMORY_LIMIT_MB, or a share of the memory available now
+        CHRON_TRACEMALLOC=1 also records the Python heap peak of each stage.
+        """
+        if os.environ.get("CHRON_TRACEMALLOC") == "1" and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if os.environ.get("CHRON_MEMORY_LIMIT_MB"):
+            return cls(int(os.environ["CHRON_MEMORY_LIMIT_MB"]) * 1024 * 1024)
+        available = available_memory()
+        return cls(int(available * MEMORY_SHARE) if available is not None else None)
+
+    async def admit(
+        self,
+        estimate: MemoryEstimate,
+        cancellation: Optional[CancellationToken] = None,
+        can_sample: bool = True
+    ) -> Admission:
+        """Reserve memory for an analysis, downgrading it or waiting as needed; release() it afterwards"""
+        started = time.monotonic()
+        queued = False
+        while True:
+            with self._lock:
+                admission = self._try_admit(estimate, can_sample)
+                if admission is not None:
+                    if queued:
+                        self.waiting -= 1
+                    self.counts[admission.decision] += 1
+                    self.reserved += admission.reserved_bytes
+                    self.running += 1
+                    admission.queued_seconds = time.monotonic() - started
+                    return admission
+                if not queued:
+                    queued = True
+                    self.waiting += 1
+                    self.counts['queued'] += 1
+            try:
+                if cancellation is not None:
+                    cancellation.check()
+                await asyncio.sleep(self.poll_interval)
+            except BaseException:
+                with self._lock:
+                    self.waiting -= 1
+                raise
+
+    def release(self, admission: Admission, accounting: Optional[Dict] = None):
+        """Return an analysis's reservation and record what it actually used"""
+        with self._lock:
+            self.reserved -= admission.reserved_bytes
+            self.running -= 1
+            if accounting is None:
+                return
+            for stage, peaks in accounting['stages'].items():
+                record = self.stage_peaks.setdefault(stage, {})
+                for key, value in peaks.items():
+                    record[key] = max(record.get(key, 0), value)
+            self.recent.append(dict(admission.to_dict(), **accounting))
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                'limit_bytes': self.limit,
+                'reserved_bytes': self.reserved,
+                'available_bytes': available_memory(),
+                'rss_bytes': current_rss(),
+                'running': self.running,
+                'waiting': self.waiting,
+                'admitted': self.counts[ADMITTED],
+                'downgraded': self.counts[DOWNGRADED],
+                'queued': self.counts['queued'],
+                'stage_peaks': {stage: dict(peaks) for stage, peaks in self.stage_peaks.items()},
+                'recent': list(self.recent),
+            }
+
+    def _free(self) -> Optional[float]:
+        """Bytes an analysis may reserve now, None without any limit"""
+        free = [self.limit - self.reserved] if self.limit is not None else []
+        available = available_memory()
+        if available is not None:
+            free.append(available * MEMORY_SHARE)
+        return min(free) if free else None
+
+    def _try_admit(self, estimate: MemoryEstimate, can_sample: bool) -> Optional[Admission]:
+        free = self._free()
+        if free is None or estimate.peak_bytes <= free:
+            return Admission(ADMITTED, estimate, estimate.peak_bytes)
+        if can_sample and estimate.per_file() > 0:
+            fixed = estimate.peak_bytes - estimate.per_file() * estimate.files
+            sample_size = int((free - fixed) / estimate.per_file())
+            if MIN_SAMPLE_SIZE <= sample_size < estimate.files:
+                sampled = estimate.sampled(sample_size)
+                return Admission(DOWNGRADED, estimate, sampled.peak_bytes, sample_size=sample_size)
+        # Nothing running holds memory that could be waited for: run in the smallest form
+        if self.running == 0:
+            smallest = estimate.sampled(MIN_SAMPLE_SIZE) if can_sample else estimate
+            if smallest is estimate:
+                return Admission(ADMITTED, estimate, estimate.peak_bytes)
+            return Admission(DOWNGRADED, estimate, smallest.peak_bytes, sample_size=MIN_SAMPLE_SIZE)
+        return None
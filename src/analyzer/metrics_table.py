@@ -0,0 +1,121 @@
+import numpy as np
+from typing import Dict, List, Sequence, Tuple
+
+METRICS: Tuple[str, ...] = ('code_quality', 'ai_framework', 'execution', 'security')
+
+PERCENTILES: Tuple[int, ...] = (10, 50, 90)
+
+class FileMetricsTable:
+    """
+    Column-oriented per-file metrics, one row per analyzed file
+    Metric columns share a single (files x metrics) array so every
+    aggregation runs as one vectorized operation over all metrics
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[str],
+        languages: Sequence[str],
+        directories: Sequence[str],
+        sizes: Sequence[int],
+        values: np.ndarray
+    ):
+        self.paths = list(paths)
+        self.languages = np.asarray(languages, dtype=object)
+        self.directories = np.asarray(directories, dtype=object)
+        self.sizes = np.asarray(sizes, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(self.paths), len(METRICS))
+
+    @classmethod
+    def from_file_scores(cls, file_scores: List) -> 'FileMetricsTable':
+        """Build the table from the per-file scores of the shared file pass"""
+        values = np.array([
+            (
+                s.code_quality,
+                max(s.frameworks.values(), default=0.0),
+                s.execution.checks_passed / max(s.execution.checks_total, 1),
+                s.security,
+            )
+            for s in file_scores
+        ], dtype=np.float64)
+        return cls(
+            paths=[s.source.rel_path for s in file_scores],
+            languages=[s.source.language for s in file_scores],
+            directories=[s.source.directory for s in file_scores],
+            sizes=[s.source.size for s in file_scores],
+            values=values
+        )
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def column(self, metric: str) -> np.ndarray:
+        """Return the values of a single metric, indexed by file"""
+        return self.values[:, METRICS.index(metric)]
+
+    def means(self) -> Dict[str, float]:
+        """Unweighted mean of every metric"""
+        if not len(self):
+            return dict.fromkeys(METRICS, 0.0)
+        return self._by_metric(self.values.mean(axis=0))
+
+    def weighted_means(self) -> Dict[str, float]:
+        """Mean of every metric weighted by file size in bytes"""
+        total = self.sizes.sum()
+        if total <= 0:
+            return self.means()
+        return self._by_metric(self.sizes @ self.values / total)
+
+    def percentiles(self, q: Sequence[int] = PERCENTILES) -> Dict[str, Dict[str, float]]:
+        """Percentiles of every metric, keyed as p<q>"""
+        if not len(self):
+            return {metric: {f'p{p}': 0.0 for p in q} for metric in METRICS}
+        table = np.percentile(self.values, q, axis=0)
+        return {
+            metric: {f'p{p}': float(table[i, j]) for i, p in enumerate(q)}
+            for j, metric in enumerate(METRICS)
+        }
+
+    def rollup(self, by: str) -> Dict[str, Dict[str, float]]:
+        """Size-weighted metric means per 'language' or 'directory'"""
+        labels = self.languages if by == 'language' else self.directories
+        if not len(self):
+            return {}
+
+        groups, codes = np.unique(labels, return_inverse=True)
+        counts = np.bincount(codes, minlength=len(groups))
+        sizes = np.bincount(codes, weights=self.sizes, minlength=len(groups))
+
+        # Accumulate size-weighted and plain sums for all metrics at once
+        weighted = np.zeros((len(groups), len(METRICS)))
+        plain = np.zeros((len(groups), len(METRICS)))
+        np.add.at(weighted, codes, self.values * self.sizes[:, None])
+        np.add.at(plain, codes, self.values)
+        means = np.where(
+            sizes[:, None] > 0,
+            weighted / np.maximum(sizes, 1)[:, None],
+            plain / np.maximum(counts, 1)[:, None]
+        )
+
+        rollup = {}
+        for i, group in enumerate(groups):
+            entry = {'files': int(counts[i]), 'bytes': int(sizes[i])}
+            entry.update(self._by_metric(means[i]))
+            rollup[str(group)] = entry
+        return rollup
+
+    def breakdown(self) -> Dict:
+        """Full distribution summary returned with the report"""
+        return {
+            'files': len(self),
+            'bytes': int(self.sizes.sum()),
+            'mean': self.means(),
+            'weighted_mean': self.weighted_means(),
+            'percentiles': self.percentiles(),
+            'by_language': self.rollup('language'),
+            'by_directory': self.rollup('directory'),
+        }
+
+    @staticmethod
+    def _by_metric(row: np.ndarray) -> Dict[str, float]:
+        return {metric: float(value) for metric, value in zip(METRICS, row)}
@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import hashlib
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+NOTEBOOK_EXTENSION = '.ipynb'
+
+# Bytes read at a time; only the code cells are kept, so memory stays near this
+CHUNK_SIZE = 256 * 1024
+
+# Kernel languages whose code cells are scored as Python
+PYTHON_KERNELS = frozenset({'python', 'python2', 'python3', 'ipython', 'ipython3'})
+
+_TOKEN = re.compile(rb'[ \t\r\n]*(?:([{}\[\]:,])|(")|([^ \t\r\n{}\[\]:,"]+))')
+# Body of a string up to its closing quote, or up to the end of the buffer when it goes on
+_STRING_BODY = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+# IPython magics and shell escapes, which are not Python
+_MAGIC_LINE = re.compile(r'^([ \t]*)(?=[%!])', re.MULTILINE)
+
+@dataclass
+class Notebook:
+    """
+    Code cells of a notebook concatenated into one Python source
+    cells holds (cell index, first line) pairs, the index counting every
+    cell of the notebook and the line 1-based in code; magic and shell
+    lines are commented out so the code still parses.
+    """
+    code: str
+    content_hash: str
+    cells: List[Tuple[int, int]] = field(default_factory=list)
+    language: Optional[str] = None
+
+    def locate(self, line: int) -> Tuple[int, int]:
+        """Notebook cell index and 1-based line within that cell of a line of code"""
+        position = bisect_right([first for _, first in self.cells], line) - 1
+        if position < 0:
+            raise ValueError(f"Line {line} is outside the code cells")
+        cell, first = self.cells[position]
+        return cell, line - first + 1
+
+def read_notebook(path: str, chunk_size: int = CHUNK_SIZE) -> Notebook:
+    """Stream a notebook file, keeping only the source of its code cells"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        return parse_notebook(f, size, chunk_size)
+
+def parse_notebook(stream: BinaryIO, size: int, chunk_size: int = CHUNK_SIZE) -> Notebook:
+    """
+    Extract the code cells of nbformat 3 or 4 JSON read from a stream of size bytes
+    Strings outside cell types, cell sources and the kernel language are
+    skipped as they stream past, so base64 outputs are never held in memory.
+    The content hash is the git blob id of the whole file. Notebooks of
+    other kernels than Python yield no code. Malformed JSON raises ValueError.
+    """
+    reader = _StreamReader(stream, size, chunk_size)
+    cells: Dict[Tuple[int, ...], Dict] = {}
+    language = None
+    for path, value in reader.strings():
+        if path[:1] == ('metadata',) and path[1:] in (('kernelspec', 'language'), ('language_info', 'name')):
+            language = language or value.lower()
+            continue
+        # nbformat 4: cells[i]; nbformat 3: worksheets[w].cells[i], whose source is 'input'
+        if path[:1] == ('cells',) and len(path) >= 3:
+            key, field_name, rest = path[:2], path[2], path[3:]
+        elif path[:1] == ('worksheets',) and len(path) >= 5 and path[2] == 'cells':
+            key, field_name, rest = path[:4], path[4], path[5:]
+        else:
+            continue
+        cell = cells.setdefault(key, {'type': None, 'source': []})
+        if field_name == 'cell_type' and not rest:
+            cell['type'] = value
+        elif field_name in ('source', 'input') and len(rest) <= 1:
+            cell['source'].append(value)
+
+    content_hash = reader.digest()
+    if language is not None and language not in PYTHON_KERNELS:
+        return Notebook(code='', content_hash=content_hash, language=language)
+
+    pieces: List[str] = []
+    positions: List[Tuple[int, int]] = []
+    line = 1
+    for index, key in enumerate(sorted(cells)):
+        cell = cells[key]
+        if cell['type'] != 'code':
+            continue
+        source = ''.join(cell['source'])
+        if not source.strip():
+            continue
+        if source.lstrip().startswith('%%'):
+            # Cell magics run the whole cell as another language
+            source = re.sub(r'^', '# ', source, flags=re.MULTILINE)
+        else:
+            source = _MAGIC_LINE.sub(r'\1# ', source)
+        if not source.endswith('\n'):
+            source += '\n'
+        positions.append((index, line))
+        pieces.append(source)
+        line += source.count('\n')
+    return Notebook(code=''.join(pieces), content_hash=content_hash, cells=positions, language=language or 'python')
+
+class _StreamReader:
+    """Incremental JSON tokenizer yielding the string values wanted by a notebook, with their paths"""
+
+    def __init__(self, stream: BinaryIO, size: int, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = b''
+        self.pos = 0
+        self.eof = False
+        self._hash = hashlib.sha1(b'blob %d\0' % size)
+
+    def digest(self) -> str:
+        # Whatever follows the top-level value still belongs to the file
+        while not self.eof:
+            self._fill(keep=0)
+        return self._hash.hexdigest()
+
+    def _fill(self, keep: int) -> bool:
+        """Append the next chunk, dropping the buffer before offset keep; False at end of file"""
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self._hash.update(chunk)
+        self.buffer = self.buffer[keep:] + chunk
+        self.pos -= keep
+        return True
+
+    def strings(self):
+        # Containers as [key, expecting_key] for objects and [index] for arrays
+        stack: List[list] = []
+        while True:
+            match = _TOKEN.match(self.buffer, self.pos)
+            # A token touching the end of the buffer may go on in the next chunk
+            if match is None or match.end() == len(self.buffer):
+                if self._fill(keep=self.pos):
+                    continue
+                if match is None:
+                    if stack or self.buffer[self.pos:].strip():
+                        raise ValueError("Malformed notebook JSON")
+                    break
+            self.pos = match.end()
+            punctuation, quote, literal = match.groups()
+            if punctuation in (b'{', b'['):
+                self._value(stack)
+                stack.append([None, True] if punctuation == b'{' else [0])
+            elif punctuation in (b'}', b']'):
+                if not stack:
+                    raise ValueError("Malformed notebook JSON")
+                stack.pop()
+            elif punctuation == b',':
+                if not stack:
+                    raise ValueError("Malformed notebook JSON")
+                if len(stack[-1]) == 2:
+                    stack[-1][1] = True
+                else:
+                    stack[-1][0] += 1
+            elif quote:
+                path = self._value(stack, string=True)
+                wanted = path is not None and _wanted(path)
+                raw = self._string(keep=wanted or (bool(stack) and len(stack[-1]) == 2 and stack[-1][1]))
+                if stack and len(stack[-1]) == 2 and stack[-1][1]:
+                    stack[-1][0] = json.loads(b'"' + raw + b'"')
+                    stack[-1][1] = False
+                elif wanted:
+                    yield path, json.loads(b'"' + raw + b'"')
+            elif literal:
+                self._value(stack)
+            if not stack and self.pos >= len(self.buffer) and self.eof:
+                break
+
+    @staticmethod
+    def _value(stack: List[list], string: bool = False) -> Optional[Tuple]:
+        """Path of the value starting here, None for an object key"""
+        if stack and len(stack[-1]) == 2 and stack[-1][1]:
+            if not string:
+                raise ValueError("Malformed notebook JSON")
+            return None
+        return tuple(frame[0] for frame in stack)
+
+    def _string(self, keep: bool) -> bytes:
+        """Raw bytes of the string whose opening quote was just read; skipped strings are not kept"""
+        start = self.pos
+        while True:
+            end = _STRING_BODY.match(self.buffer, self.pos).end()
+            if end < len(self.buffer) and self.buffer[end:end + 1] == b'"':
+                self.pos = end + 1
+                return self.buffer[start:end] if keep else b''
+            # The string goes on past the buffer, possibly after a trailing backslash
+            self.pos = end
+            if not keep:
+                start = end
+            if not self._fill(keep=start):
+                raise ValueError("Unterminated string in notebook JSON")
+            start = 0
+
+def _wanted(path: Tuple) -> bool:
+    """Whether a string value is a cell type, a line of cell source or the kernel language"""
+    if path[:1] == ('metadata',):
+        return path[1:] in (('kernelspec', 'language'), ('language_info', 'name'))
+    if path[:1] == ('cells',):
+        rest = path[2:]
+    elif path[:1] == ('worksheets',) and path[2:3] == ('cells',):
+        rest = path[4:]
+    else:
+        return False
+    return rest == ('cell_type',) or rest[:1] in (('source',), ('input',)) and len(rest) <= 2
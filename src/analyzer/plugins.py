@@ -0,0 +1,246 @@
+import ast
+import asyncio
+import importlib
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Type
+from .cancellation import CancellationToken
+from .clone import open_repository
+from .import_graph import ImportGraph
+from .scanner import RepositoryScan, read_manifests, read_sources, scan_repository
+from .syntax import STRUCTURED_LANGUAGES, SyntaxTree, parse_source
+from .workspace import WorkspaceMember, discover_workspace
+
+# Entry point group third-party rule packs register their plugins under
+ENTRY_POINT_GROUP = 'chron_analyzer.plugins'
+
+# Plugins shipped with the analyzer, imported on first lookup
+BUILTIN_PLUGIN_MODULES = ('.anchor_rules',)
+
+class AnalysisContext:
+    """
+    Inputs of one analysis shared by every plugin stage
+    Inputs produced elsewhere, such as the scan CodeAnalyzer already ran,
+    are seeded by name; a seeded value may be an awaitable that resolves
+    once its producer finishes.
+    """
+
+    def __init__(self, repo_path: str, cancellation: Optional[CancellationToken] = None):
+        self.repo_path = repo_path
+        self.cancellation = cancellation or CancellationToken()
+        self.seeded: Dict[str, Any] = {}
+
+    def seed(self, name: str, value: Any):
+        self.seeded[name] = value
+
+class AnalyzerPlugin(ABC):
+    """
+    An analyzer that runs as a stage of the plugin scheduler
+    Plugins declare the inputs they need by name; the scheduler computes
+    each input once, passes them to analyze() and runs plugins whose
+    inputs are ready concurrently on worker threads, so analyze() must not
+    mutate shared inputs.
+    """
+
+    name: str = ''
+    requires: Tuple[str, ...] = ()
+
+    @abstractmethod
+    def analyze(self, inputs: Dict[str, Any]) -> Dict:
+        """Analyze the repository from the declared inputs and return a JSON-serializable result"""
+
+@dataclass
+class InputStage:
+    """How to produce a shared input from the inputs it depends on"""
+    requires: Tuple[str, ...]
+    provide: Callable[..., Any]
+
+INPUTS: Dict[str, InputStage] = {}
+
+def register_input(name: str, requires: Tuple[str, ...] = ()):
+    """Decorator registering the provider of a shared input"""
+    def decorator(provide: Callable[..., Any]) -> Callable[..., Any]:
+        INPUTS[name] = InputStage(requires, provide)
+        return provide
+    return decorator
+
+@register_input('scan')
+def provide_scan(context: AnalysisContext) -> RepositoryScan:
+    return scan_repository(context.repo_path)
+
+@register_input('files', requires=('scan',))
+def provide_files(context: AnalysisContext, scan: RepositoryScan) -> List:
+    """The file table: every source file with its language and size"""
+    return scan.files
+
+@register_input('file_pass')
+def provide_file_pass(context: AnalysisContext) -> Dict[str, str]:
+    """Contents already read by the component file pass; empty when there was none"""
+    return {}
+
+@register_input('sources', requires=('files', 'file_pass'))
+def provide_sources(context: AnalysisContext, files: List, file_pass: Dict[str, str]) -> Dict[str, str]:
+    """Decoded content of every source file, by relative path"""
+    return read_sources(files, file_pass, context.cancellation.check)
+
+@register_input('python_ast', requires=('files', 'sources'))
+def provide_python_ast(context: AnalysisContext, files: List, sources: Dict[str, str]) -> Dict[str, ast.Module]:
+    """Syntax trees of the Python files that parse"""
+    trees = {}
+    for source_file in files:
+        if source_file.language != 'python':
+            continue
+        try:
+            trees[source_file.rel_path] = ast.parse(sources[source_file.rel_path])
+        except (SyntaxError, ValueError):
+            pass
+    return trees
+
+@register_input('syntax_trees', requires=('files', 'sources'))
+def provide_syntax_trees(context: AnalysisContext, files: List, sources: Dict[str, str]) -> Dict[str, SyntaxTree]:
+    """Syntax trees of the Rust and TypeScript/JavaScript files, shared with the scoring pass"""
+    return {
+        source_file.rel_path: parse_source(source_file.language, sources[source_file.rel_path])
+        for source_file in files
+        if source_file.language in STRUCTURED_LANGUAGES
+    }
+
+@register_input('manifests', requires=('scan',))
+def provide_manifests(context: AnalysisContext, scan: RepositoryScan) -> Dict[str, str]:
+    """Content of package manifests (Cargo.toml, package.json, ...), by relative path"""
+    return read_manifests(context.repo_path, scan.manifests)
+
+@register_input('workspace', requires=('manifests',))
+def provide_workspace(context: AnalysisContext, manifests: Dict[str, str]) -> List[WorkspaceMember]:
+    """Members of a Cargo, npm/pnpm or multi-package Python workspace, empty for a single package"""
+    return discover_workspace(manifests)
+
+@register_input('import_graph', requires=('files', 'sources', 'manifests'))
+def provide_import_graph(
+    context: AnalysisContext,
+    files: List,
+    sources: Dict[str, str],
+    manifests: Dict[str, str]
+) -> ImportGraph:
+    """Module graph of Python, Rust and TypeScript imports with the detected entry points"""
+    return ImportGraph.build(files, sources, manifests)
+
+@register_input('git')
+def provide_git(context: AnalysisContext) -> Dict[str, Optional[str]]:
+    """Head commit and branch of the checkout, None outside a git repository"""
+    try:
+        repo = open_repository(context.repo_path)
+        head = repo.head.commit.hexsha
+        branch = None if repo.head.is_detached else repo.active_branch.name
+    except Exception:
+        head = branch = None
+    return {'head': head, 'branch': branch}
+
+PLUGINS: Dict[str, Type[AnalyzerPlugin]] = {}
+_discovered = False
+
+def register_plugin(plugin_class: Type[AnalyzerPlugin]) -> Type[AnalyzerPlugin]:
+    """Make a plugin available by name; usable as a class decorator"""
+    PLUGINS[plugin_class.name] = plugin_class
+    return plugin_class
+
+def discover_plugins():
+    """Import built-in plugins and the rule packs installed under ENTRY_POINT_GROUP, once"""
+    global _discovered
+    if _discovered:
+        return
+    _discovered = True
+    for module in BUILTIN_PLUGIN_MODULES:
+        importlib.import_module(module, __package__)
+
+    from importlib.metadata import entry_points
+    eps = entry_points()
+    group = eps.select(group=ENTRY_POINT_GROUP) if hasattr(eps, 'select') else eps.get(ENTRY_POINT_GROUP, ())
+    for entry_point in group:
+        try:
+            register_plugin(entry_point.load())
+        except Exception as e:
+            print(f"Error loading analyzer plugin {entry_point.name}: {e}")
+
+def load_plugins(names: Iterable[str]) -> List[AnalyzerPlugin]:
+    """Instantiate plugins by name"""
+    discover_plugins()
+    names = list(dict.fromkeys(names))
+    unknown = [name for name in names if name not in PLUGINS]
+    if unknown:
+        raise ValueError(f"Unknown analyzer plugins: {', '.join(unknown)}")
+    return [PLUGINS[name]() for name in names]
+
+class StageScheduler:
+    """
+    Runs plugins as a DAG of stages over shared inputs
+    Each input is produced at most once per analysis, as soon as the
+    inputs it depends on are ready; plugins start as soon as their own
+    inputs are ready, so independent stages run concurrently on a thread
+    pool. A failing plugin reports an error without affecting the others.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+
+    @staticmethod
+    def required_inputs(plugins: Iterable[AnalyzerPlugin]) -> Set[str]:
+        """Every input the plugins need, directly or through other inputs"""
+        required: Set[str] = set()
+        visiting: Set[str] = set()
+
+        def visit(name: str):
+            if name in required:
+                return
+            if name in visiting:
+                raise ValueError(f"Input {name} depends on itself")
+            if name not in INPUTS:
+                raise ValueError(f"Unknown analyzer input: {name}")
+            visiting.add(name)
+            for dependency in INPUTS[name].requires:
+                visit(dependency)
+            visiting.discard(name)
+            required.add(name)
+
+        for plugin in plugins:
+            for name in plugin.requires:
+                visit(name)
+        return required
+
+    async def run(self, context: AnalysisContext, plugins: List[AnalyzerPlugin]) -> Dict[str, Dict]:
+        """Run the plugins and return their results by plugin name"""
+        self.required_inputs(plugins)
+        loop = asyncio.get_running_loop()
+        stages: Dict[str, asyncio.Task] = {}
+
+        async def produce(name: str) -> Any:
+            if name in context.seeded:
+                value = context.seeded[name]
+                return await value if asyncio.isfuture(value) or asyncio.iscoroutine(value) else value
+            stage = INPUTS[name]
+            values = await asyncio.gather(*(stage_task(dependency) for dependency in stage.requires))
+            context.cancellation.check()
+            return await loop.run_in_executor(executor, stage.provide, context, *values)
+
+        def stage_task(name: str) -> asyncio.Task:
+            if name not in stages:
+                stages[name] = asyncio.ensure_future(produce(name))
+            return stages[name]
+
+        async def run_plugin(plugin: AnalyzerPlugin) -> Dict:
+            try:
+                values = await asyncio.gather(*(stage_task(name) for name in plugin.requires))
+                context.cancellation.check()
+                return await loop.run_in_executor(
+                    executor, plugin.analyze, dict(zip(plugin.requires, values))
+                )
+            except Exception as e:
+                print(f"Analyzer plugin {plugin.name} failed: {e}")
+                return {'error': str(e)}
+
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix='analyzer-plugin') as executor:
+            results = await asyncio.gather(*(run_plugin(plugin) for plugin in plugins))
+            # Retrieve inputs no plugin awaited to completion, e.g. after a failure
+            await asyncio.gather(*stages.values(), return_exceptions=True)
+        return {plugin.name: result for plugin, result in zip(plugins, results)}
@@ -0,0 +1,82 @@
+import re
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Set
+
+if TYPE_CHECKING:
+    from .memory import MemoryTracker
+
+CLONE_PROGRESS = re.compile(
+    r'^(?P<phase>[A-Za-z ]+):\s+(?P<percent>\d+)% \((?P<done>\d+)/(?P<total>\d+)\)'
+    r'(?:, (?P<size>[\d.]+) (?P<unit>bytes|KiB|MiB|GiB))?'
+)
+
+UNIT_BYTES = {'bytes': 1, 'KiB': 1024, 'MiB': 1024 ** 2, 'GiB': 1024 ** 3}
+
+def parse_clone_progress(line: str) -> Optional[Dict]:
+    """Fields of a git clone --progress line, e.g. 'Receiving objects:  45% (450/1000), 1.20 MiB'"""
+    match = CLONE_PROGRESS.match(line.strip())
+    if match is None:
+        return None
+    fields = {
+        'phase': match.group('phase').strip(),
+        'percent': int(match.group('percent')),
+        'objects': int(match.group('done')),
+        'objects_total': int(match.group('total')),
+    }
+    if match.group('size'):
+        fields['bytes_received'] = int(float(match.group('size')) * UNIT_BYTES[match.group('unit')])
+    return fields
+
+class AnalysisProgress:
+    """
+    Progress events of one analysis, passed to a callback as plain dicts
+    Every event has an 'event' name: 'stage' marks a stage starting or
+    finishing, 'clone' carries transfer progress, 'discovered' the files
+    found by the scan and 'scanned' the files scored so far with interim
+    component scores. Frequent events are throttled to one per interval.
+    A memory tracker, when attached, sees every event even without a callback.
+    """
+
+    def __init__(self, callback: Optional[Callable[[Dict], None]] = None, interval: float = 0.5):
+        self.callback = callback
+        self.interval = interval
+        self._last: Dict[str, float] = {}
+        self._finished_phases: Set[str] = set()
+        self.memory: Optional['MemoryTracker'] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.callback is not None
+
+    def emit(self, event: str, **fields):
+        if self.memory is not None:
+            self.memory.event(event, fields)
+        if self.callback is not None:
+            self.callback(dict(fields, event=event))
+
+    def stage(self, name: str, status: str, **fields):
+        self.emit('stage', stage=name, status=status, **fields)
+
+    def due(self, event: str) -> bool:
+        """Whether a throttled event may be emitted now; claims the slot when it may"""
+        if self.callback is None:
+            return False
+        now = time.monotonic()
+        if now - self._last.get(event, float('-inf')) < self.interval:
+            return False
+        self._last[event] = now
+        return True
+
+    def clone_line(self, line: str):
+        """Report a git progress line, throttled except at phase completion"""
+        fields = parse_clone_progress(line)
+        if fields is None:
+            return
+        if fields['percent'] == 100:
+            # git repeats the final line of a phase with ", done."
+            if fields['phase'] in self._finished_phases:
+                return
+            self._finished_phases.add(fields['phase'])
+        elif not self.due('clone'):
+            return
+        self.emit('clone', **fields)
@@ -1,48 +1,165 @@
-from typing import Dict, List
+import os
+import json
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from dataclasses import dataclass
-from .code_analyzer import AnalysisResult
+from .result_store import score_band
+
+if TYPE_CHECKING:
+    from .code_analyzer import AnalysisResult
+
+# Version of the structured JSON emitted next to markdown reports
+REPORT_SCHEMA_VERSION = 1
+
+COMPONENT_LABELS = {
+    'code_quality': 'Code Quality',
+    'ai_framework': 'AI Framework Integration',
+    'execution': 'Execution Verification',
+    'security': 'Security',
+}
 
 @dataclass
 class Report:
-    overall_score: float
+    # None when the analysis evaluated only some components
+    overall_score: Optional[float]
     detailed_scores: Dict[str, float]
     issues: List[Dict]
     recommendations: List[str]
+    confidence_intervals: Optional[Dict[str, Tuple[float, float]]] = None
+    breakdown: Optional[Dict] = None
+    overlap_percentage: Optional[float] = None
+    overlapping_repositories: Optional[Dict[str, int]] = None
+    truncated: bool = False
+    truncation_reason: Optional[str] = None
+    plugins: Optional[Dict[str, Dict]] = None
+    signature_version: Optional[str] = None
+    reachability: Optional[Dict] = None
+    workspace: Optional[Dict] = None
+    secret_history: Optional[Dict] = None
+    memory: Optional[Dict] = None
 
 class ReportGenerator:
     """Generates analysis reports in various formats"""
     
-    def __init__(self, analysis_result: AnalysisResult):
+    def __init__(self, analysis_result: 'AnalysisResult', repo_url: Optional[str] = None):
         self.result = analysis_result
+        self.repo_url = repo_url
         
     def generate_summary(self) -> Report:
         """Generate a summary report"""
-        overall_score = self._calculate_overall_score()
+        complete = len(self.result.components) == len(COMPONENT_LABELS)
+        overall_score = self.result.calculate_overall_score() if complete else None
         
         return Report(
             overall_score=overall_score,
             detailed_scores={
-                'Code Quality': self.result.code_quality_score,
-                'AI Framework Integration': self.result.ai_framework_score,
-                'Execution Verification': self.result.execution_score,
-                'Security': self.result.security_score
+                COMPONENT_LABELS[component]: getattr(self.result, f'{component}_score')
+                for component in self.result.components
             },
             issues=self.result.issues,
-            recommendations=self.result.recommendations
+            recommendations=self.result.recommendations,
+            confidence_intervals=self._label_intervals(),
+            breakdown=self.result.breakdown,
+            overlap_percentage=self.result.overlap_percentage,
+            overlapping_repositories=self.result.overlapping_repositories,
+            truncated=self.result.truncated,
+            truncation_reason=self.result.truncation_reason,
+            plugins=self.result.plugin_results,
+            signature_version=self.result.signature_version,
+            reachability=self.result.reachability,
+            workspace=self.result.workspace,
+            secret_history=self.result.secret_history,
+            memory=self.result.memory
         )
         
-    def _calculate_overall_score(self) -> float:
-        """Calculate the overall project score"""
-        weights = {
-            'code_quality': 0.2,
-            'ai_framework': 0.3,
-            'execution': 0.4,
-            'security': 0.1
+    def to_dict(self, project: Optional[str] = None) -> Dict:
+        """
+        Structured form of the report, consumed by the batch article renderer
+        Component scores are on the 0-1 scale; the overall score uses the
+        30/30/30/10 weighting of the published reports. Components the
+        analysis did not evaluate are left out, and so is the overall score.
+        """
+        scores = {
+            component: getattr(self.result, f'{component}_score')
+            for component in self.result.components
+        }
+        complete = len(scores) == len(COMPONENT_LABELS)
+        overall_score = self.result.calculate_overall_score() if complete else None
+        return {
+            'schema_version': REPORT_SCHEMA_VERSION,
+            'project': project,
+            'repo_url': self.repo_url,
+            'scores': scores,
+            'bands': {component: score_band(score) for component, score in scores.items()},
+            'overall_score': overall_score,
+            'overall_band': score_band(overall_score) if complete else None,
+            'files_analyzed': self.result.files_analyzed,
+            'files_total': self.result.files_total,
+            'confidence_intervals': self.result.confidence_intervals,
+            'issues': self.result.issues,
+            'recommendations': self.result.recommendations,
+            'breakdown': self.result.breakdown,
+            'overlap_percentage': self.result.overlap_percentage,
+            'overlapping_repositories': self.result.overlapping_repositories,
+            'truncated': self.result.truncated,
+            'truncation_reason': self.result.truncation_reason,
+            'plugins': self.result.plugin_results,
+            'signature_version': self.result.signature_version,
+            'reachability': self.result.reachability,
+            'workspace': self.result.workspace,
+            'secret_history': self.result.secret_history,
+            'memory': self.result.memory,
         }
         
-        return (
-            weights['code_quality'] * self.result.code_quality_score +
-            weights['ai_framework'] * self.result.ai_framework_score +
-            weights['execution'] * self.result.execution_score +
-            weights['security'] * self.result.security_score
-        )
+    def generate_markdown(self, project: str) -> str:
+        """Generate the markdown score section of an analysis report"""
+        data = self.to_dict(project)
+        lines = [
+            f"# {project} Analysis Report",
+            "",
+            "## Chron AI Analysis Scores",
+            "",
+        ]
+        for component, label in COMPONENT_LABELS.items():
+            if component in data['scores']:
+                lines.append(f"- **{label} Score**: {data['scores'][component]:.2f} ({data['bands'][component]})")
+        if data['overall_score'] is not None:
+            lines.append(f"- **Overall Score**: {data['overall_score']:.2f} ({data['overall_band']})")
+            lines.append("  (Weighted average: 30% AI Framework, 30% Code Quality, 30% Execution, 10% Security)")
+        if data['truncated']:
+            lines.extend(["", (
+                f"> Partial analysis ({data['truncation_reason']}): "
+                f"{data['files_analyzed']} of {data['files_total']} files scored"
+            )])
+
+        if data['issues']:
+            lines.extend(["", "## Issues", ""])
+            lines.extend(f"- {issue}" for issue in data['issues'])
+        if data['recommendations']:
+            lines.extend(["", "## Recommendations", ""])
+            lines.extend(f"- {rec}" for rec in data['recommendations'])
+        return "\n".join(lines) + "\n"
+        
+    def save(self, output_dir: str, project: str) -> Tuple[str, str]:
+        """Write <project>_analysis_report.md and its structured .json twin"""
+        base = os.path.join(output_dir, f"{project}_analysis_report")
+        json_path = self.save_json(output_dir, project)
+        with open(f"{base}.md", 'w') as f:
+            f.write(self.generate_markdown(project))
+        return f"{base}.md", json_path
+        
+    def save_json(self, output_dir: str, project: str) -> str:
+        """Write only <project>_analysis_report.json, leaving a written-up markdown report in place"""
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"{project}_analysis_report.json")
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(project), f, indent=2)
+        return path
+        
+    def _label_intervals(self) -> Optional[Dict[str, Tuple[float, float]]]:
+        """Key sampled confidence intervals by their report labels"""
+        if self.result.confidence_intervals is None:
+            return None
+        return {
+            COMPONENT_LABELS[component]: interval
+            for component, interval in self.result.confidence_intervals.items()
+        }
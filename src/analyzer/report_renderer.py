@@ -0,0 +1,273 @@
+import os
+import re
+import glob
+import json
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from .result_store import score_band
+
+# Placeholders look like {ai_score} or {ai_score:>5}; any other brace is literal,
+# so templates can embed code samples without escaping
+PLACEHOLDER = re.compile(r'\{([a-z][a-z0-9_]*)(?::([^{}\n]*))?\}')
+
+COMPONENT_FIELDS = {
+    'ai_framework': 'ai_score',
+    'code_quality': 'code_score',
+    'execution': 'exec_score',
+    'security': 'security_score',
+}
+
+# Shown in place of the score and band of a component or overall score that was not evaluated
+NOT_EVALUATED = 'n/a'
+
+# Score lines of markdown reports, written by hand ("**AI Framework Score**: 8.3/10")
+# or by ReportGenerator ("**AI Framework Integration Score**: 0.83 (Strong)")
+MARKDOWN_SCORE = re.compile(
+    r'^- \*\*(AI Framework|Code Quality|Execution|Security|Overall)(?: Integration| Verification)? Score\*\*: '
+    r'(\d+(?:\.\d+)?)(/10)?',
+    re.MULTILINE
+)
+
+MARKDOWN_COMPONENTS = {
+    'AI Framework': 'ai_framework',
+    'Code Quality': 'code_quality',
+    'Execution': 'execution',
+    'Security': 'security',
+}
+
+# Templates named like a project's article that receive the fields of every project
+COMBINED_TEMPLATES = ('comparative_article.md',)
+
+class CompiledTemplate:
+    """A template split once into literal text and placeholder slots"""
+
+    def __init__(self, source: str, name: str = '<template>'):
+        self.name = name
+        self._parts: List[Union[str, Tuple[str, str]]] = []
+        position = 0
+        for match in PLACEHOLDER.finditer(source):
+            if match.start() > position:
+                self._parts.append(source[position:match.start()])
+            self._parts.append((match.group(1), match.group(2) or ''))
+            position = match.end()
+        if position < len(source):
+            self._parts.append(source[position:])
+
+    @property
+    def fields(self) -> List[str]:
+        return [part[0] for part in self._parts if isinstance(part, tuple)]
+
+    def render(self, context: Dict[str, object]) -> str:
+        """Fill every placeholder; unknown fields are left in place"""
+        out = []
+        for part in self._parts:
+            if isinstance(part, str):
+                out.append(part)
+                continue
+            name, spec = part
+            if name in context:
+                out.append(format(context[name], spec))
+            else:
+                out.append('{' + name + (':' + spec if spec else '') + '}')
+        return ''.join(out)
+
+def points(score: Optional[float]) -> str:
+    """A 0-1 score on the 10-point scale of the articles, n/a when not evaluated"""
+    return NOT_EVALUATED if score is None else f"{10 * score:.1f}"
+
+def article_context(data: Dict) -> Dict[str, object]:
+    """
+    Template fields for one project, on the 10-point scale of the articles
+    Components a partial analysis did not evaluate, and its overall score,
+    render as n/a.
+    """
+    context: Dict[str, object] = {
+        'project': data.get('project') or '',
+        'repo_url': data.get('repo_url') or '',
+        'overall_score': points(data.get('overall_score')),
+        'overall_band': data.get('overall_band') or NOT_EVALUATED,
+    }
+    for component, name in COMPONENT_FIELDS.items():
+        context[name] = points(data['scores'].get(component))
+        context[name.replace('_score', '_band')] = data['bands'].get(component) or NOT_EVALUATED
+    return context
+
+def structured_from_stored(stored) -> Dict:
+    """Structured report data for a StoredResult from the result store"""
+    scores = {
+        component: score for component, score in (
+            ('code_quality', stored.code_quality_score),
+            ('ai_framework', stored.ai_framework_score),
+            ('execution', stored.execution_score),
+            ('security', stored.security_score),
+        ) if score is not None
+    }
+    return {
+        'project': stored.repo_url.rstrip('/').split('/')[-1],
+        'repo_url': stored.repo_url,
+        'scores': scores,
+        'bands': {component: score_band(score) for component, score in scores.items()},
+        'overall_score': stored.overall_score,
+        'overall_band': score_band(stored.overall_score),
+    }
+
+def structured_from_markdown(project: str, content: str) -> Optional[Dict]:
+    """
+    Structured report data from the score lines of a markdown report, None without any
+    Scores on the 10-point scale are brought back to 0-1. A report without
+    an overall score gets the 30/30/30/10 average of its components.
+    """
+    scores: Dict[str, float] = {}
+    overall_score = None
+    for match in MARKDOWN_SCORE.finditer(content):
+        value = float(match.group(2)) / (10 if match.group(3) else 1)
+        if match.group(1) == 'Overall':
+            overall_score = value
+        else:
+            scores.setdefault(MARKDOWN_COMPONENTS[match.group(1)], value)
+    if not scores:
+        return None
+    if overall_score is None and len(scores) == len(MARKDOWN_COMPONENTS):
+        from .code_analyzer import OVERALL_WEIGHTS  # Deferred: rendering needs no analyzer otherwise
+        overall_score = sum(weight * scores[component] for component, weight in OVERALL_WEIGHTS.items())
+    return {
+        'project': project,
+        'repo_url': None,
+        'scores': scores,
+        'bands': {component: score_band(score) for component, score in scores.items()},
+        'overall_score': overall_score,
+        'overall_band': score_band(overall_score) if overall_score is not None else None,
+    }
+
+def load_structured_results(report_dir: str) -> Dict[str, Dict]:
+    """
+    Load every <project>_analysis_report.json in a directory, keyed by project
+    Projects with only a markdown report are read from its score lines.
+    """
+    results = {}
+    for path in sorted(glob.glob(os.path.join(report_dir, '*_analysis_report.json'))):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        project = data.get('project') or os.path.basename(path)[:-len('_analysis_report.json')]
+        results[project] = data
+    for path in sorted(glob.glob(os.path.join(report_dir, '*_analysis_report.md'))):
+        project = os.path.basename(path)[:-len('_analysis_report.md')]
+        if project in results or os.path.exists(path[:-len('.md')] + '.json'):
+            continue
+        with open(path, 'r') as f:
+            data = structured_from_markdown(project, f.read())
+        if data is not None:
+            results[project] = data
+    return results
+
+def template_project(name: str) -> Optional[str]:
+    """Project whose fields a template receives, None for templates receiving every project's"""
+    if not name.endswith('_article.md') or name in COMBINED_TEMPLATES:
+        return None
+    return name[:-len('_article.md')]
+
+class ArticleRenderer:
+    """
+    Renders article templates from structured results in one batch
+    Templates are read and compiled once per renderer; <project>_article.md
+    templates receive that project's fields, any other template, and the
+    comparative article, receives the fields of every project prefixed with
+    '<project>_'
+    """
+
+    def __init__(self, template_dir: str):
+        self.template_dir = template_dir
+        self.templates: Dict[str, CompiledTemplate] = {}
+        for path in sorted(glob.glob(os.path.join(template_dir, '*.md'))):
+            with open(path, 'r') as f:
+                name = os.path.basename(path)
+                self.templates[name] = CompiledTemplate(f.read(), name)
+
+    def render_all(self, results: Dict[str, Dict], comparative: Optional[str] = None) -> Dict[str, str]:
+        """Render every template whose inputs are available, keyed by output file name"""
+        contexts = {project: article_context(data) for project, data in results.items()}
+        combined = {
+            f'{project}_{key}': value
+            for project, context in contexts.items()
+            for key, value in context.items()
+        }
+
+        rendered = {}
+        for name, template in self.templates.items():
+            project = template_project(name)
+            if project is not None and project in contexts:
+                rendered[name] = template.render(contexts[project])
+            elif project is None and not self.missing_fields(name, results):
+                rendered[name] = template.render(combined)
+        if comparative is not None:
+            rendered[comparative] = render_comparative(results.values())
+        return rendered
+
+    def missing_fields(self, name: str, results: Dict[str, Dict]) -> List[str]:
+        """Fields of a template receiving every project's fields that the results cannot fill; such templates are not rendered"""
+        if template_project(name) is not None:
+            return []
+        keys = {f'{project}_{key}' for project, data in results.items() for key in article_context(data)}
+        return [field for field in self.templates[name].fields if field not in keys]
+
+    def write_all(self, results: Dict[str, Dict], output_dir: str, comparative: Optional[str] = None) -> List[str]:
+        """Render the batch and write it to output_dir"""
+        os.makedirs(output_dir, exist_ok=True)
+        written = []
+        for name, content in self.render_all(results, comparative).items():
+            path = os.path.join(output_dir, name)
+            with open(path, 'w') as f:
+                f.write(content)
+            written.append(path)
+        return written
+
+def render_comparative(results: Iterable[Dict]) -> str:
+    """
+    Render the comparative report from structured results, best first
+    Results without an overall score (partial analyses) are listed last, and
+    only results that evaluated a component are ranked on it.
+    """
+    ranked = sorted(
+        results, key=lambda data: (data.get('overall_score') is not None, data.get('overall_score') or 0), reverse=True
+    )
+    labels = [
+        ('ai_framework', 'AI Framework'),
+        ('code_quality', 'Code Quality'),
+        ('execution', 'Execution'),
+        ('security', 'Security'),
+    ]
+    lines = [
+        "# Comparative Analysis of AI Projects",
+        f"*A comparison of {len(ranked)} analyzed projects*",
+        "",
+        "## Overview",
+        "",
+        "Scores come from Chron AI's standardized evaluation framework with 30/30/30/10 "
+        "weight distribution across AI Framework, Code Quality, Execution, and Security metrics.",
+        "",
+        "## Project Scores Summary",
+        "",
+    ]
+    for data in ranked:
+        lines.append(f"### {data.get('project') or data.get('repo_url')}")
+        for component, label in labels:
+            lines.append(f"- {label}: {_scored(data['scores'].get(component), data['bands'].get(component))}")
+        lines.append(f"- Overall: {_scored(data.get('overall_score'), data.get('overall_band'))}")
+        lines.append("")
+
+    lines.extend(["## Rankings", ""])
+    for component, label in labels:
+        lines.extend([f"### {label}", ""])
+        evaluated = [data for data in ranked if data['scores'].get(component) is not None]
+        by_component = sorted(evaluated, key=lambda data: data['scores'][component], reverse=True)
+        for rank, data in enumerate(by_component, 1):
+            name = data.get('project') or data.get('repo_url')
+            lines.append(f"{rank}. **{name}** ({points(data['scores'][component])}/10)")
+        lines.append("")
+
+    return "\n".join(lines)
+
+def _scored(score: Optional[float], band: Optional[str]) -> str:
+    """A score with its band for the comparative summary"""
+    if score is None:
+        return NOT_EVALUATED
+    return f"{points(score)}/10 ({band})"
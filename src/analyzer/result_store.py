@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .code_analyzer import AnalysisResult
+
+DEFAULT_DATA_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'chron-ai')
+
+# Score columns that can be ranked and filtered on
+SCORE_COLUMNS = {
+    'overall': 'overall_score',
+    'code_quality': 'code_quality_score',
+    'ai_framework': 'ai_framework_score',
+    'execution': 'execution_score',
+    'security': 'security_score',
+}
+
+# Lower bound of each score band on the 0-1 scale, as used in the published reports
+SCORE_BANDS: Tuple[Tuple[str, float], ...] = (
+    ('Exceptional', 0.9),
+    ('Strong', 0.75),
+    ('Good', 0.6),
+    ('Fair', 0.4),
+    ('Limited', 0.0),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    repo_url TEXT NOT NULL,
+    commit_sha TEXT,
+    analyzed_at REAL NOT NULL,
+    is_latest INTEGER NOT NULL DEFAULT 1,
+    overall_score REAL NOT NULL,
+    code_quality_score REAL NOT NULL,
+    ai_framework_score REAL NOT NULL,
+    execution_score REAL NOT NULL,
+    security_score REAL NOT NULL,
+    files_analyzed INTEGER NOT NULL DEFAULT 0,
+    files_total INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_results_repo_time ON results (repo_url, analyzed_at DESC);
+CREATE INDEX IF NOT EXISTS idx_results_repo_commit ON results (repo_url, commit_sha);
+CREATE INDEX IF NOT EXISTS idx_latest_overall ON results (overall_score DESC) WHERE is_latest = 1;
+CREATE INDEX IF NOT EXISTS idx_latest_code_quality ON results (code_quality_score DESC) WHERE is_latest = 1;
+CREATE INDEX IF NOT EXISTS idx_latest_ai_framework ON results (ai_framework_score DESC) WHERE is_latest = 1;
+CREATE INDEX IF NOT EXISTS idx_latest_execution ON results (execution_score DESC) WHERE is_latest = 1;
+CREATE INDEX IF NOT EXISTS idx_latest_security ON results (security_score DESC) WHERE is_latest = 1;
+"""
+
+def default_data_path(name: str) -> str:
+    """Location of a local data file, under CHRON_DATA_DIR when it is set"""
+    return os.path.join(os.environ.get('CHRON_DATA_DIR', DEFAULT_DATA_DIR), name)
+
+def score_band(score: float) -> str:
+    """Name of the band a 0-1 score falls into"""
+    for band, lower in SCORE_BANDS:
+        if score >= lower:
+            return band
+    return SCORE_BANDS[-1][0]
+
+def band_range(band: str) -> Tuple[float, float]:
+    """Half-open [low, high) score range of a band"""
+    upper = float('inf')
+    for name, lower in SCORE_BANDS:
+        if name.lower() == band.lower():
+            return lower, upper
+        upper = lower
+    raise ValueError(f"Unknown score band: {band}")
+
+@dataclass
+class StoredResult:
+    """A persisted analysis result"""
+    id: int
+    repo_url: str
+    commit_sha: Optional[str]
+    analyzed_at: float
+    overall_score: float
+    code_quality_score: float
+    ai_framework_score: float
+    execution_score: float
+    security_score: float
+    files_analyzed: int
+    files_total: int
+    payload: Dict = field(default_factory=dict)
+
+    @property
+    def band(self) -> str:
+        return score_band(self.overall_score)
+
+    def to_analysis_result(self) -> 'AnalysisResult':
+        """Rebuild the analysis result this was saved from, for serving it again"""
+        from .code_analyzer import AnalysisResult  # Deferred: the store is used without the analyzer
+        names = {f.name for f in fields(AnalysisResult)}
+        return AnalysisResult(
+            code_quality_score=self.code_quality_score,
+            ai_framework_score=self.ai_framework_score,
+            execution_score=self.execution_score,
+            security_score=self.security_score,
+            files_analyzed=self.files_analyzed,
+            files_total=self.files_total,
+            **{key: value for key, value in self.payload.items() if key in names}
+        )
+
+class ResultStore:
+    """Indexed SQLite store of analysis results for leaderboards and history"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or default_data_path('results.db')
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(
+        self,
+        repo_url: str,
+        result: 'AnalysisResult',
+        commit_sha: Optional[str] = None,
+        analyzed_at: Optional[float] = None
+    ) -> int:
+        """Persist a result and mark it as the latest for its repository"""
+        payload = {
+            'issues': result.issues,
+            'recommendations': result.recommendations,
+            'confidence_intervals': result.confidence_intervals,
+            'breakdown': result.breakdown,
+            'overlap_percentage': result.overlap_percentage,
+            'overlapping_repositories': result.overlapping_repositories,
+            'plugin_results': result.plugin_results,
+            'signature_version': result.signature_version,
+            'reachability': result.reachability,
+            'workspace': result.workspace,
+            'secret_history': result.secret_history,
+        }
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE results SET is_latest = 0 WHERE repo_url = ? AND is_latest = 1',
+                (repo_url,)
+            )
+            cursor = conn.execute(
+                """
+                INSERT INTO results (
+                    repo_url, commit_sha, analyzed_at, is_latest, overall_score,
+                    code_quality_score, ai_framework_score, execution_score, security_score,
+                    files_analyzed, files_total, payload
+                ) VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    repo_url, commit_sha, analyzed_at or time.time(),
+                    result.calculate_overall_score(),
+                    result.code_quality_score, result.ai_framework_score,
+                    result.execution_score, result.security_score,
+                    result.files_analyzed, result.files_total, json.dumps(payload)
+                )
+            )
+            return cursor.lastrowid
+
+    def latest(self, repo_url: str) -> Optional[StoredResult]:
+        """Most recent result for a repository"""
+        rows = self._select('WHERE repo_url = ? AND is_latest = 1', (repo_url,))
+        return rows[0] if rows else None
+
+    def find(self, repo_url: str, commit_sha: str) -> Optional[StoredResult]:
+        """Most recent result for a repository at a given commit"""
+        rows = self._select(
+            'WHERE repo_url = ? AND commit_sha = ? ORDER BY analyzed_at DESC LIMIT 1',
+            (repo_url, commit_sha)
+        )
+        return rows[0] if rows else None
+
+    def history(self, repo_url: str, limit: int = 100) -> List[StoredResult]:
+        """Results for a repository, newest first"""
+        return self._select('WHERE repo_url = ? ORDER BY analyzed_at DESC LIMIT ?', (repo_url, limit))
+
+    def top(self, n: int = 10, component: str = 'overall') -> List[StoredResult]:
+        """Highest scoring repositories by their latest result"""
+        column = self._column(component)
+        return self._select(f'WHERE is_latest = 1 ORDER BY {column} DESC LIMIT ?', (n,))
+
+    def query(
+        self,
+        component: str = 'overall',
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+        band: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> List[StoredResult]:
+        """Latest results filtered by score range or band, highest first"""
+        column = self._column(component)
+        clauses, params = ['is_latest = 1'], []
+        if band is not None:
+            low, high = band_range(band)
+            clauses.append(f'{column} >= ?')
+            params.append(low)
+            if high != float('inf'):
+                clauses.append(f'{column} < ?')
+                params.append(high)
+        if min_score is not None:
+            clauses.append(f'{column} >= ?')
+            params.append(min_score)
+        if max_score is not None:
+            clauses.append(f'{column} <= ?')
+            params.append(max_score)
+        sql = f"WHERE {' AND '.join(clauses)} ORDER BY {column} DESC LIMIT ? OFFSET ?"
+        return self._select(sql, tuple(params) + (limit, offset))
+
+    def _select(self, where: str, params: tuple) -> List[StoredResult]:
+        with self._connect() as conn:
+            rows = conn.execute(f'SELECT * FROM results {where}', params).fetchall()
+        return [
+            StoredResult(**{
+                key: (json.loads(row[key]) if key == 'payload' else row[key])
+                for key in row.keys() if key != 'is_latest'
+            })
+            for row in rows
+        ]
+
+    @staticmethod
+    def _column(component: str) -> str:
+        if component not in SCORE_COLUMNS:
+            raise ValueError(f"Unknown score component: {component}")
+        return SCORE_COLUMNS[component]
@@ -0,0 +1,103 @@
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+from .scanner import SourceFile
+
+T = TypeVar('T')
+
+@dataclass
+class AnalysisBudget:
+    """Thresholds above which a repository is analyzed from a sample"""
+    max_files: int = 2000
+    max_bytes: int = 50 * 1024 * 1024
+    sample_size: int = 400
+    confidence: float = 0.95
+    max_interval_width: float = 0.2
+    bootstrap_rounds: int = 200
+    seed: Optional[int] = None
+
+    def exceeded_by(self, files: Sequence[SourceFile]) -> bool:
+        """Check whether a scanned file set is too large for a full analysis"""
+        return (
+            len(files) > self.max_files or
+            sum(f.size for f in files) > self.max_bytes
+        )
+
+def stratum_key(source_file: SourceFile) -> Tuple[str, str]:
+    """Stratify files by language and top-level directory"""
+    return (source_file.language, source_file.directory)
+
+def stratified_sample(
+    files: Sequence[SourceFile],
+    sample_size: int,
+    rng: random.Random
+) -> List[SourceFile]:
+    """
+    Draw a sample allocated to each stratum in proportion to its size
+    Every stratum contributes at least one file while the sample has room;
+    those files come out of the largest strata, so the sample never holds
+    more than sample_size files.
+    """
+    if sample_size >= len(files):
+        return list(files)
+
+    strata: Dict[Tuple[str, str], List[SourceFile]] = {}
+    for source_file in files:
+        strata.setdefault(stratum_key(source_file), []).append(source_file)
+
+    # Largest-remainder allocation, with a floor of one file per stratum
+    quotas = {
+        key: sample_size * len(members) / len(files)
+        for key, members in strata.items()
+    }
+    allocation = {key: int(quota) for key, quota in quotas.items()}
+    if len(strata) <= sample_size:
+        for key in allocation:
+            allocation[key] = max(1, allocation[key])
+    # The floor is paid for by the strata with the largest allocations
+    surplus = sum(allocation.values()) - sample_size
+    while surplus > 0:
+        largest = max(allocation, key=lambda key: (allocation[key], key))
+        allocation[largest] -= 1
+        surplus -= 1
+    remaining = sample_size - sum(allocation.values())
+    by_remainder = sorted(quotas, key=lambda key: quotas[key] - int(quotas[key]), reverse=True)
+    for key in by_remainder:
+        if remaining <= 0:
+            break
+        if allocation[key] < len(strata[key]):
+            allocation[key] += 1
+            remaining -= 1
+
+    sample = []
+    for key in sorted(strata):
+        sample.extend(rng.sample(strata[key], min(allocation[key], len(strata[key]))))
+    return sample
+
+def bootstrap_intervals(
+    groups: Dict[Tuple[str, str], List[T]],
+    aggregate: Callable[[List[T]], Dict[str, float]],
+    rounds: int,
+    confidence: float,
+    rng: random.Random
+) -> Dict[str, Tuple[float, float]]:
+    """
+    Estimate percentile confidence intervals for each aggregated score
+    Records are resampled within their stratum so the allocation is preserved
+    """
+    estimates: Dict[str, List[float]] = {}
+    for _ in range(rounds):
+        resample = []
+        for members in groups.values():
+            resample.extend(rng.choices(members, k=len(members)))
+        for name, value in aggregate(resample).items():
+            estimates.setdefault(name, []).append(value)
+
+    alpha = (1 - confidence) / 2
+    intervals = {}
+    for name, values in estimates.items():
+        values.sort()
+        low = values[int(alpha * (len(values) - 1))]
+        high = values[int(round((1 - alpha) * (len(values) - 1)))]
+        intervals[name] = (low, high)
+    return intervals
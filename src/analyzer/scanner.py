@@ -0,0 +1,121 @@
+import os
+import hashlib
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+LANGUAGE_EXTENSIONS: Dict[str, str] = {
+    '.py': 'python',
+    '.rs': 'rust',
+    '.ts': 'typescript',
+    '.tsx': 'typescript',
+    '.js': 'typescript',
+    '.jsx': 'typescript',
+    # Notebooks are scored through the Python source of their code cells
+    '.ipynb': 'python',
+}
+
+SOURCE_EXTENSIONS: Tuple[str, ...] = tuple(LANGUAGE_EXTENSIONS)
+
+# Package manifests picked up by the same walk
+MANIFEST_NAMES = frozenset({
+    'Cargo.toml', 'Anchor.toml', 'package.json', 'pnpm-workspace.yaml', 'pyproject.toml', 'setup.py',
+    'requirements.txt',
+})
+
+@dataclass
+class SourceFile:
+    """A source file discovered by the repository scan"""
+    path: str
+    rel_path: str
+    language: str
+    size: int
+
+    @property
+    def directory(self) -> str:
+        """Top-level directory of the file, '.' for files at the repository root"""
+        parts = self.rel_path.split('/')
+        return parts[0] if len(parts) > 1 else '.'
+
+    @property
+    def is_notebook(self) -> bool:
+        return self.rel_path.endswith('.ipynb')
+
+@dataclass
+class RepositoryScan:
+    """Source files and package manifests found by one walk of a repository"""
+    files: List[SourceFile]
+    manifests: List[str]
+
+def scan_repository(repo_path: str) -> RepositoryScan:
+    """Walk the repository once, collecting source files and manifests in a stable order"""
+    source_files = []
+    manifests = []
+
+    for root, dirs, files in os.walk(repo_path):
+        dirs[:] = sorted(d for d in dirs if d != '.git')
+        for file in sorted(files):
+            if file in MANIFEST_NAMES:
+                manifests.append(os.path.relpath(os.path.join(root, file), repo_path).replace(os.sep, '/'))
+            language = LANGUAGE_EXTENSIONS.get(os.path.splitext(file)[1])
+            if language is None:
+                continue
+
+            file_path = os.path.join(root, file)
+            try:
+                size = os.path.getsize(file_path)
+            except OSError:
+                continue
+            rel_path = os.path.relpath(file_path, repo_path).replace(os.sep, '/')
+            source_files.append(SourceFile(file_path, rel_path, language, size))
+
+    return RepositoryScan(source_files, manifests)
+
+def scan_source_files(repo_path: str) -> List[SourceFile]:
+    """Walk the repository once and return its source files in a stable order"""
+    return scan_repository(repo_path).files
+
+def read_sources(
+    files: List[SourceFile],
+    known: Dict[str, str],
+    check: Optional[Callable[[], None]] = None
+) -> Dict[str, str]:
+    """Decoded content of every file by relative path, reading only those not already known"""
+    sources = {}
+    for source_file in files:
+        content = known.get(source_file.rel_path)
+        if content is None:
+            if check is not None:
+                check()
+            try:
+                content = read_source_text(source_file.path)
+            except (OSError, ValueError):
+                content = ''
+        sources[source_file.rel_path] = content
+    return sources
+
+def read_source_text(path: str) -> str:
+    """Decoded content of a source file; for a notebook, the code of its code cells"""
+    if path.endswith('.ipynb'):
+        from .notebook import read_notebook  # Deferred: only repositories with notebooks need it
+        return read_notebook(path).code
+    with open(path, 'rb') as f:
+        return decode_source(f.read())
+
+def read_manifests(repo_path: str, manifests: List[str]) -> Dict[str, str]:
+    """Content of package manifests by relative path, skipping unreadable ones"""
+    contents = {}
+    for rel_path in manifests:
+        try:
+            with open(os.path.join(repo_path, rel_path), 'r', encoding='utf-8') as f:
+                contents[rel_path] = f.read()
+        except (OSError, UnicodeDecodeError):
+            pass
+    return contents
+
+def blob_hash(data: bytes) -> str:
+    """Git blob id of file content, so results can be keyed by content alone"""
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+def decode_source(data: bytes) -> str:
+    """Decode file content with universal newlines, as text-mode open() would"""
+    return data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
@@ -0,0 +1,172 @@
+import re
+import subprocess
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+from .history import read_blobs
+
+# Bump when rules or thresholds change so cached findings are rescanned
+SECRETS_VERSION = 1
+
+# Provider key rules: (rule id, pattern). Every pattern starts with a literal,
+# which lets the regex engine skip ahead with a substring search instead of
+# trying the pattern at every position; a match preceded by a word
+# character is part of a longer token and ignored.
+SECRET_RULES: List[Tuple[str, str]] = [
+    ('aws-access-key', r'(?:AKIA|ASIA)[0-9A-Z]{16}(?![0-9A-Za-z])'),
+    ('github-token', r'gh[pousr]_[A-Za-z0-9]{36}(?![A-Za-z0-9])'),
+    ('github-fine-grained-token', r'github_pat_[A-Za-z0-9_]{82}'),
+    ('anthropic-api-key', r'sk-ant-[A-Za-z0-9_-]{32,}'),
+    ('openai-api-key', r'sk-(?!ant-)(?:proj-|svcacct-|admin-)?[A-Za-z0-9_-]{40,}'),
+    ('huggingface-token', r'hf_[A-Za-z0-9]{34}(?![A-Za-z0-9])'),
+    ('google-api-key', r'AIza[0-9A-Za-z_-]{35}'),
+    ('slack-token', r'xox[baprs]-[0-9A-Za-z-]{10,}'),
+    ('stripe-secret-key', r'sk_live_[0-9A-Za-z]{24,}'),
+    ('stripe-restricted-key', r'rk_live_[0-9A-Za-z]{24,}'),
+    ('private-key', r'-----BEGIN [A-Z ]{0,16}PRIVATE KEY-----'),
+]
+
+# Quoted literals long enough to be generated credentials, from base64 or hex alphabets
+CANDIDATE_LITERAL = re.compile(r'''["'`]([A-Za-z0-9+/=_-]{20,200})["'`]''')
+HEX_LITERAL = re.compile(r'[0-9a-fA-F]+')
+# Generated keys mix digits with both letter cases; identifiers and words rarely do
+MIXED_CLASSES = re.compile(r'(?=[^0-9]*[0-9])(?=[^a-z]*[a-z])(?=[^A-Z]*[A-Z])')
+# Hex digests are everywhere in code; hex literals only count next to a secret-like name
+SECRET_NAME = re.compile(r'(?i)(?:secret|token|passw(?:or)?d|api_?key|private_?key|credential)[\w\]\'"]*\s*[:=]\s*\S*$')
+SECRET_NAME_WINDOW = 60
+
+# Bits per character above which a literal looks generated rather than written
+BASE64_ENTROPY = 4.5
+HEX_ENTROPY = 3.0
+
+# History blobs above this size are skipped: generated files and data, not source
+MAX_HISTORY_BLOB = 1024 * 1024
+
+@dataclass
+class SecretFinding:
+    """A credential found in a file or in a blob of the git history"""
+    rule: str
+    path: str
+    line: int
+    # First characters only, so reports never repeat the secret
+    preview: str
+    blob: Optional[str] = None
+    # Notebook cell holding the credential; line then counts within that cell
+    cell: Optional[int] = None
+
+    def to_issue(self) -> Dict:
+        issue = dict(asdict(self), type='secret')
+        if self.cell is None:
+            del issue['cell']
+        return issue
+
+def redact(secret: str) -> str:
+    return f"{secret[:4]}{'*' * min(len(secret) - 4, 8)}"
+
+def shannon_entropy(literals: List[str]) -> List[float]:
+    """Bits per character of each string, computed for all of them in one vectorized pass"""
+    if not literals:
+        return []
+    import numpy as np  # Deferred: keeps NumPy out of analyzer startup
+    lengths = np.fromiter((len(s) for s in literals), dtype=np.int64, count=len(literals))
+    # Candidates are ASCII, so one byte per character
+    data = np.frombuffer(''.join(literals).encode('ascii'), dtype=np.uint8)
+    rows = np.repeat(np.arange(len(literals)), lengths)
+    counts = np.bincount(rows * 256 + data, minlength=len(literals) * 256).reshape(len(literals), 256)
+    p = counts / lengths[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bits = -np.where(counts > 0, p * np.log2(p), 0.0).sum(axis=1)
+    return bits.tolist()
+
+class SecretScanner:
+    """Provider key rules and an entropy check of quoted literals, compiled once and reused"""
+
+    def __init__(self, rules: Optional[List[Tuple[str, str]]] = None):
+        self.rules: List[Tuple[str, Pattern]] = [
+            (rule, re.compile(pattern)) for rule, pattern in (rules or SECRET_RULES)
+        ]
+
+    def scan(self, content: str, path: str = '') -> List[SecretFinding]:
+        """Findings in one file, in order of position"""
+        found: List[Tuple[int, SecretFinding]] = []
+        covered: List[Tuple[int, int]] = []
+        for rule, pattern in self.rules:
+            for match in pattern.finditer(content):
+                start = match.start()
+                if start and (content[start - 1].isalnum() or content[start - 1] == '_'):
+                    continue
+                covered.append(match.span())
+                found.append((start, SecretFinding(rule, path, 0, redact(match.group()))))
+
+        # Cheap shape checks first, so entropy is only computed for plausible keys
+        candidates = []
+        for match in CANDIDATE_LITERAL.finditer(content):
+            literal, start = match.group(1), match.start(1)
+            if any(begin <= start < end for begin, end in covered):
+                continue
+            if HEX_LITERAL.fullmatch(literal):
+                before = content[max(0, start - SECRET_NAME_WINDOW):start - 1]
+                if SECRET_NAME.search(before):
+                    candidates.append((match, HEX_ENTROPY))
+            elif MIXED_CLASSES.match(literal):
+                candidates.append((match, BASE64_ENTROPY))
+        bits = shannon_entropy([match.group(1) for match, _ in candidates])
+        for (match, threshold), entropy in zip(candidates, bits):
+            if entropy >= threshold:
+                found.append((match.start(1), SecretFinding('high-entropy-string', path, 0, redact(match.group(1)))))
+
+        found.sort(key=lambda item: item[0])
+        offsets = [offset for offset, _ in found]
+        for line, (_, finding) in zip(_line_numbers(content, offsets), found):
+            finding.line = line
+        return [finding for _, finding in found]
+
+    def scan_history(
+        self,
+        repo_path: str,
+        since: Optional[str] = None,
+        skip: Iterable[str] = (),
+        check: Optional[Callable[[], None]] = None
+    ) -> Tuple[int, List[SecretFinding]]:
+        """
+        Scan every blob in the history of HEAD, or only those added since a commit
+        git rev-list --objects lists each object once however many commits
+        and paths share it, so every historic blob is read and scanned once;
+        blobs in skip (already scanned, e.g. the checked out files) and blobs
+        above MAX_HISTORY_BLOB or holding NUL bytes are passed over.
+        Returns the number of blobs scanned and the findings.
+        """
+        revisions = ['HEAD'] + (['--not', since] if since else [])
+        output = subprocess.run(
+            ['git', 'rev-list', '--objects', *revisions],
+            cwd=repo_path, capture_output=True, text=True, check=True
+        ).stdout
+        skip = set(skip)
+        # Trees and blobs are listed with a path, commits without
+        objects: Dict[str, str] = {}
+        for line in output.splitlines():
+            sha, _, path = line.partition(' ')
+            if path and sha not in skip:
+                objects.setdefault(sha, path)
+
+        scanned = 0
+        findings: List[SecretFinding] = []
+        for sha, data in read_blobs(repo_path, list(objects), MAX_HISTORY_BLOB):
+            if check is not None:
+                check()
+            if b'\0' in data:
+                continue
+            scanned += 1
+            # latin-1 maps every byte to one character, so decoding never fails and offsets stay put
+            for finding in self.scan(data.decode('latin-1'), objects[sha]):
+                finding.blob = sha
+                findings.append(finding)
+        return scanned, findings
+
+def _line_numbers(content: str, offsets: List[int]) -> List[int]:
+    """1-based line of each offset, offsets in increasing order"""
+    lines, line, pos = [], 1, 0
+    for offset in offsets:
+        line += content.count('\n', pos, offset)
+        pos = offset
+        lines.append(line)
+    return lines
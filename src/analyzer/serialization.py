@@ -0,0 +1,124 @@
+import gzip
+import json
+import importlib
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+# Bump when the layout of serialized results changes; payloads of another version are not read
+SCHEMA_VERSION = 1
+
+# Header of a serialized payload: two magic bytes, the schema version and the format.
+# JSON text never starts with the magic bytes, so payloads written before
+# the header existed are still read as JSON.
+MAGIC = b'\xc5R'
+FORMAT_CODES = {'json': 1, 'msgpack': 2}
+
+JSON_MEDIA_TYPE = 'application/json'
+MSGPACK_MEDIA_TYPES = ('application/msgpack', 'application/x-msgpack')
+
+# Bodies smaller than this are sent uncompressed; compression would cost more than it saves
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+class SerializationError(ValueError):
+    """A payload of another schema version, or in a format this process cannot read"""
+
+@lru_cache(maxsize=None)
+def _optional(module: str):
+    """An optional speedup module, or None when it is not installed"""
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        return None
+
+def available_formats() -> Tuple[str, ...]:
+    return ('msgpack', 'json') if _optional('msgpack') is not None else ('json',)
+
+def available_encodings() -> Tuple[str, ...]:
+    return ('zstd', 'gzip') if _optional('zstandard') is not None else ('gzip',)
+
+def dumps(value: Any, format: Optional[str] = None) -> bytes:
+    """Serialize plain data behind a versioned header, as msgpack when installed and JSON otherwise"""
+    format = format or available_formats()[0]
+    return MAGIC + bytes((SCHEMA_VERSION, FORMAT_CODES[format])) + encode(value, format)
+
+def loads(data: bytes) -> Any:
+    """Read data written by dumps, or bare JSON from before the header"""
+    if isinstance(data, str) or not data.startswith(MAGIC):
+        return json.loads(data)
+    version, code = data[2], data[3]
+    if version != SCHEMA_VERSION:
+        raise SerializationError(f"Unsupported schema version {version}")
+    if code == FORMAT_CODES['json']:
+        return json.loads(data[4:])
+    msgpack = _optional('msgpack') if code == FORMAT_CODES['msgpack'] else None
+    if msgpack is None:
+        raise SerializationError(f"Cannot read payload format {code}")
+    return msgpack.unpackb(data[4:], raw=False, strict_map_key=False)
+
+def encode(value: Any, format: str = 'json') -> bytes:
+    """Plain data as msgpack or JSON, without a header"""
+    if format == 'msgpack':
+        return _optional('msgpack').packb(value, use_bin_type=True)
+    orjson = _optional('orjson')
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(',', ':')).encode()
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'zstd':
+        return _optional('zstandard').ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=GZIP_LEVEL)
+    return data
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """msgpack when the client prefers it over JSON and it is installed, JSON otherwise"""
+    weights = _weights(accept)
+    msgpack = max(weights.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    json_weight = max(weights.get(JSON_MEDIA_TYPE, 0.0), weights.get('*/*', 0.0), 0.0 if weights else 1.0)
+    if msgpack > 0 and msgpack >= json_weight and 'msgpack' in available_formats():
+        return 'msgpack'
+    return 'json'
+
+def negotiate_encoding(accept_encoding: Optional[str], size: int) -> Optional[str]:
+    """Best accepted compression for a body of size bytes, None to send it as it is"""
+    if size < MIN_COMPRESS_SIZE:
+        return None
+    weights = _weights(accept_encoding)
+    accepted = [e for e in available_encodings() if weights.get(e, weights.get('*', 0.0)) > 0]
+    return max(accepted, key=lambda e: weights.get(e, weights.get('*', 0.0)), default=None)
+
+def encode_response(value: Any, accept: Optional[str], accept_encoding: Optional[str]) -> Tuple[bytes, Dict[str, str]]:
+    """Body and headers of a response in the negotiated format and compression"""
+    format = negotiate_format(accept)
+    body = encode(value, format)
+    headers = {
+        'Content-Type': MSGPACK_MEDIA_TYPES[0] if format == 'msgpack' else JSON_MEDIA_TYPE,
+        'X-Schema-Version': str(SCHEMA_VERSION),
+        'Vary': 'Accept, Accept-Encoding',
+    }
+    encoding = negotiate_encoding(accept_encoding, len(body))
+    if encoding is not None:
+        body = compress(body, encoding)
+        headers['Content-Encoding'] = encoding
+    return body, headers
+
+def _weights(header: Optional[str]) -> Dict[str, float]:
+    """Quality value of each item of an Accept or Accept-Encoding header"""
+    weights = {}
+    for item in (header or '').split(','):
+        name, *params = [part.strip() for part in item.split(';')]
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[name.lower()] = quality
+    return weights
@@ -0,0 +1,119 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional, Pattern, Tuple
+
+# Signature database shipped with the package; CHRON_SIGNATURES points elsewhere
+DEFAULT_SIGNATURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'signatures.json')
+
+# Seconds between checks of the signature file for changes
+RELOAD_INTERVAL = 30.0
+
+SECTIONS = (
+    'frameworks', 'execution_checks', 'quality_patterns', 'security_patterns',
+    'rust_quality', 'typescript_quality',
+)
+
+def any_of(patterns: List[str]) -> Pattern:
+    """One regex matching wherever any of the patterns would, so a check scans the content once"""
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns))
+
+class Signatures:
+    """
+    Matchers compiled from one version of the signature database
+    version combines the file's schema version with a digest of its
+    content, so any edit yields a new version; it is part of per-file
+    cache keys, which invalidates results scored with older signatures.
+    """
+
+    def __init__(self, data: Dict, digest: str):
+        missing = [section for section in SECTIONS if section not in data]
+        if missing:
+            raise ValueError(f"Signature database lacks sections: {', '.join(missing)}")
+        self.schema_version: int = data.get('version', 1)
+        self.version = f"{self.schema_version}-{digest[:12]}"
+
+        try:
+            self.frameworks: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+                name: (tuple(spec['imports']), tuple(spec['patterns']))
+                for name, spec in data['frameworks'].items()
+            }
+            self.execution_checks: List[Pattern] = [
+                any_of(patterns) for patterns in data['execution_checks'].values()
+            ]
+            self.quality_patterns: List[Pattern] = [re.compile(p) for p in data['quality_patterns'].values()]
+            self.security_patterns: List[Pattern] = [re.compile(p) for p in data['security_patterns'].values()]
+            self.rust_quality: Dict[str, List[Pattern]] = {
+                group: [re.compile(p) for p in patterns] for group, patterns in data['rust_quality'].items()
+            }
+            self.typescript_quality: Dict[str, List[Pattern]] = {
+                group: [re.compile(p) for p in patterns] for group, patterns in data['typescript_quality'].items()
+            }
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Malformed signature database: {e!r}") from e
+        except re.error as e:
+            raise ValueError(f"Invalid signature pattern {e.pattern!r}: {e}") from e
+
+    @classmethod
+    def load(cls, path: str) -> 'Signatures':
+        with open(path, 'rb') as f:
+            raw = f.read()
+        return cls(json.loads(raw), hashlib.sha256(raw).hexdigest())
+
+class SignatureRegistry:
+    """
+    The current signatures of a process, reloaded when the file changes
+    The file is checked at most every reload_interval seconds, so running
+    workers pick up new signatures without a restart. A file that fails
+    to load is reported and the previous signatures stay in use.
+    """
+
+    def __init__(self, path: Optional[str] = None, reload_interval: float = RELOAD_INTERVAL):
+        self.path = path or DEFAULT_SIGNATURES_PATH
+        self.reload_interval = reload_interval
+        self._signatures: Optional[Signatures] = None
+        self._stat: Optional[Tuple[int, int]] = None
+        self._checked_at = float('-inf')
+        self._lock = threading.Lock()
+
+    def current(self) -> Signatures:
+        now = time.monotonic()
+        if self._signatures is not None and now - self._checked_at < self.reload_interval:
+            return self._signatures
+        with self._lock:
+            if self._signatures is None or now - self._checked_at >= self.reload_interval:
+                self._checked_at = now
+                self._reload_if_changed()
+            return self._signatures
+
+    def _reload_if_changed(self):
+        try:
+            stat = os.stat(self.path)
+            key = (stat.st_mtime_ns, stat.st_size)
+            if key == self._stat:
+                return
+            signatures = Signatures.load(self.path)
+        except (OSError, ValueError) as e:
+            if self._signatures is None:
+                raise
+            print(f"Keeping signatures {self._signatures.version}; reloading {self.path} failed: {e}")
+            return
+        if self._signatures is not None and signatures.version != self._signatures.version:
+            print(f"Reloaded signatures {signatures.version} from {self.path}")
+        self._signatures = signatures
+        self._stat = key
+
+_registry: Optional[SignatureRegistry] = None
+
+def current_signatures() -> Signatures:
+    """Signatures of this process, from CHRON_SIGNATURES or the bundled database"""
+    global _registry
+    if _registry is None:
+        _registry = SignatureRegistry(
+            os.environ.get('CHRON_SIGNATURES'),
+            float(os.environ.get('CHRON_SIGNATURES_RELOAD_INTERVAL', RELOAD_INTERVAL))
+        )
+    return _registry.current()
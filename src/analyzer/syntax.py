@@ -0,0 +1,309 @@
+import re
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Match, Optional, Pattern, Set, Tuple
+from .scanner import blob_hash
+
+# Languages with a structural parser; Python files are parsed with ast instead
+STRUCTURED_LANGUAGES = ('rust', 'typescript')
+
+# Syntax trees kept per process, by language and blob hash
+TREE_CACHE_SIZE = 1024
+
+# Longest item header searched for its body, in characters
+MAX_HEADER_LENGTH = 2000
+
+# Literals and comments: the only tokens whose extent decides where code is.
+# Everything else is skipped by finditer, which keeps lexing in C; the
+# leading lookahead lets the regex engine skip to candidate characters.
+_RUST_LITERALS = re.compile(r'''(?=[/"'br])(?:
+    (?P<comment>//[^\n]*)
+  | (?P<block_comment>/\*)
+  | (?P<raw_string>\bb?r\#*")
+  | (?P<string>b?"[^"\\]*(?:\\.[^"\\]*)*")
+  | (?P<char>b?'(?:\\(?:u\{[0-9a-fA-F]{1,6}\}|x[0-9a-fA-F]{2}|.)|[^'\\\n])')
+  | (?P<lifetime>'[A-Za-z_]\w*)
+)''', re.VERBOSE | re.DOTALL)
+_TYPESCRIPT_LITERALS = re.compile(r'''(?=[/"'`])(?:
+    (?P<comment>//[^\n]*)
+  | (?P<block_comment>/\*)
+  | (?P<string>"[^"\\\n]*(?:\\.[^"\\\n]*)*"|'[^'\\\n]*(?:\\.[^'\\\n]*)*')
+  | (?P<template>`[^`\\]*(?:\\.[^`\\]*)*`)
+  | (?P<slash>/)
+)''', re.VERBOSE | re.DOTALL)
+_TS_REGEX_LITERAL = re.compile(r'/(?:[^/\\\n\[]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*')
+# Characters and keywords after which a slash starts a regex literal rather than a division
+_TS_REGEX_PRECEDERS = frozenset('(,=:[!&|?{};+-*%<>~^')
+_TS_REGEX_KEYWORDS = re.compile(r'\b(?:return|typeof|case|delete|void|in|of)$')
+
+_NEWLINE = re.compile(r'\n')
+_NOT_NEWLINE = re.compile(r'[^\n]')
+_HEADER_STRUCTURE = re.compile(r'[()\[\]{};]')
+_BRACES = re.compile(r'[{}]')
+
+# Declaration keywords and the name that follows them
+_RUST_ITEM = re.compile(r'\b(fn|struct|enum|trait|impl|mod|type|union|macro_rules!)(?:\s+([A-Za-z_]\w*)|(?=\s*<)|(?<=!))')
+_TYPESCRIPT_ITEM = re.compile(r'(?<![\w$.])(function\*?|class|interface|type|enum|const|let|var)(?:\s+([A-Za-z_$][\w$]*)|(?=\s*\())')
+# A variable bound to a function: = function, = (...) => or = name =>
+_TS_FUNCTION_VALUE = re.compile(r'''\s*(?::[^=;{}]{0,200})?=\s*(?:async\s+)?
+    (?:function\b|(?:\((?:[^()]|\([^()]*\))*\)|[A-Za-z_$][\w$]*)\s*(?::[^=;{}]{0,200})?=>)''', re.VERBOSE)
+# Declarations start statements: at the start of the file, after {, } or ;, after the ] of an
+# attribute or, in TypeScript, after the ) of a decorator, following any modifiers
+_RUST_MODIFIERS = re.compile(r'''(?:\A|(?<=[{};\]]))\s*
+    (?P<modifiers>(?:(?:pub(?:\s*\([^)]*\))?|async|const|unsafe|default|extern(?:\s*"[^"]*")?)\s+)*)$''', re.VERBOSE)
+_TYPESCRIPT_MODIFIERS = re.compile(r'''(?:\A|(?<=[{};\])]))\s*
+    (?P<modifiers>(?:(?:export|default|declare|abstract|async)\s+)*)$''', re.VERBOSE)
+# How far before a keyword its modifiers are first looked for
+MODIFIERS_WINDOW = 120
+# Text a window may hold without reaching the statement boundary: modifiers and blanked comments
+_MODIFIER_TEXT = re.compile(r'[\s\w()"]*')
+
+@dataclass
+class Item:
+    """A declaration: function, type, trait, impl, module, class, ..."""
+    kind: str
+    name: str
+    line: int
+    end_line: int
+    # Declaration up to its body, on one line with comments removed
+    header: str
+    public: bool = False
+
+@dataclass
+class SyntaxTree:
+    """
+    Structure of a Rust or TypeScript/JavaScript file
+    code is the source with comments blanked out, keeping offsets and
+    line breaks, so patterns never match commented-out code; outline
+    holds one line per item header, so multi-line signatures match as
+    a whole.
+    """
+    language: str
+    line_count: int
+    code: str
+    items: List[Item] = field(default_factory=list)
+    comment_lines: Set[int] = field(default_factory=set)
+    doc_lines: Set[int] = field(default_factory=set)
+
+    @property
+    def outline(self) -> str:
+        return '\n'.join(item.header for item in self.items)
+
+    @property
+    def searchable(self) -> str:
+        """Item headers followed by the code, the text content patterns are matched against"""
+        return f"{self.outline}\n{self.code}"
+
+def lex(language: str, content: str) -> List[Tuple[str, int, int]]:
+    """Comments and literals of a file as (kind, start, end), in order"""
+    pattern = _RUST_LITERALS if language == 'rust' else _TYPESCRIPT_LITERALS
+    spans: List[Tuple[str, int, int]] = []
+    pos, size = 0, len(content)
+    while pos < size:
+        # Tokens whose extent the pattern cannot find restart the scan after them
+        for match in pattern.finditer(content, pos):
+            kind, start, end = match.lastgroup, match.start(), match.end()
+            if kind == 'block_comment':
+                end = _block_comment_end(content, start, nested=language == 'rust')
+                spans.append(('comment', start, end))
+                break
+            if kind == 'raw_string':
+                hashes = match.group()[match.group().index('r') + 1:-1]
+                close = content.find('"' + hashes, end)
+                end = size if close < 0 else close + 1 + len(hashes)
+                spans.append(('string', start, end))
+                break
+            if kind == 'slash':
+                if not _regex_allowed(content, start):
+                    continue
+                regex = _TS_REGEX_LITERAL.match(content, start)
+                if regex is None:
+                    continue
+                end = regex.end()
+                spans.append(('regex', start, end))
+                break
+            if kind != 'lifetime':
+                spans.append((kind, start, end))
+        else:
+            break
+        pos = end
+    return spans
+
+def _regex_allowed(content: str, slash: int) -> bool:
+    """Whether a slash starts a regex literal, judged by the code before it"""
+    before = content[max(0, slash - 16):slash].rstrip()
+    return not before or before[-1] in _TS_REGEX_PRECEDERS or _TS_REGEX_KEYWORDS.search(before) is not None
+
+def _block_comment_end(content: str, start: int, nested: bool) -> int:
+    """End of the block comment opened at start; Rust block comments nest"""
+    if not nested:
+        close = content.find('*/', start + 2)
+        return len(content) if close < 0 else close + 2
+    depth, pos = 0, start
+    while pos < len(content):
+        if content.startswith('/*', pos):
+            depth += 1
+            pos += 2
+        elif content.startswith('*/', pos):
+            depth -= 1
+            pos += 2
+            if depth == 0:
+                return pos
+        else:
+            pos += 1
+    return pos
+
+def _is_doc_comment(language: str, text: str) -> bool:
+    if language == 'rust':
+        return text.startswith(('///', '//!', '/**', '/*!')) and not text.startswith(('////', '/***'))
+    return text.startswith('/**') and not text.startswith('/***')
+
+def parse(language: str, content: str) -> SyntaxTree:
+    """Lex a file and collect its items, comments and documentation"""
+    newlines = [match.start() for match in _NEWLINE.finditer(content)]
+
+    def line_of(offset: int) -> int:
+        return bisect_right(newlines, offset - 1) + 1
+
+    # code blanks comments; structure also blanks literals, so their braces and keywords are ignored
+    code_pieces, structure_pieces, pos = [], [], 0
+    comment_lines: Set[int] = set()
+    doc_lines: Set[int] = set()
+    for kind, start, end in lex(language, content):
+        text = content[start:end]
+        blank = _NOT_NEWLINE.sub(' ', text)
+        code_pieces.append(content[pos:start])
+        structure_pieces.append(content[pos:start])
+        pos = end
+        if kind != 'comment':
+            code_pieces.append(text)
+            # Keep the delimiters so a literal still reads as an expression
+            structure_pieces.append(text[0] + blank[1:-1] + text[-1] if len(text) > 1 else text)
+            continue
+        code_pieces.append(blank)
+        structure_pieces.append(blank)
+        first, last = line_of(start), line_of(end - 1)
+        # Comments after code on the same line leave it a code line
+        opens_line = not content[content.rfind('\n', 0, start) + 1:start].strip()
+        lines = range(first if opens_line else first + 1, last + 1)
+        comment_lines.update(lines)
+        if _is_doc_comment(language, text):
+            doc_lines.update(lines)
+    code_pieces.append(content[pos:])
+    structure_pieces.append(content[pos:])
+    code = ''.join(code_pieces)
+
+    tree = SyntaxTree(language, content.count('\n') + 1, code,
+                      comment_lines=comment_lines, doc_lines=doc_lines)
+    tree.items = _collect_items(language, code, ''.join(structure_pieces), line_of)
+    return tree
+
+def _collect_items(language: str, code: str, structure: str, line_of) -> List[Item]:
+    """Find declarations at any nesting depth and the extent of their bodies"""
+    closing: Dict[int, int] = {}
+    stack: List[int] = []
+    for match in _BRACES.finditer(structure):
+        if match.group() == '{':
+            stack.append(match.start())
+        elif stack:
+            closing[stack.pop()] = match.start()
+
+    rust = language == 'rust'
+    modifiers = _RUST_MODIFIERS if rust else _TYPESCRIPT_MODIFIERS
+    items: List[Item] = []
+    for match in (_RUST_ITEM if rust else _TYPESCRIPT_ITEM).finditer(structure):
+        keyword, name = match.group(1), match.group(2) or ''
+        end = match.end()
+        if keyword in ('const', 'let', 'var'):
+            value = _TS_FUNCTION_VALUE.match(structure, end) if name else None
+            if value is None:
+                continue
+            keyword, end = 'function', value.end()
+        prefix = _statement_prefix(modifiers, structure, match.start())
+        if prefix is None:
+            continue
+        start = prefix.start('modifiers')
+        kind = keyword.rstrip('!*')
+
+        header_end, body_end = _header_end(structure, end)
+        header = ' '.join(code[start:header_end].split())
+        if kind == 'impl':
+            name = _impl_name(header)
+        items.append(Item(
+            kind=kind,
+            name=name,
+            line=line_of(start),
+            end_line=line_of(closing.get(body_end, body_end)),
+            header=header,
+            public=prefix.group('modifiers').startswith(('pub', 'export')),
+        ))
+    return items
+
+def _statement_prefix(modifiers: Pattern, structure: str, keyword: int) -> Optional[Match]:
+    """Modifiers between the statement boundary before a keyword and the keyword, None without a boundary"""
+    window = MODIFIERS_WINDOW
+    while True:
+        start = max(0, keyword - window)
+        prefix = modifiers.search(structure, start, keyword)
+        # Long doc comments push the boundary out of the window
+        if prefix is not None or start == 0 or not _MODIFIER_TEXT.fullmatch(structure, start, keyword):
+            return prefix
+        window *= 4
+
+def _header_end(structure: str, pos: int) -> Tuple[int, int]:
+    """Offsets where a declaration header ends and its body starts: the { or ; outside parentheses"""
+    depth = 0
+    limit = min(len(structure), pos + MAX_HEADER_LENGTH)
+    for match in _HEADER_STRUCTURE.finditer(structure, pos, limit):
+        char = match.group()
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif depth <= 0:
+            return match.start(), match.start()
+    return limit, max(limit - 1, pos)
+
+def _impl_name(header: str) -> str:
+    """The implemented type of an impl block: impl<T> Trait for path::Type<T> -> Type"""
+    depth, outside = 0, []
+    for char in header[len('impl'):]:
+        if char == '<':
+            depth += 1
+        elif char == '>':
+            depth -= 1
+        elif depth == 0:
+            outside.append(char)
+    target = ''.join(outside).split(' where ')[0].split(' for ')[-1]
+    path = re.search(r'[A-Za-z_][\w:]*', target)
+    return path.group().split('::')[-1] if path else ''
+
+class SyntaxTreeCache:
+    """Parsed files by language and blob hash, so a file is parsed once per process"""
+
+    def __init__(self, max_entries: int = TREE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._trees: 'OrderedDict[Tuple[str, str], SyntaxTree]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def parse(self, language: str, content: str, content_hash: Optional[str] = None) -> SyntaxTree:
+        key = (language, content_hash or blob_hash(content.encode('utf-8')))
+        with self._lock:
+            tree = self._trees.get(key)
+            if tree is not None:
+                self._trees.move_to_end(key)
+                return tree
+        tree = parse(language, content)
+        with self._lock:
+            self._trees[key] = tree
+            while len(self._trees) > self.max_entries:
+                self._trees.popitem(last=False)
+        return tree
+
+_tree_cache = SyntaxTreeCache()
+
+def parse_source(language: str, content: str, content_hash: Optional[str] = None) -> SyntaxTree:
+    """Syntax tree of a Rust or TypeScript/JavaScript file, from the process cache when seen before"""
+    return _tree_cache.parse(language, content, content_hash)
@@ -0,0 +1,162 @@
+import time
+import asyncio
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from .cancellation import CancellationToken
+from .clone import remote_head
+from .jobs import ServiceResources, run_analysis, stored_report
+
+# Repositories kept warm, by request frequency
+WARM_TOP_N = 10
+# Seconds between warming rounds
+WARM_INTERVAL = 300.0
+# CPU seconds the analyses of one round may use together
+WARM_CPU_BUDGET = 60.0
+# Seconds without a request before the service counts as off-peak
+QUIET_PERIOD = 30.0
+# A request's weight in the ranking halves over this many seconds
+REQUEST_HALF_LIFE = 24 * 3600.0
+# Cancellation reason of a warming analysis that gave way to a request
+PREEMPTED = 'preempted by a request'
+# Repositories tracked at most; the least requested are forgotten first
+MAX_TRACKED = 10000
+
+class RequestTracker:
+    """
+    Exponentially decayed request counts per repository
+    Each repository keeps one weight and the time it was last updated;
+    weights decay with REQUEST_HALF_LIFE, so a burst of requests last month
+    ranks below steady traffic today. Safe to use from any thread.
+    """
+
+    def __init__(
+        self,
+        half_life: float = REQUEST_HALF_LIFE,
+        max_tracked: int = MAX_TRACKED,
+        clock: Callable[[], float] = time.time
+    ):
+        self.half_life = half_life
+        self.max_tracked = max_tracked
+        self.clock = clock
+        self.last_request: Optional[float] = None
+        self._weights: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, repo_url: str):
+        now = self.clock()
+        with self._lock:
+            self.last_request = now
+            self._weights[repo_url] = (self._decayed(repo_url, now) + 1.0, now)
+            if len(self._weights) > self.max_tracked:
+                coldest = min(self._weights, key=lambda url: self._decayed(url, now))
+                del self._weights[coldest]
+
+    def top(self, n: int) -> List[Tuple[str, float]]:
+        """The n most requested repositories with their current weights, most requested first"""
+        now = self.clock()
+        with self._lock:
+            weights = [(url, self._decayed(url, now)) for url in self._weights]
+        return sorted(weights, key=lambda item: item[1], reverse=True)[:n]
+
+    def idle_for(self) -> float:
+        """Seconds since the last request, infinite before the first"""
+        return float('inf') if self.last_request is None else self.clock() - self.last_request
+
+    def _decayed(self, repo_url: str, now: float) -> float:
+        weight, updated = self._weights.get(repo_url, (0.0, now))
+        return weight * 0.5 ** ((now - updated) / self.half_life)
+
+class CacheWarmer:
+    """
+    Precomputes the results of the most requested repositories after they get new commits
+    Every interval, when no request came in for quiet_period seconds and
+    busy() is false, the top_n repositories of the tracker are checked
+    against their remotes; those whose HEAD has no stored result yet are
+    analyzed in order of popularity, until the round has used cpu_budget
+    CPU seconds. The analyses are the standard ones of /analyze, so the
+    next request for the commit is served from the result store. A round
+    stops as soon as a request comes in, and a repository whose analysis
+    failed or ran out of budget is not retried until its HEAD moves.
+    """
+
+    def __init__(
+        self,
+        resources: ServiceResources,
+        tracker: RequestTracker,
+        top_n: int = WARM_TOP_N,
+        interval: float = WARM_INTERVAL,
+        cpu_budget: float = WARM_CPU_BUDGET,
+        quiet_period: float = QUIET_PERIOD,
+        busy: Callable[[], bool] = lambda: False
+    ):
+        self.resources = resources
+        self.tracker = tracker
+        self.top_n = top_n
+        self.interval = interval
+        self.cpu_budget = cpu_budget
+        self.quiet_period = quiet_period
+        self.busy = busy
+        self.warmed = 0
+        self.cpu_used = 0.0
+        # Head commit of each repository whose warming failed at it
+        self._failed: Dict[str, str] = {}
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """Warm in rounds until stopped"""
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                await self.warm_once()
+            except Exception as e:
+                print(f"Cache warming round failed: {e}")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def off_peak(self) -> bool:
+        return self.tracker.idle_for() >= self.quiet_period and not self.busy()
+
+    async def warm_once(self) -> List[str]:
+        """Run one warming round and return the repositories whose result was stored"""
+        warmed = []
+        budget = self.cpu_budget
+        for repo_url, _ in self.tracker.top(self.top_n):
+            if budget <= 0 or not self.off_peak():
+                break
+            head = await remote_head(repo_url)
+            if head is None or self._failed.get(repo_url) == head:
+                continue
+            if stored_report(self.resources.result_store, repo_url, head) is not None:
+                continue
+            # Stops at the round's remaining CPU time, or when a request arrives
+            cancellation = CancellationToken(cpu_limit=budget)
+            watcher = asyncio.create_task(self._watch_requests(cancellation))
+            started = time.process_time()
+            try:
+                report = await run_analysis({'repo_url': repo_url}, self.resources, cancellation)
+            except Exception as e:
+                report = None
+                if cancellation.reason != PREEMPTED:
+                    print(f"Warming {repo_url} failed: {e}")
+            finally:
+                watcher.cancel()
+            used = time.process_time() - started
+            budget -= used
+            self.cpu_used += used
+            if cancellation.reason == PREEMPTED:
+                break
+            if report is None or report['truncated']:
+                self._failed[repo_url] = head
+                continue
+            self._failed.pop(repo_url, None)
+            self.warmed += 1
+            warmed.append(repo_url)
+        return warmed
+
+    async def _watch_requests(self, cancellation: CancellationToken, interval: float = 0.5):
+        """Cancel a warming analysis once a request comes in; cancelled when the analysis ends"""
+        since = self.tracker.last_request
+        while self.tracker.last_request == since:
+            await asyncio.sleep(interval)
+        cancellation.cancel(PREEMPTED)
@@ -0,0 +1,105 @@
+import os
+import uuid
+import socket
+import asyncio
+import threading
+from typing import Optional
+from .broker import Broker, Job
+from .cancellation import AnalysisCancelled, CancellationToken, ResourceLimitExceeded
+from .jobs import ServiceResources, run_analysis
+from .progress import AnalysisProgress
+
+class AnalysisWorker:
+    """
+    Leases analysis jobs from a broker, runs them and reports the results
+    Each job runs under a deadline and optional CPU time and memory limits.
+    A job that hits a limit returns a truncated result; the worker then
+    stops, as it also does after max_jobs jobs, so its supervisor can start
+    a fresh process in its place. Jobs stopped by their deadline, a limit
+    or a cancel before any result fail without being requeued.
+    """
+
+    def __init__(
+        self,
+        broker: Broker,
+        resources: ServiceResources,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = 60.0,
+        heartbeat_interval: float = 15.0,
+        poll_interval: float = 1.0,
+        job_timeout: Optional[float] = None,
+        cpu_limit: Optional[float] = None,
+        memory_limit: Optional[int] = None,
+        max_jobs: Optional[int] = None
+    ):
+        self.broker = broker
+        self.resources = resources
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self.cpu_limit = cpu_limit
+        self.memory_limit = memory_limit
+        self.max_jobs = max_jobs
+        self.jobs_done = 0
+        self.recycle = False
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """Process jobs until stopped or due for recycling, polling the broker when it is empty"""
+        while (stop is None or not stop.is_set()) and not self.recycle:
+            if not await self.run_once():
+                await asyncio.sleep(self.poll_interval)
+
+    async def run_once(self) -> bool:
+        """Process a single job; False when none was available"""
+        job = self.broker.lease(self.worker_id, self.lease_seconds)
+        if job is None:
+            return False
+
+        cancellation = CancellationToken(
+            timeout=job.payload.get('timeout') or self.job_timeout,
+            cpu_limit=self.cpu_limit,
+            memory_limit=self.memory_limit
+        )
+        # Analysis is CPU-bound and blocks the event loop, so heartbeats
+        # run on their own thread to keep the lease alive meanwhile
+        finished = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job, finished, cancellation), daemon=True
+        )
+        heartbeat.start()
+        try:
+            progress = AnalysisProgress(lambda event: self.broker.publish(job.id, self.worker_id, event))
+            result = await run_analysis(job.payload, self.resources, cancellation, progress)
+        except MemoryError:
+            # The heap may be left fragmented; retry the job on a fresh process
+            print(f"Job {job.id} ran out of memory on {self.worker_id}")
+            self.broker.fail(job.id, self.worker_id, 'out of memory')
+            self.recycle = True
+        except Exception as e:
+            print(f"Job {job.id} failed on {self.worker_id}: {e}")
+            # A deadline, a limit or a cancel would stop every retry the same way
+            retry = not isinstance(e, AnalysisCancelled) and cancellation.error is None
+            self.broker.fail(job.id, self.worker_id, str(e), retry=retry)
+        else:
+            if not self.broker.complete(job.id, self.worker_id, result):
+                print(f"Job {job.id} lease was lost before completion")
+        finally:
+            finished.set()
+            heartbeat.join()
+        self.jobs_done += 1
+        if isinstance(cancellation.error, ResourceLimitExceeded):
+            print(f"Job {job.id} hit a limit on {self.worker_id} ({cancellation.reason}), recycling")
+            self.recycle = True
+        if self.max_jobs is not None and self.jobs_done >= self.max_jobs:
+            self.recycle = True
+        return True
+
+    def _heartbeat(self, job: Job, finished: threading.Event, cancellation: CancellationToken):
+        """Extend the lease until the job finishes; stop the analysis once the lease is lost"""
+        while not finished.wait(self.heartbeat_interval):
+            if not self.broker.heartbeat(job.id, self.worker_id, self.lease_seconds):
+                print(f"Job {job.id} lease lost by {self.worker_id}")
+                cancellation.cancel('lease lost')
+                return
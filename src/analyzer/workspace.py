@@ -0,0 +1,180 @@
+import re
+import json
+import fnmatch
+import posixpath
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from .file_cache import SCORES_VERSION
+from .scanner import SourceFile
+
+WORKSPACE_KINDS = ('cargo', 'npm', 'python')
+
+TOML_SECTION = re.compile(r'^[ \t]*\[([^\[\]\n]+)\][ \t]*(?:#[^\n]*)?$', re.MULTILINE)
+TOML_STRING = re.compile(r'"([^"\n]*)"|\'([^\'\n]*)\'')
+PNPM_PACKAGES = re.compile(r'^packages:[ \t]*\n((?:[ \t]*(?:[-#][^\n]*)?(?:\n|\Z))*)', re.MULTILINE)
+PNPM_PACKAGE = re.compile(r'^[ \t]*-[ \t]*[\'"]?([^\'"#\n]+?)[\'"]?[ \t]*(?:#[^\n]*)?$', re.MULTILINE)
+
+@dataclass
+class WorkspaceMember:
+    """A package of a monorepo, scored as its own unit"""
+    name: str
+    # Directory relative to the repository root, '' for the root package
+    path: str
+    kind: str
+
+    def contains(self, rel_path: str) -> bool:
+        return not self.path or rel_path.startswith(f"{self.path}/")
+
+def workspace_member_cache_key(path: str, tree_sha: str, signature_version: str) -> str:
+    """Cache key of a member's file scores; the git tree id fixes every file under it"""
+    return f"workspace-member:{SCORES_VERSION}:{signature_version}:{path}:{tree_sha}"
+
+def discover_workspace(manifests: Dict[str, str]) -> List[WorkspaceMember]:
+    """
+    Members declared by the manifests of a repository, sorted by path
+    Cargo [workspace] members, package.json workspaces (an array or
+    {"packages": [...]}) and the packages of pnpm-workspace.yaml are globs
+    matched against the directories holding a manifest of the same kind,
+    with exclusions removed; a repository with several pyproject.toml files
+    has each of their directories as a member. A directory declared by
+    several workspaces keeps its first kind, in WORKSPACE_KINDS order.
+    """
+    members: Dict[str, WorkspaceMember] = {}
+    directories: Dict[str, List[str]] = {kind: [] for kind in WORKSPACE_KINDS}
+    for manifest in manifests:
+        directory, name = posixpath.split(manifest)
+        kind = {'Cargo.toml': 'cargo', 'package.json': 'npm', 'pyproject.toml': 'python'}.get(name)
+        if kind is not None:
+            directories[kind].append(directory)
+
+    for manifest, content in manifests.items():
+        directory, name = posixpath.split(manifest)
+        if name != 'Cargo.toml':
+            continue
+        workspace = _toml_section(content, 'workspace')
+        if workspace is None:
+            continue
+        paths = _match_members(
+            directory, directories['cargo'],
+            _toml_strings(workspace, 'members'), _toml_strings(workspace, 'exclude')
+        )
+        # The workspace root is a member too when it is a package itself
+        if _toml_section(content, 'package') is not None:
+            paths.append(directory)
+        for path in paths:
+            members.setdefault(path, _member(path, 'cargo', manifests))
+
+    for manifest, content in manifests.items():
+        directory, name = posixpath.split(manifest)
+        if name == 'package.json':
+            patterns = _package_json_workspaces(content)
+        elif name == 'pnpm-workspace.yaml':
+            patterns = _pnpm_packages(content)
+        else:
+            continue
+        includes = [p for p in patterns if not p.startswith('!')]
+        excludes = [p[1:] for p in patterns if p.startswith('!')]
+        for path in _match_members(directory, directories['npm'], includes, excludes):
+            members.setdefault(path, _member(path, 'npm', manifests))
+
+    if len(directories['python']) > 1:
+        for path in directories['python']:
+            members.setdefault(path, _member(path, 'python', manifests))
+    return sorted(members.values(), key=lambda member: member.path)
+
+def partition_files(
+    files: List[SourceFile],
+    members: List[WorkspaceMember]
+) -> Tuple[Dict[str, List[SourceFile]], List[SourceFile]]:
+    """Files of each member by member path, each in its innermost member, and the files in none"""
+    # Deepest paths first, so nested members claim their files before the enclosing one
+    ordered = sorted(members, key=lambda member: member.path.count('/') + bool(member.path), reverse=True)
+    partition: Dict[str, List[SourceFile]] = {member.path: [] for member in members}
+    unassigned = []
+    for source_file in files:
+        for member in ordered:
+            if member.contains(source_file.rel_path):
+                partition[member.path].append(source_file)
+                break
+        else:
+            unassigned.append(source_file)
+    return partition, unassigned
+
+def _match_members(root: str, candidates: List[str], includes: List[str], excludes: List[str]) -> List[str]:
+    """Candidate directories matching an include glob and no exclude glob, relative to root"""
+    def normalize(pattern: str) -> str:
+        path = posixpath.normpath(posixpath.join(root, pattern.strip()))
+        return '' if path == '.' else path
+
+    includes = [normalize(p) for p in includes]
+    excludes = [normalize(p) for p in excludes]
+    return [
+        directory for directory in candidates
+        if any(_glob_match(directory, p) for p in includes)
+        and not any(_glob_match(directory, p) for p in excludes)
+    ]
+
+def _glob_match(directory: str, pattern: str) -> bool:
+    """Match a directory against a workspace glob, where only ** crosses a /"""
+    if '**' in pattern:
+        return fnmatch.fnmatchcase(directory, pattern)
+    parts, pattern_parts = directory.split('/'), pattern.split('/')
+    return len(parts) == len(pattern_parts) and all(
+        fnmatch.fnmatchcase(part, pattern_part) for part, pattern_part in zip(parts, pattern_parts)
+    )
+
+def _member(path: str, kind: str, manifests: Dict[str, str]) -> WorkspaceMember:
+    """Member at a directory, named by its manifest or else by the directory"""
+    name = None
+    if kind == 'cargo':
+        package = _toml_section(manifests.get(posixpath.join(path, 'Cargo.toml'), ''), 'package')
+        name = _toml_value(package or '', 'name')
+    elif kind == 'npm':
+        try:
+            manifest = json.loads(manifests.get(posixpath.join(path, 'package.json'), ''))
+            name = manifest.get('name') if isinstance(manifest, dict) else None
+        except ValueError:
+            pass
+    else:
+        content = manifests.get(posixpath.join(path, 'pyproject.toml'), '')
+        for section in ('project', 'tool.poetry'):
+            name = name or _toml_value(_toml_section(content, section) or '', 'name')
+    return WorkspaceMember(name=name or posixpath.basename(path) or '.', path=path, kind=kind)
+
+def _package_json_workspaces(content: str) -> List[str]:
+    try:
+        manifest = json.loads(content)
+    except ValueError:
+        return []
+    workspaces = manifest.get('workspaces') if isinstance(manifest, dict) else None
+    if isinstance(workspaces, dict):
+        workspaces = workspaces.get('packages')
+    if not isinstance(workspaces, list):
+        return []
+    return [pattern for pattern in workspaces if isinstance(pattern, str)]
+
+def _pnpm_packages(content: str) -> List[str]:
+    """Globs listed under packages: in pnpm-workspace.yaml"""
+    block = PNPM_PACKAGES.search(content)
+    return PNPM_PACKAGE.findall(block.group(1)) if block else []
+
+def _toml_section(content: str, name: str) -> Optional[str]:
+    """Body of a [name] table, up to the next table header"""
+    headers = list(TOML_SECTION.finditer(content))
+    for i, header in enumerate(headers):
+        if header.group(1).strip() == name:
+            end = headers[i + 1].start() if i + 1 < len(headers) else len(content)
+            return content[header.end():end]
+    return None
+
+def _toml_strings(section: str, key: str) -> List[str]:
+    """Strings of a key = [...] array, which may span lines"""
+    match = re.search(rf'^[ \t]*{re.escape(key)}[ \t]*=[ \t]*\[([^\]]*)\]', section, re.MULTILINE)
+    if match is None:
+        return []
+    body = re.sub(r'#[^\n]*', '', match.group(1))
+    return [double or single for double, single in TOML_STRING.findall(body)]
+
+def _toml_value(section: str, key: str) -> Optional[str]:
+    match = re.search(rf'^[ \t]*{re.escape(key)}[ \t]*=[ \t]*(?:"([^"\n]*)"|\'([^\'\n]*)\')', section, re.MULTILINE)
+    return (match.group(1) or match.group(2)) if match else None
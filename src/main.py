@@ -1,6 +1,19 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from analyzer import CodeAnalyzer, ReportGenerator
+import os
+import json
+import asyncio
+from dataclasses import asdict
+from typing import AsyncIterator, Callable, Dict, List, Literal, Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+from analyzer.broker import FAILED, create_broker
+from analyzer.cancellation import AnalysisCancelled, CancellationToken
+from analyzer.history import UnknownRevision
+from analyzer.jobs import ServiceResources, run_analysis, run_diff, run_history
+from analyzer.plugins import load_plugins
+from analyzer.progress import AnalysisProgress
+from analyzer.serialization import encode_response
+from analyzer.warming import CacheWarmer, RequestTracker
 
 app = FastAPI(
     title="Solana AI Project Analyzer",
@@ -8,26 +21,332 @@ app = FastAPI(
     version="1.0.0"
 )
 
+resources = ServiceResources.from_environment()
+result_store = resources.result_store
+
+# With a broker configured this process is only the API front end and
+# analyses run on workers started with src/worker.py
+broker = create_broker(os.environ["CHRON_BROKER"]) if os.environ.get("CHRON_BROKER") else None
+JOB_TIMEOUT = float(os.environ.get("CHRON_JOB_TIMEOUT", 600))
+# Deadline of an analysis that does not set its own timeout
+ANALYSIS_TIMEOUT = float(os.environ.get("CHRON_ANALYSIS_TIMEOUT", 300))
+# How often a progress stream polls the broker for worker events
+STREAM_POLL_INTERVAL = 0.5
+
+# Most requested repositories are re-analyzed off-peak after new commits;
+# CHRON_WARM_TOP_N=0 turns warming off
+request_tracker = RequestTracker()
+cache_warmer = CacheWarmer(
+    resources, request_tracker,
+    top_n=int(os.environ.get("CHRON_WARM_TOP_N", 10)),
+    interval=float(os.environ.get("CHRON_WARM_INTERVAL", 300)),
+    cpu_budget=float(os.environ.get("CHRON_WARM_CPU_BUDGET", 60)),
+    busy=lambda: active_analyses > 0
+)
+# Analyses this process is running for clients; warming waits for them
+active_analyses = 0
+
+@app.on_event("startup")
+async def start_cache_warmer():
+    # In worker mode the front end does not analyze, so it does not warm either
+    if broker is None and cache_warmer.top_n > 0:
+        asyncio.create_task(cache_warmer.run())
+
+class BudgetOptions(BaseModel):
+    max_files: Optional[int] = None
+    max_bytes: Optional[int] = None
+    sample_size: Optional[int] = None
+    confidence: Optional[float] = None
+    max_interval_width: Optional[float] = None
+    seed: Optional[int] = None
+
 class AnalysisRequest(BaseModel):
     repo_url: str
     additional_info: dict = {}
+    budget: Optional[BudgetOptions] = None
+    breakdown: bool = False
+    timeout: Optional[float] = None
+    components: Optional[List[Literal['code_quality', 'ai_framework', 'execution', 'security']]] = None
+    plugins: Optional[List[str]] = None
+    reachable_only: bool = False
+    entry_points: Optional[List[str]] = None
+    workspace: bool = False
+    secret_history: bool = False
+
+class HistoryRequest(BaseModel):
+    repo_url: str
+    revision: str = "HEAD"
+    commits: int = Field(100, ge=1, le=1000)
+    components: Optional[List[Literal['code_quality', 'ai_framework', 'execution', 'security']]] = None
+    timeout: Optional[float] = None
+
+class DiffRequest(BaseModel):
+    repo_url: str
+    base: str
+    head: str = "HEAD"
+    components: Optional[List[Literal['code_quality', 'ai_framework', 'execution', 'security']]] = None
+    timeout: Optional[float] = None
+
+def serialize_results(results) -> dict:
+    """Shape stored results for a query response"""
+    return {
+        "success": True,
+        "results": [dict(asdict(r), band=r.band) for r in results]
+    }
+
+def analysis_payload(request: AnalysisRequest) -> dict:
+    """Job payload of a request, with the default deadline filled in"""
+    if request.plugins:
+        try:
+            load_plugins(request.plugins)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    request_tracker.record(request.repo_url)
+    payload = request.model_dump()
+    payload['timeout'] = request.timeout or ANALYSIS_TIMEOUT
+    return payload
+
+def encoded_response(data: dict, http_request: Request) -> Response:
+    """
+    Encode a response body once, bypassing FastAPI's JSON encoder
+    Clients get msgpack by listing application/msgpack in Accept, and
+    large bodies are compressed with zstd or gzip per Accept-Encoding.
+    """
+    body, headers = encode_response(
+        data, http_request.headers.get('accept'), http_request.headers.get('accept-encoding')
+    )
+    return Response(content=body, headers=headers)
+
+def server_sent_event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def serialize_job(job) -> dict:
+    """Shape a broker job for a status response"""
+    return {
+        "success": job.status != FAILED,
+        "job_id": job.id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "report": job.result,
+        "error": job.error
+    }
+
+async def watch_disconnect(http_request: Request, on_disconnect: Callable[[], None], interval: float = 0.5):
+    """Call on_disconnect once the client goes away; cancelled when the response is ready"""
+    while not await http_request.is_disconnected():
+        await asyncio.sleep(interval)
+    on_disconnect()
 
 @app.post("/analyze")
-async def analyze_repository(request: AnalysisRequest):
+async def analyze_repository(request: AnalysisRequest, http_request: Request):
     """Analyze a GitHub repository"""
+    payload = analysis_payload(request)
+    watcher = None
     try:
-        analyzer = CodeAnalyzer(request.repo_url)
-        result = await analyzer.analyze()
-        
-        report_generator = ReportGenerator(result)
-        report = report_generator.generate_summary()
+        if broker is None:
+            cancellation = CancellationToken(timeout=payload['timeout'])
+            watcher = asyncio.create_task(
+                watch_disconnect(http_request, lambda: cancellation.cancel('client disconnected'))
+            )
+            report = await run_local_analysis(payload, cancellation)
+        else:
+            job_id = broker.submit(payload)
+            watcher = asyncio.create_task(
+                watch_disconnect(http_request, lambda: broker.cancel(job_id, 'client disconnected'))
+            )
+            job = await broker.wait(job_id, timeout=JOB_TIMEOUT)
+            if job.status == FAILED:
+                raise RuntimeError(job.error)
+            report = job.result
         
-        return {
+        return encoded_response({
             "success": True,
             "report": report
-        }
+        }, http_request)
+    except AnalysisCancelled as e:
+        # Cancelled before any file was scored, e.g. while cloning
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+async def run_local_analysis(
+    payload: dict,
+    cancellation: CancellationToken,
+    progress: Optional[AnalysisProgress] = None
+) -> dict:
+    """Run an analysis in this process, counted as active so warming holds off"""
+    global active_analyses
+    active_analyses += 1
+    try:
+        return await run_analysis(payload, resources, cancellation, progress)
+    finally:
+        active_analyses -= 1
+
+async def stream_local_analysis(payload: dict) -> AsyncIterator[str]:
+    """Run an analysis in this process and relay its progress events"""
+    events: asyncio.Queue = asyncio.Queue()
+    cancellation = CancellationToken(timeout=payload['timeout'])
+    task = asyncio.create_task(
+        run_local_analysis(payload, cancellation, AnalysisProgress(events.put_nowait))
+    )
+    task.add_done_callback(lambda _: events.put_nowait(None))
+    try:
+        while (event := await events.get()) is not None:
+            yield server_sent_event(event['event'], event)
+        yield server_sent_event('result', {"success": True, "report": task.result()})
+    except AnalysisCancelled as e:
+        yield server_sent_event('error', {"success": False, "status": 504, "detail": str(e)})
+    except Exception as e:
+        yield server_sent_event('error', {"success": False, "status": 500, "detail": str(e)})
+    finally:
+        # The client closed the stream early; the analysis stops at its next file
+        if not task.done():
+            cancellation.cancel('client disconnected')
+
+async def stream_queued_analysis(payload: dict) -> AsyncIterator[str]:
+    """Queue an analysis on the workers and relay the progress events they publish"""
+    job_id = broker.submit(payload)
+    yield server_sent_event('queued', {"event": "queued", "job_id": job_id})
+    after = 0
+    finished = False
+    try:
+        while True:
+            for after, event in broker.events(job_id, after):
+                yield server_sent_event(event['event'], event)
+            job = broker.get(job_id)
+            if job.finished:
+                finished = True
+                if job.status == FAILED:
+                    yield server_sent_event('error', {"success": False, "status": 500, "detail": job.error})
+                else:
+                    yield server_sent_event('result', {"success": True, "report": job.result})
+                return
+            await asyncio.sleep(STREAM_POLL_INTERVAL)
+    finally:
+        if not finished:
+            broker.cancel(job_id, 'client disconnected')
+
+@app.post("/analyze/stream")
+async def analyze_repository_stream(request: AnalysisRequest):
+    """Analyze a repository, streaming progress as server-sent events; closing the stream aborts"""
+    payload = analysis_payload(request)
+    events = stream_local_analysis(payload) if broker is None else stream_queued_analysis(payload)
+    return StreamingResponse(events, media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/analyze/history")
+async def analyze_history(request: HistoryRequest, http_request: Request):
+    """Score the last commits of a repository into a time series, reusing results of unchanged files"""
+    cancellation = CancellationToken(timeout=request.timeout or ANALYSIS_TIMEOUT)
+    watcher = asyncio.create_task(
+        watch_disconnect(http_request, lambda: cancellation.cancel('client disconnected'))
+    )
+    try:
+        history = await run_history(request.model_dump(), resources, cancellation)
+        return encoded_response({"success": True, "history": history}, http_request)
+    except UnknownRevision as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except AnalysisCancelled as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        watcher.cancel()
+
+@app.post("/analyze/diff")
+async def analyze_diff(request: DiffRequest, http_request: Request):
+    """Score how the change from a base ref to a head ref moves a repository, scoring only changed files"""
+    cancellation = CancellationToken(timeout=request.timeout or ANALYSIS_TIMEOUT)
+    watcher = asyncio.create_task(
+        watch_disconnect(http_request, lambda: cancellation.cancel('client disconnected'))
+    )
+    try:
+        diff = await run_diff(request.model_dump(), resources, cancellation)
+        return encoded_response({"success": True, "diff": diff}, http_request)
+    except UnknownRevision as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except AnalysisCancelled as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        watcher.cancel()
+
+@app.post("/jobs")
+async def submit_job(request: AnalysisRequest):
+    """Queue an analysis on the workers without waiting for it"""
+    if broker is None:
+        raise HTTPException(status_code=400, detail="No broker configured (set CHRON_BROKER)")
+    job = broker.get(broker.submit(analysis_payload(request)))
+    return serialize_job(job)
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: int, http_request: Request):
+    """Status, and once finished the report, of a queued analysis"""
+    job = broker.get(job_id) if broker is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return encoded_response(serialize_job(job), http_request)
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: int):
+    """Cancel a queued or running analysis"""
+    if broker is None or broker.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    broker.cancel(job_id)
+    return serialize_job(broker.get(job_id))
+
+@app.get("/results")
+async def query_results(
+    component: str = "overall",
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    band: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0
+):
+    """Query the latest result of each repository by score range or band"""
+    try:
+        return serialize_results(result_store.query(
+            component=component, min_score=min_score, max_score=max_score,
+            band=band, limit=limit, offset=offset
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/results/top")
+async def top_results(n: int = 10, component: str = "overall"):
+    """Leaderboard of repositories by their latest result"""
+    try:
+        return serialize_results(result_store.top(n=n, component=component))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/warming")
+async def warming_status(n: int = 10):
+    """Most requested repositories and what the cache warmer has done so far"""
+    return {
+        "success": True,
+        "top": [{"repo_url": url, "weight": weight} for url, weight in request_tracker.top(n)],
+        "warmed": cache_warmer.warmed,
+        "cpu_seconds": cache_warmer.cpu_used
+    }
+
+@app.get("/metrics")
+async def service_metrics():
+    """Memory accounting and admission counts of the analyses this process runs"""
+    return {
+        "success": True,
+        "active_analyses": active_analyses,
+        "memory": resources.memory.metrics() if resources.memory is not None else None
+    }
+
+@app.get("/results/history")
+async def result_history(repo_url: str, limit: int = 100):
+    """All stored results for a repository, newest first"""
+    return serialize_results(result_store.history(repo_url, limit=limit))
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import multiprocessing
+from multiprocessing.connection import wait
+from analyzer.broker import create_broker
+from analyzer.cancellation import current_rss
+from analyzer.jobs import ServiceResources
+from analyzer.worker import AnalysisWorker
+
+def run_worker(args: argparse.Namespace):
+    """Run one worker process until interrupted"""
+    resources = ServiceResources.from_environment()
+    if args.memory_limit_mb and resources.memory is not None:
+        # Analyses are downgraded to fit under the limit rather than tripping it
+        limit = args.memory_limit_mb * 1024 * 1024 - current_rss()
+        resources.memory.limit = min(resources.memory.limit or limit, limit)
+    worker = AnalysisWorker(
+        create_broker(args.broker),
+        resources,
+        lease_seconds=args.lease_seconds,
+        heartbeat_interval=args.heartbeat_interval,
+        poll_interval=args.poll_interval,
+        job_timeout=args.job_timeout,
+        cpu_limit=args.cpu_limit,
+        memory_limit=args.memory_limit_mb * 1024 * 1024 if args.memory_limit_mb else None,
+        max_jobs=args.max_jobs
+    )
+    print(f"Worker {worker.worker_id} polling {args.broker}")
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        pass
+    if worker.recycle:
+        print(f"Worker {worker.worker_id} exiting for recycling after {worker.jobs_done} jobs")
+
+def start_worker(args: argparse.Namespace) -> multiprocessing.Process:
+    process = multiprocessing.Process(target=run_worker, args=(args,))
+    process.start()
+    return process
+
+def main():
+    """Start analysis workers that take jobs from the broker"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--broker", default=os.environ.get("CHRON_BROKER"),
+                        help="Broker URL, e.g. sqlite:///var/lib/chron/broker.db (default: $CHRON_BROKER)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Worker processes to start on this host")
+    parser.add_argument("--lease-seconds", type=float, default=60.0)
+    parser.add_argument("--heartbeat-interval", type=float, default=15.0)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--job-timeout", type=float, default=None,
+                        help="Seconds a job may run before returning a truncated result, unless the job sets its own")
+    parser.add_argument("--cpu-limit", type=float, default=None, help="CPU seconds a job may use")
+    parser.add_argument("--memory-limit-mb", type=int, default=None, help="Resident memory a job may grow the worker to")
+    parser.add_argument("--max-jobs", type=int, default=None, help="Jobs a worker process runs before it is replaced")
+    args = parser.parse_args()
+    
+    if not args.broker:
+        parser.error("--broker or CHRON_BROKER is required")
+        
+    # Workers exit after hitting a limit or max-jobs; replace them with fresh processes
+    processes = [start_worker(args) for _ in range(args.concurrency)]
+    try:
+        while True:
+            wait([process.sentinel for process in processes])
+            for i, process in enumerate(processes):
+                if process.exitcode is not None:
+                    if process.exitcode != 0:
+                        print(f"Worker process {process.pid} exited with code {process.exitcode}")
+                        time.sleep(1)  # Avoid spinning on a worker that fails at startup
+                    processes[i] = start_worker(args)
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
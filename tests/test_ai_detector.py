@@ -12,7 +12,7 @@ def temp_repo():
 
 @pytest.fixture
 def ai_detector(temp_repo):
-    return AIFrameworkDetector(temp_repo)
+    return AIFrameworkDetector()
 
 def create_test_file(repo_path: str, content: str, filename: str = "test.py"):
     """Helper to create test files"""
@@ -25,7 +25,7 @@ async def test_detect_tensorflow(temp_repo, ai_detector):
 import tensorflow as tf
 model = tf.keras.Sequential()
 """)
-    score = await ai_detector.detect_frameworks()
+    score = await ai_detector.detect_frameworks(temp_repo)
     assert score > 0
 
 async def test_detect_pytorch(temp_repo, ai_detector):
@@ -33,7 +33,7 @@ async def test_detect_pytorch(temp_repo, ai_detector):
 import torch
 import torch.nn as nn
 """)
-    score = await ai_detector.detect_frameworks()
+    score = await ai_detector.detect_frameworks(temp_repo)
     assert score > 0
 
 async def test_detect_no_ai(temp_repo, ai_detector):
@@ -41,7 +41,7 @@ async def test_detect_no_ai(temp_repo, ai_detector):
 import json
 data = {"test": "data"}
 """)
-    score = await ai_detector.detect_frameworks()
+    score = await ai_detector.detect_frameworks(temp_repo)
     assert score == 0
 
 async def test_detect_multiple_frameworks(temp_repo, ai_detector):
@@ -50,5 +50,5 @@ import tensorflow as tf
 import torch
 from transformers import AutoModel
 """)
-    score = await ai_detector.detect_frameworks()
+    score = await ai_detector.detect_frameworks(temp_repo)
     assert score > 0.5  # Should detect multiple frameworks
@@ -0,0 +1,140 @@
+import pytest
+import os
+import time
+import tempfile
+import shutil
+from analyzer.clone import checkout_path
+from analyzer.broker import DONE, FAILED, LEASED, QUEUED, SQLiteBroker, create_broker
+from analyzer.jobs import ServiceResources
+from analyzer.result_store import ResultStore
+from analyzer.worker import AnalysisWorker
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+def remove_clone(repo_url):
+    path = checkout_path(repo_url)
+    shutil.rmtree(path, ignore_errors=True)
+    if os.path.exists(f"{path}.lock"):
+        os.remove(f"{path}.lock")
+
+@pytest.fixture
+def broker(temp_dir):
+    return SQLiteBroker(os.path.join(temp_dir, "broker.db"), max_attempts=2)
+
+def test_lease_and_complete(broker):
+    job_id = broker.submit({"repo_url": "https://github.com/a/b"})
+    job = broker.lease("worker-1", lease_seconds=30)
+    
+    assert job.id == job_id and job.status == LEASED and job.attempts == 1
+    assert broker.lease("worker-2", lease_seconds=30) is None
+    assert not broker.complete(job_id, "worker-2", {"score": 1})
+    assert broker.complete(job_id, "worker-1", {"score": 1})
+    assert broker.get(job_id).result == {"score": 1}
+
+def test_expired_lease_is_taken_over(broker):
+    job_id = broker.submit({})
+    broker.lease("dead-worker", lease_seconds=0.01)
+    time.sleep(0.05)
+    
+    job = broker.lease("worker-2", lease_seconds=30)
+    assert job.id == job_id and job.attempts == 2
+    assert not broker.heartbeat(job_id, "dead-worker", 30)
+    assert broker.heartbeat(job_id, "worker-2", 30)
+
+def test_retries_until_attempts_run_out(broker):
+    job_id = broker.submit({})
+    broker.fail(broker.lease("w", 30).id, "w", "boom")
+    assert broker.get(job_id).status == QUEUED
+    
+    broker.fail(broker.lease("w", 30).id, "w", "boom again")
+    job = broker.get(job_id)
+    assert job.status == FAILED and job.error == "boom again"
+
+def test_create_broker_from_url(temp_dir):
+    broker = create_broker(f"sqlite://{temp_dir}/queue.db")
+    assert broker.db_path == f"{temp_dir}/queue.db"
+    with pytest.raises(ValueError):
+        create_broker("carrier-pigeon://nest")
+
+def create_git_repo(path: str):
+    """Create a committed git repository the worker can clone"""
+    from git import Actor, Repo
+    os.makedirs(path)
+    with open(os.path.join(path, "model.py"), "w") as f:
+        f.write("import torch\nclass Model(torch.nn.Module):\n    def forward(self, x):\n        return x\n")
+    repo = Repo.init(path)
+    repo.index.add(["model.py"])
+    repo.index.commit("initial", author=Actor("test", "test@example.com"), committer=Actor("test", "test@example.com"))
+
+async def test_worker_fans_in_results(temp_dir, broker):
+    repo = os.path.join(temp_dir, f"repo_{os.path.basename(temp_dir)}")
+    create_git_repo(repo)
+    resources = ServiceResources(ResultStore(os.path.join(temp_dir, "results.db")), fingerprints=False)
+    worker = AnalysisWorker(broker, resources, worker_id="w1", heartbeat_interval=0.01)
+    
+    ok = broker.submit({"repo_url": f"file://{repo}", "breakdown": True})
+    bad = broker.submit({"repo_url": f"file://{temp_dir}/missing"})
+    while await worker.run_once():
+        pass
+        
+    job = await broker.wait(ok, timeout=5)
+    assert job.status == DONE
+    assert job.result["detailed_scores"]["AI Framework Integration"] == 1.0
+    assert job.result["breakdown"]["files"] == 1
+    assert (await broker.wait(bad, timeout=5)).status == FAILED
+    assert resources.result_store.latest(f"file://{repo}").commit_sha is not None
+    remove_clone(f"file://{repo}")
+    remove_clone(f"file://{temp_dir}/missing")
+
+def test_cancel_stops_heartbeats(broker):
+    job_id = broker.submit({})
+    broker.lease("w", 30)
+    
+    assert broker.cancel(job_id, "client disconnected")
+    assert not broker.heartbeat(job_id, "w", 30)
+    assert not broker.cancel(job_id)
+    job = broker.get(job_id)
+    assert job.status == FAILED and job.error == "client disconnected"
+
+async def test_worker_recycles_after_hitting_a_limit(temp_dir, broker):
+    resources = ServiceResources(ResultStore(os.path.join(temp_dir, "results.db")), fingerprints=False)
+    worker = AnalysisWorker(broker, resources, worker_id="w1", memory_limit=1)
+    
+    job_id = broker.submit({"repo_url": f"file://{temp_dir}/anything"})
+    await worker.run()
+    
+    assert worker.recycle and worker.jobs_done == 1
+    job = broker.get(job_id)
+    assert job.status == FAILED and "memory limit exceeded" in job.error
+    remove_clone(f"file://{temp_dir}/anything")
+
+async def test_deadline_hit_is_not_retried(temp_dir, broker):
+    repo = os.path.join(temp_dir, f"slow_{os.path.basename(temp_dir)}")
+    create_git_repo(repo)
+    resources = ServiceResources(ResultStore(os.path.join(temp_dir, "results.db")), fingerprints=False)
+    worker = AnalysisWorker(broker, resources, worker_id="w1")
+    
+    job_id = broker.submit({"repo_url": f"file://{repo}", "timeout": 0.001})
+    assert await worker.run_once()
+    
+    job = broker.get(job_id)
+    assert job.status == FAILED and job.attempts == 1
+    assert broker.lease("w2", 30) is None
+    remove_clone(f"file://{repo}")
+
+def test_progress_events_from_lease_owner_only(broker):
+    job_id = broker.submit({})
+    broker.lease("w", 30)
+    
+    assert broker.publish(job_id, "w", {"event": "discovered", "files": 3})
+    assert not broker.publish(job_id, "other", {"event": "discovered", "files": 0})
+    (seq, event), = broker.events(job_id)
+    assert event == {"event": "discovered", "files": 3}
+    assert broker.events(job_id, after=seq) == []
+    
+    broker.complete(job_id, "w", {})
+    assert broker.events(job_id) == []
@@ -0,0 +1,65 @@
+import pytest
+import os
+import time
+import tempfile
+import shutil
+from analyzer.cancellation import AnalysisCancelled, CancellationToken, DeadlineExceeded, ResourceLimitExceeded
+from analyzer.clone import CloneError, clone_repository
+from analyzer.code_analyzer import CodeAnalyzer
+from tests.test_broker import create_git_repo
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+def test_token_trips_on_cancel_deadline_and_limits():
+    token = CancellationToken()
+    token.check()
+    token.cancel('client disconnected')
+    with pytest.raises(AnalysisCancelled, match='client disconnected'):
+        token.check()
+
+    token = CancellationToken(timeout=0.01)
+    assert not token.cancelled
+    time.sleep(0.02)
+    assert token.remaining() == 0 and token.cancelled
+    with pytest.raises(DeadlineExceeded):
+        token.check()
+
+    with pytest.raises(ResourceLimitExceeded):
+        CancellationToken(memory_limit=1).check()
+
+async def test_cancelled_file_pass_returns_truncated_result(temp_dir):
+    for name in ("a.py", "b.py", "c.py"):
+        with open(os.path.join(temp_dir, name), "w") as f:
+            f.write("import torch\n")
+    token = CancellationToken()
+    analyzer = CodeAnalyzer("dummy_url")
+    analyzer.repo_path = temp_dir
+    score_file = analyzer._score_file
+
+    def score_then_cancel(run, source_file):
+        token.cancel('client disconnected')
+        return score_file(run, source_file)
+    analyzer._score_file = score_then_cancel
+
+    result = await analyzer.analyze(cancellation=token)
+    assert result.truncated and result.truncation_reason == 'client disconnected'
+    assert result.files_analyzed == 1 and result.files_total == 3
+
+async def test_clone_deadline_removes_partial_checkout(temp_dir):
+    source = os.path.join(temp_dir, "source")
+    create_git_repo(source)
+    target = os.path.join(temp_dir, "target")
+
+    with pytest.raises(DeadlineExceeded):
+        await clone_repository(f"file://{source}", target, CancellationToken(timeout=0))
+    assert not os.path.exists(target)
+
+    await clone_repository(f"file://{source}", target, CancellationToken(timeout=30))
+    assert os.path.exists(os.path.join(target, "model.py"))
+
+    with pytest.raises(CloneError):
+        await clone_repository(f"file://{temp_dir}/missing", os.path.join(temp_dir, "other"))
@@ -45,3 +45,26 @@ async def test_full_analysis():
         assert result.execution_score < 1  # Due to broken.py
         assert isinstance(result.issues, list)
         assert isinstance(result.recommendations, list)
+
+@pytest.mark.asyncio
+async def test_selected_components_are_evaluated_lazily():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        create_test_repo(temp_dir)
+        with open(os.path.join(temp_dir, "app.ts"), "w") as f:
+            f.write("interface Props { name: string }\n")
+        analyzer = CodeAnalyzer("dummy_url")
+        analyzer.repo_path = temp_dir
+        full = await analyzer.analyze()
+        
+        analyzer = CodeAnalyzer("dummy_url")
+        analyzer.repo_path = temp_dir
+        result = await analyzer.analyze(components=["execution", "ai_framework"])
+        assert result.components == ("ai_framework", "execution")
+        assert result.code_quality_score is None and result.security_score is None
+        assert result.execution_score == full.execution_score
+        assert result.score("security") == full.security_score
+        assert result.components == ("ai_framework", "execution", "security")
+        assert result.calculate_overall_score() == full.calculate_overall_score()
+        
+        with pytest.raises(ValueError):
+            await analyzer.analyze(components=["speed"])
@@ -0,0 +1,52 @@
+import pytest
+import os
+import asyncio
+import tempfile
+import shutil
+from analyzer import engine
+from analyzer.code_analyzer import CodeAnalyzer
+from analyzer.engine import current_engine
+from analyzer.signatures import DEFAULT_SIGNATURES_PATH, Signatures
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+def make_repo(path, index):
+    os.makedirs(path)
+    with open(os.path.join(path, "model.py"), "w") as f:
+        f.write(f"import torch\n\nclass Model{index}(torch.nn.Module):\n    def forward(self, x):\n        return x\n")
+    with open(os.path.join(path, "lib.rs"), "w") as f:
+        f.write(f"/// Docs\npub fn run{index}() -> Result<(), String> {{\n    Ok(())\n}}\n" * (index + 1))
+
+async def test_concurrent_analyses_share_one_engine(temp_dir):
+    paths = [os.path.join(temp_dir, f"repo{i}") for i in range(4)]
+    for i, path in enumerate(paths):
+        make_repo(path, i)
+
+    async def analyze(path):
+        analyzer = CodeAnalyzer(f"https://github.com/a/{os.path.basename(path)}")
+        analyzer.repo_path = path
+        result = await analyzer.analyze()
+        return (result.code_quality_score, result.ai_framework_score, result.execution_score,
+                result.security_score, result.issues)
+
+    sequential = [await analyze(path) for path in paths]
+    concurrent = await asyncio.gather(*(analyze(path) for path in paths))
+    assert concurrent == sequential
+    assert sequential[0][0] != sequential[3][0]
+
+def test_engine_is_rebuilt_only_when_signatures_change(monkeypatch):
+    first, second = Signatures.load(DEFAULT_SIGNATURES_PATH), Signatures.load(DEFAULT_SIGNATURES_PATH)
+    monkeypatch.setattr(engine, "_engine", None)
+    monkeypatch.setattr(engine, "current_signatures", lambda: first)
+    shared = current_engine()
+    assert current_engine() is shared and shared.ai_detector.signatures is first
+
+    monkeypatch.setattr(engine, "current_signatures", lambda: second)
+    reloaded = current_engine()
+    assert reloaded is not shared and reloaded.execution_verifier.signatures is second
+    # The secret rules are compiled once per process
+    assert reloaded.secret_scanner is shared.secret_scanner
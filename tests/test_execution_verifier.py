@@ -12,7 +12,7 @@ def temp_repo():
 
 @pytest.fixture
 def execution_verifier(temp_repo):
-    return ExecutionVerifier(temp_repo)
+    return ExecutionVerifier()
 
 def create_test_file(repo_path: str, content: str, filename: str = "test.py"):
     """Helper to create test files"""
@@ -25,7 +25,7 @@ async def test_valid_syntax(temp_repo, execution_verifier):
 def test_function():
     return "Hello, World!"
 """)
-    score = await execution_verifier.verify_execution()
+    score = await execution_verifier.verify_execution(temp_repo)
     assert score > 0
 
 async def test_invalid_syntax(temp_repo, execution_verifier):
@@ -33,12 +33,12 @@ async def test_invalid_syntax(temp_repo, execution_verifier):
 def test_function()
     return "Missing colon"
 """)
-    score = await execution_verifier.verify_execution()
+    score = await execution_verifier.verify_execution(temp_repo)
     assert score < 1
 
 async def test_multiple_files(temp_repo, execution_verifier):
     create_test_file(temp_repo, "def func1(): pass", "file1.py")
     create_test_file(temp_repo, "def func2(): pass", "file2.py")
     create_test_file(temp_repo, "invalid python code", "file3.py")
-    score = await execution_verifier.verify_execution()
+    score = await execution_verifier.verify_execution(temp_repo)
     assert 0 < score < 1  # Some files valid, some invalid
@@ -0,0 +1,98 @@
+import pytest
+import os
+import tempfile
+import shutil
+import multiprocessing
+from analyzer.code_analyzer import CodeAnalyzer
+from analyzer.engine import AnalysisEngine
+from analyzer.file_cache import FileResultCache, file_cache_key
+from analyzer.signatures import current_signatures
+from analyzer.scanner import blob_hash
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+def fill_cache(db_path: str, worker: int):
+    cache = FileResultCache(db_path, memory_entries=0)
+    for i in range(50):
+        cache.put(f"{worker}:{i}", {"worker": worker, "i": i})
+
+def test_get_and_put(temp_dir):
+    cache = FileResultCache(os.path.join(temp_dir, "cache.db"))
+    assert cache.get("missing") is None
+    cache.put("key", {"score": 0.5})
+    
+    fresh = FileResultCache(cache.db_path)
+    assert fresh.get("key") == {"score": 0.5}
+    assert (fresh.hits, fresh.misses) == (1, 0)
+
+def test_lru_eviction_respects_size_bound(temp_dir):
+    cache = FileResultCache(os.path.join(temp_dir, "cache.db"), max_bytes=400, memory_entries=0, touch_interval=0)
+    for i in range(10):
+        cache.put(f"key{i}", {"payload": "x" * 50})
+        cache.get("key0")  # Keep the first entry hot
+        
+    assert cache.size_bytes() <= 400
+    assert cache.get("key0") is not None
+    assert cache.get("key1") is None
+    assert cache.get("key9") is not None
+
+def test_concurrent_writers(temp_dir):
+    db_path = os.path.join(temp_dir, "cache.db")
+    FileResultCache(db_path)
+    workers = [multiprocessing.Process(target=fill_cache, args=(db_path, w)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        
+    cache = FileResultCache(db_path)
+    assert len(cache) == 200
+    assert cache.get("3:49") == {"worker": 3, "i": 49}
+
+async def test_identical_files_are_scored_once(temp_dir, monkeypatch):
+    code = "import torch\nclass Model(torch.nn.Module):\n    def forward(self, x):\n        return x\n"
+    for repo in ("one", "two"):
+        os.makedirs(os.path.join(temp_dir, repo, "vendor"))
+        for name in ("a.py", os.path.join("vendor", "b.py")):
+            with open(os.path.join(temp_dir, repo, name), "w") as f:
+                f.write(code)
+    cache = FileResultCache(os.path.join(temp_dir, "cache.db"))
+    
+    calls = []
+    original = AnalysisEngine.analyze_file_quality
+    monkeypatch.setattr(AnalysisEngine, "analyze_file_quality",
+                        lambda self, *args: calls.append(args) or original(self, *args))
+    
+    results = []
+    for repo in ("one", "two"):
+        analyzer = CodeAnalyzer(f"https://github.com/a/{repo}", file_cache=cache)
+        analyzer.repo_path = os.path.join(temp_dir, repo)
+        results.append(await analyzer.analyze())
+        
+    assert len(calls) == 1
+    assert results[0] == results[1]
+    assert file_cache_key("python", "abc", "1-a") != file_cache_key("rust", "abc", "1-a")
+    assert file_cache_key("python", "abc", "1-a") != file_cache_key("python", "abc", "1-b")
+
+async def test_partial_entries_are_completed(temp_dir, monkeypatch):
+    with open(os.path.join(temp_dir, "model.py"), "w") as f:
+        f.write("import torch\n")
+    cache = FileResultCache(os.path.join(temp_dir, "cache.db"))
+    
+    calls = []
+    original = AnalysisEngine.analyze_file_security
+    monkeypatch.setattr(AnalysisEngine, "analyze_file_security",
+                        lambda self, *args: calls.append(args) or original(self, *args))
+    
+    for components in (["security"], None):
+        analyzer = CodeAnalyzer("https://github.com/a/b", file_cache=cache)
+        analyzer.repo_path = temp_dir
+        await analyzer.analyze(components=components)
+        
+    assert len(calls) == 1
+    entry = cache.get(file_cache_key("python", blob_hash(b"import torch\n"), current_signatures().version))
+    assert set(entry) == {"code_quality", "security", "secrets", "frameworks", "execution"}
@@ -0,0 +1,112 @@
+import pytest
+import os
+import tempfile
+import shutil
+import sqlite3
+from contextlib import contextmanager
+from analyzer.code_analyzer import CodeAnalyzer
+from analyzer.fingerprint_index import FingerprintIndex
+
+MODEL_CODE = """
+import torch
+import torch.nn as nn
+
+class Classifier(nn.Module):
+    def __init__(self, hidden_size: int, num_labels: int):
+        super().__init__()
+        self.dropout = nn.Dropout(0.1)
+        self.linear = nn.Linear(hidden_size, num_labels)
+
+    def forward(self, features):
+        return self.linear(self.dropout(features))
+"""
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+@pytest.fixture
+def index(temp_dir):
+    return FingerprintIndex(os.path.join(temp_dir, "fingerprints.db"))
+
+def create_repo(path: str, files: dict):
+    os.makedirs(path)
+    for name, content in files.items():
+        with open(os.path.join(path, name), "w") as f:
+            f.write(content)
+
+async def analyze(path: str, repo_url: str, index: FingerprintIndex):
+    analyzer = CodeAnalyzer(repo_url, fingerprint_index=index)
+    analyzer.repo_path = path
+    return await analyzer.analyze()
+
+def test_near_duplicate_signatures_are_similar(index):
+    edited = MODEL_CODE.replace("0.1", "0.2")
+    a, b = index.signature(MODEL_CODE), index.signature(edited)
+    assert (a == b).mean() > 0.6
+    assert index.signature("x = 1") is None
+
+async def test_fork_is_detected(temp_dir, index):
+    original = os.path.join(temp_dir, "original")
+    fork = os.path.join(temp_dir, "fork")
+    create_repo(original, {"model.py": MODEL_CODE, "util.py": "def helper():\n    return 1\n" * 10})
+    create_repo(fork, {"model.py": MODEL_CODE, "other.py": "x = 1\n" * 3})
+    
+    first = await analyze(original, "https://github.com/a/original", index)
+    assert first.overlap_percentage == 0
+    
+    second = await analyze(fork, "https://github.com/b/fork", index)
+    assert second.overlap_percentage == 100.0
+    assert second.overlapping_repositories == {"https://github.com/a/original": 1}
+    assert second.ai_framework_score == first.ai_framework_score
+
+async def test_reanalysis_does_not_match_itself(temp_dir, index):
+    repo = os.path.join(temp_dir, "repo")
+    create_repo(repo, {"model.py": MODEL_CODE})
+    await analyze(repo, "https://github.com/a/repo", index)
+    
+    again = await analyze(repo, "https://github.com/a/repo", index)
+    assert again.overlap_percentage == 0
+
+async def test_lookups_are_batched_and_removed_files_stop_matching(temp_dir, index, monkeypatch):
+    original = os.path.join(temp_dir, "original")
+    create_repo(original, {"model0.py": MODEL_CODE, **{
+        f"util{i}.py": "".join(f"def helper_{i}_{j}(x):\n    return x * {j}\n" for j in range(10)) for i in range(4)
+    }})
+    await analyze(original, "https://github.com/a/original", index)
+    
+    connections, statements = [], []
+    connect = index._connect
+    
+    @contextmanager
+    def traced():
+        connections.append(1)
+        with connect() as conn:
+            conn.set_trace_callback(statements.append)
+            yield conn
+    
+    monkeypatch.setattr(index, "_connect", traced)
+    fork = os.path.join(temp_dir, "fork")
+    create_repo(fork, {"model.py": MODEL_CODE.replace("0.1", "0.2"), **{
+        f"new{i}.py": "".join(f"value_{i}_{j} = [{j}, {j + 1}, {j + 2}]\n" for j in range(10)) for i in range(2)
+    }})
+    assert (await analyze(fork, "https://github.com/b/fork", index)).overlap_percentage == pytest.approx(100 / 3)
+    # One lookup for the file pass, one to match and one to record the fork
+    assert len(connections) == 3
+    # Matching probes every file's buckets in one join, whatever the file count
+    selects = [statement for statement in statements if statement.lstrip().startswith("SELECT")]
+    assert sum("lsh_buckets" in statement for statement in selects) == 1
+    assert len(selects) == 5
+    
+    # Once the original drops the file, the fork no longer overlaps it
+    os.remove(os.path.join(original, "model0.py"))
+    await analyze(original, "https://github.com/a/original", index)
+    assert (await analyze(fork, "https://github.com/b/fork", index)).overlap_percentage == 0
+    # and its buckets and signature leave the index with it
+    with sqlite3.connect(index.db_path) as conn:
+        for table in ("lsh_buckets", "fingerprints"):
+            assert conn.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE content_hash NOT IN (SELECT content_hash FROM repo_files)"
+            ).fetchone() == (0,)
@@ -0,0 +1,81 @@
+import pytest
+import os
+import tempfile
+import shutil
+from analyzer.code_analyzer import CodeAnalyzer
+from analyzer.file_cache import FileResultCache
+from analyzer.import_graph import ImportGraph
+from analyzer.scanner import read_manifests, read_sources, scan_repository
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+def write_tree(root, files):
+    for rel_path, content in files.items():
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+def build_graph(root):
+    scan = scan_repository(root)
+    return ImportGraph.build(scan.files, read_sources(scan.files, {}), read_manifests(root, scan.manifests))
+
+def test_graph_resolves_python_rust_and_typescript_imports(temp_dir):
+    write_tree(temp_dir, {
+        "pyproject.toml": '[project.scripts]\nserve = "app.cli:main"\n',
+        "app/__init__.py": "",
+        "app/cli.py": "from .core import engine\nimport app.util as util\n",
+        "app/core/__init__.py": "from . import engine\n",
+        "app/core/engine.py": "from ..util import helper\n",
+        "app/util.py": "",
+        "tests/test_engine.py": "from app.core import engine\n",
+        "crate/src/main.rs": "mod model;\nuse crate::model::infer;\n",
+        "crate/src/model.rs": "pub mod infer;\n",
+        "crate/src/model/infer.rs": "use super::super::model;\n",
+        "crate/src/unused.rs": "",
+        "web/package.json": '{"main": "dist/index.js"}',
+        "web/src/index.ts": "import { chat } from './chat';\nexport * from \"./lib/util.js\";\n",
+        "web/src/chat.tsx": "const x = require('./lib');\n",
+        "web/src/lib/index.ts": "",
+        "web/src/lib/util.ts": "",
+        "web/src/dead.ts": "import './chat';\n",
+    })
+    graph = build_graph(temp_dir)
+
+    assert {graph.files[i] for i in graph.entry_points} == {
+        "app/__init__.py", "app/cli.py", "crate/src/main.rs", "web/src/index.ts"
+    }
+    assert graph.reachable() == set(graph.files) - {
+        "tests/test_engine.py", "crate/src/unused.rs", "web/src/dead.ts"
+    }
+    assert ImportGraph.from_dict(graph.to_dict()).reachable() == graph.reachable()
+
+async def test_reachable_scoring_ignores_dead_code_and_caches_the_graph(temp_dir, monkeypatch):
+    write_tree(temp_dir, {
+        "main.py": "import model\n\nif __name__ == '__main__':\n    model.run()\n",
+        "model.py": "def run():\n    return 1\n",
+        "examples/demo.py": "import torch\nclass Net(torch.nn.Module):\n    def forward(self, x):\n        return x\n",
+    })
+    monkeypatch.setattr(CodeAnalyzer, "head_commit", lambda self, repo_path=None: "c0ffee")
+    cache = FileResultCache(os.path.join(temp_dir, "cache.db"))
+
+    analyzer = CodeAnalyzer("dummy_url", file_cache=cache)
+    analyzer.repo_path = temp_dir
+    everything = await analyzer.analyze()
+    reachable = await analyzer.analyze(reachable_only=True)
+
+    assert everything.ai_framework_score == 1.0 and everything.reachability is None
+    assert reachable.ai_framework_score == 0.0
+    assert reachable.reachability["entry_points"] == ["main.py"]
+    assert reachable.reachability["reachable_files"] == 2
+
+    monkeypatch.setattr(ImportGraph, "build", lambda *args: pytest.fail("graph rebuilt"))
+    again = await analyzer.analyze(reachable_only=True, entry_points=["examples/demo.py"])
+    assert again.ai_framework_score == 1.0
+
+    with pytest.raises(ValueError):
+        await analyzer.analyze(reachable_only=True, entry_points=["missing.py"])
@@ -0,0 +1,106 @@
+import pytest
+import os
+import asyncio
+import tempfile
+import shutil
+import subprocess
+from analyzer import memory
+from analyzer.cancellation import AnalysisCancelled, CancellationToken
+from analyzer.clone import checkout_path
+from analyzer.code_analyzer import CodeAnalyzer
+from analyzer.jobs import ServiceResources, run_analysis
+from analyzer.memory import MemoryGovernor, estimate_memory
+from analyzer.progress import AnalysisProgress
+from analyzer.result_store import ResultStore
+from analyzer.scanner import SourceFile
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+@pytest.fixture(autouse=True)
+def no_system_memory(monkeypatch):
+    # Decisions depend on the configured limit alone
+    monkeypatch.setattr(memory, "available_memory", lambda: None)
+
+def scanned(count, size=1000):
+    return [SourceFile(f"/r/f{i}.py", f"f{i}.py", "python", size) for i in range(count)]
+
+async def test_governor_admits_downgrades_and_queues():
+    estimate = estimate_memory(scanned(1000))
+    assert estimate.peak_bytes == memory.BASE_COST + 1000 * memory.PARSE_FACTOR + 1000 * memory.PER_FILE_COST
+    assert estimate_memory(scanned(1000), retain_sources=True).retained_bytes == 1000 * 1000 * memory.RETAINED_FACTOR
+
+    governor = MemoryGovernor(limit=estimate.peak_bytes)
+    first = await governor.admit(estimate)
+    assert first.decision == "admitted" and first.sample_size is None
+    assert governor.reserved == estimate.peak_bytes
+
+    # Nothing is left for a second full analysis, nor for a sample of it
+    second = asyncio.ensure_future(governor.admit(estimate))
+    await asyncio.sleep(0.05)
+    assert not second.done() and governor.waiting == 1
+    governor.release(first)
+    admitted = await asyncio.wait_for(second, 1)
+    assert admitted.queued_seconds > 0 and governor.metrics()["queued"] == 1
+
+    # With half the memory free, a sample that fits is analyzed instead
+    half = MemoryGovernor(limit=estimate.sampled(500).peak_bytes)
+    downgraded = await half.admit(estimate)
+    assert downgraded.decision == "downgraded"
+    assert memory.MIN_SAMPLE_SIZE <= downgraded.sample_size <= 500
+    budget = downgraded.budget(None)
+    assert budget.exceeded_by(scanned(1)) and budget.max_interval_width == float("inf")
+
+    # A queued analysis stops waiting when its deadline passes
+    token = CancellationToken(timeout=0.1)
+    with pytest.raises(AnalysisCancelled):
+        await governor.admit(estimate, token, can_sample=False)
+    assert governor.waiting == 0
+
+async def test_analysis_over_the_limit_is_sampled_and_accounted(temp_dir):
+    for i in range(300):
+        with open(os.path.join(temp_dir, f"model{i}.py"), "w") as f:
+            f.write(f"import torch\n\nclass Model{i}(torch.nn.Module):\n    pass\n")
+    governor = MemoryGovernor(limit=memory.BASE_COST + 150 * memory.PER_FILE_COST)
+    analyzer = CodeAnalyzer("dummy_url", memory=governor)
+    analyzer.repo_path = temp_dir
+    events = []
+    result = await analyzer.analyze(progress=AnalysisProgress(events.append))
+
+    assert result.files_total == 300 and result.files_analyzed == result.memory["sample_size"] < 300
+    assert result.memory["decision"] == "downgraded"
+    assert {"scan", "admission", "files"} <= set(result.memory["stages"])
+    assert any(e["event"] == "stage" and e["stage"] == "admission" for e in events)
+
+    metrics = governor.metrics()
+    assert metrics["reserved_bytes"] == 0 and metrics["running"] == 0
+    assert metrics["downgraded"] == 1 and metrics["recent"][0]["decision"] == "downgraded"
+    assert metrics["stage_peaks"]["files"]["peak_rss_bytes"] > 0
+
+async def test_sampled_analysis_is_not_stored(temp_dir):
+    repo = os.path.join(temp_dir, f"sampled_{os.path.basename(temp_dir)}")
+    os.makedirs(repo)
+    for i in range(300):
+        with open(os.path.join(repo, f"model{i}.py"), "w") as f:
+            f.write(f"import torch\n\nclass Model{i}(torch.nn.Module):\n    pass\n")
+    for args in (["init", "-q"], ["add", "-A"], ["commit", "-q", "-m", "models"]):
+        subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=repo, check=True, capture_output=True)
+    repo_url = f"file://{repo}"
+    resources = ServiceResources(
+        ResultStore(os.path.join(temp_dir, "results.db")),
+        fingerprints=False,
+        memory=MemoryGovernor(limit=memory.BASE_COST + 150 * memory.PER_FILE_COST)
+    )
+    try:
+        report = await run_analysis({"repo_url": repo_url}, resources)
+        assert report["memory"]["decision"] == "downgraded" and not report["truncated"]
+        # A sample is never served later as the full result of the commit
+        assert resources.result_store.latest(repo_url) is None
+    finally:
+        path = checkout_path(repo_url)
+        shutil.rmtree(path, ignore_errors=True)
+        if os.path.exists(f"{path}.lock"):
+            os.remove(f"{path}.lock")
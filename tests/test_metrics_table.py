@@ -0,0 +1,66 @@
+import pytest
+import numpy as np
+import os
+import tempfile
+import shutil
+from analyzer.code_analyzer import CodeAnalyzer, FileScores
+from analyzer.execution_verifier import FileExecution
+from analyzer.metrics_table import FileMetricsTable, METRICS
+from analyzer.scanner import SourceFile
+
+@pytest.fixture
+def temp_repo():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+@pytest.fixture
+def table():
+    values = np.zeros((3, len(METRICS)))
+    values[:, METRICS.index('security')] = [0.0, 0.0, 1.0]
+    return FileMetricsTable(
+        paths=['a/__init__.py', 'a/b.py', 'main.rs'],
+        languages=['python', 'python', 'rust'],
+        directories=['a', 'a', '.'],
+        sizes=[0, 100, 300],
+        values=values
+    )
+
+def test_weighted_mean_ignores_empty_files(table):
+    assert table.means()['security'] == pytest.approx(1 / 3)
+    assert table.weighted_means()['security'] == pytest.approx(0.75)
+
+def test_percentiles(table):
+    percentiles = table.percentiles((50, 100))
+    assert percentiles['security'] == {'p50': 0.0, 'p100': 1.0}
+
+def test_rollups(table):
+    by_language = table.rollup('language')
+    assert by_language['python']['files'] == 2
+    assert by_language['python']['bytes'] == 100
+    assert by_language['rust']['security'] == 1.0
+    assert set(table.rollup('directory')) == {'a', '.'}
+
+def test_execution_column_is_relative_to_the_checks_run():
+    record = FileScores(
+        source=SourceFile('/r/net.py', 'net.py', 'python', 10), code_quality=0.5, security=1.0, frameworks={},
+        execution=FileExecution(is_python=True, valid_syntax=True, checks_passed=2, checks_total=5)
+    )
+    # The check count travels with cached scores, so a signature change never skews the ratio
+    cached = FileScores.from_dict(record.source, 'h', record.to_dict())
+    assert FileMetricsTable.from_file_scores([cached]).column('execution')[0] == pytest.approx(0.4)
+
+async def test_analysis_breakdown(temp_repo):
+    os.makedirs(os.path.join(temp_repo, "pkg"))
+    with open(os.path.join(temp_repo, "pkg", "__init__.py"), "w") as f:
+        f.write("")
+    with open(os.path.join(temp_repo, "pkg", "model.py"), "w") as f:
+        f.write("import torch\nclass Model(torch.nn.Module):\n    def forward(self, x):\n        return x\n")
+    analyzer = CodeAnalyzer("dummy_url")
+    analyzer.repo_path = temp_repo
+    
+    result = await analyzer.analyze(breakdown=True)
+    assert result.breakdown['files'] == 2
+    assert result.breakdown['by_directory']['pkg']['files'] == 2
+    assert result.breakdown['weighted_mean']['ai_framework'] == 1.0
+    assert (await analyzer.analyze()).breakdown is None
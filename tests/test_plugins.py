@@ -0,0 +1,103 @@
+import pytest
+import os
+import tempfile
+import shutil
+import threading
+from analyzer.code_analyzer import CodeAnalyzer
+from analyzer.plugins import (
+    INPUTS, AnalysisContext, AnalyzerPlugin, StageScheduler, load_plugins, register_input
+)
+
+ANCHOR_PROGRAM = """use anchor_lang::prelude::*;
+
+#[program]
+pub mod vault {
+    use super::*;
+    pub fn deposit(ctx: Context<Deposit>, amount: u64) -> Result<()> {
+        ctx.accounts.vault.total += amount;
+        Ok(())
+    }
+}
+
+#[derive(Accounts)]
+pub struct Deposit<'info> {
+    #[account(mut)]
+    pub vault: Account<'info, Vault>,
+    pub authority: AccountInfo<'info>,
+}
+"""
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+class Probe(AnalyzerPlugin):
+    requires = ('files', 'counted')
+
+    def __init__(self, name, barrier=None, fail=False):
+        self.name = name
+        self.barrier = barrier
+        self.fail = fail
+
+    def analyze(self, inputs):
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)  # Only passes when both probes run at once
+        if self.fail:
+            raise RuntimeError("boom")
+        return {'files': len(inputs['files']), 'counted': inputs['counted']}
+
+async def test_scheduler_shares_inputs_and_runs_plugins_concurrently(temp_dir):
+    open(os.path.join(temp_dir, "main.py"), "w").close()
+    calls = []
+
+    @register_input('counted', requires=('files',))
+    def provide_counted(context, files):
+        calls.append(len(files))
+        return len(calls)
+
+    try:
+        barrier = threading.Barrier(2)
+        plugins = [Probe('one', barrier), Probe('two', barrier), Probe('broken', fail=True)]
+        results = await StageScheduler(max_workers=4).run(AnalysisContext(temp_dir), plugins)
+    finally:
+        del INPUTS['counted']
+
+    assert calls == [1]
+    assert results['one'] == results['two'] == {'files': 1, 'counted': 1}
+    assert results['broken'] == {'error': 'boom'}
+
+def test_unknown_plugins_and_inputs_are_rejected():
+    with pytest.raises(ValueError):
+        load_plugins(['no-such-plugin'])
+
+    class Needy(AnalyzerPlugin):
+        name = 'needy'
+        requires = ('telepathy',)
+        def analyze(self, inputs):
+            return {}
+    with pytest.raises(ValueError):
+        StageScheduler.required_inputs([Needy()])
+
+async def test_anchor_rule_pack_runs_with_the_file_pass(temp_dir):
+    os.makedirs(os.path.join(temp_dir, "programs", "vault", "src"))
+    with open(os.path.join(temp_dir, "Anchor.toml"), "w") as f:
+        f.write("[programs.localnet]\nvault = \"Vau1t11111111111111111111111111111111111111\"\n")
+    with open(os.path.join(temp_dir, "programs", "vault", "src", "lib.rs"), "w") as f:
+        f.write(ANCHOR_PROGRAM)
+
+    analyzer = CodeAnalyzer("dummy_url")
+    analyzer.repo_path = temp_dir
+    result = await analyzer.analyze(plugins=['anchor'])
+
+    anchor = result.plugin_results['anchor']
+    assert anchor['applicable'] and anchor['programs'] == 1
+    assert {finding['rule'] for finding in anchor['findings']} == {
+        'unchecked-account', 'missing-signer', 'unchecked-arithmetic'
+    }
+    assert anchor['findings'][0]['line'] == 16
+
+    other = CodeAnalyzer("dummy_url")
+    other.repo_path = os.path.join(temp_dir, "programs")
+    assert (await other.analyze(plugins=['anchor'])).plugin_results['anchor']['applicable'] is False
@@ -0,0 +1,43 @@
+import pytest
+import os
+import tempfile
+import shutil
+from analyzer.code_analyzer import CodeAnalyzer
+from analyzer.progress import AnalysisProgress, parse_clone_progress
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+def test_parse_clone_progress():
+    fields = parse_clone_progress("Receiving objects:  45% (450/1000), 1.50 MiB | 2.00 MiB/s")
+    assert fields == {
+        'phase': 'Receiving objects', 'percent': 45, 'objects': 450,
+        'objects_total': 1000, 'bytes_received': int(1.5 * 1024 * 1024)
+    }
+    assert parse_clone_progress("Resolving deltas: 100% (7/7), done.")['percent'] == 100
+    assert parse_clone_progress("Cloning into 'repo'...") is None
+
+def test_throttled_events():
+    events = []
+    progress = AnalysisProgress(events.append, interval=60)
+    assert progress.due('scanned') and not progress.due('scanned')
+    assert progress.due('clone')
+    assert not AnalysisProgress().due('scanned')
+
+async def test_analysis_reports_stages_and_interim_scores(temp_dir):
+    for name in ("a.py", "b.rs"):
+        with open(os.path.join(temp_dir, name), "w") as f:
+            f.write("import torch\n")
+    events = []
+    analyzer = CodeAnalyzer("dummy_url")
+    analyzer.repo_path = temp_dir
+    result = await analyzer.analyze(progress=AnalysisProgress(events.append, interval=0))
+    
+    assert events[0] == {'event': 'discovered', 'files': 2, 'bytes': 26}
+    scanned = [e for e in events if e['event'] == 'scanned']
+    assert [e['files'] for e in scanned][-1] == 2
+    assert scanned[-1]['scores']['code_quality'] == result.code_quality_score
+    assert {'event': 'stage', 'stage': 'files', 'status': 'done'} in events
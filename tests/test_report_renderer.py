@@ -0,0 +1,112 @@
+import pytest
+import os
+import json
+import tempfile
+import shutil
+from analyzer.code_analyzer import AnalysisResult
+from analyzer.report_generator import ReportGenerator
+from analyzer.report_renderer import ArticleRenderer, CompiledTemplate, load_structured_results
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+def make_result(ai: float, quality: float) -> AnalysisResult:
+    return AnalysisResult(
+        code_quality_score=quality,
+        ai_framework_score=ai,
+        execution_score=0.7,
+        security_score=0.01,
+        issues=[],
+        recommendations=["Add unit tests"]
+    )
+
+def test_template_keeps_code_braces():
+    template = CompiledTemplate("fn main() { run(); }\nScore: {ai_score}/10 {unknown}")
+    assert template.fields == ["ai_score", "unknown"]
+    assert template.render({"ai_score": "8.3"}) == "fn main() { run(); }\nScore: 8.3/10 {unknown}"
+
+def test_report_emits_markdown_and_json(temp_dir):
+    generator = ReportGenerator(make_result(0.83, 0.23), repo_url="https://github.com/a/rig")
+    md_path, json_path = generator.save(temp_dir, "rig")
+    
+    with open(json_path) as f:
+        data = json.load(f)
+    assert data["scores"]["ai_framework"] == 0.83
+    assert data["bands"]["ai_framework"] == "Strong"
+    assert data["overall_score"] == pytest.approx(0.529)
+    # /analyze reports the same overall score the result store and the articles use
+    assert generator.generate_summary().overall_score == pytest.approx(0.529)
+    with open(md_path) as f:
+        assert "**Overall Score**: 0.53 (Fair)" in f.read()
+
+def test_batch_render_from_structured_results(temp_dir):
+    reports, templates, output = (os.path.join(temp_dir, d) for d in ("reports", "templates", "out"))
+    ReportGenerator(make_result(0.83, 0.23)).save(reports, "rig")
+    ReportGenerator(make_result(0.6, 0.1)).save(reports, "eliza")
+    os.makedirs(templates)
+    with open(os.path.join(templates, "rig_article.md"), "w") as f:
+        f.write("AI (Score: {ai_score}/10), overall {overall_score}/10")
+    with open(os.path.join(templates, "summary.md"), "w") as f:
+        f.write("Rig {rig_ai_score} vs Eliza {eliza_ai_score}")
+        
+    renderer = ArticleRenderer(templates)
+    written = renderer.write_all(load_structured_results(reports), output, comparative="comparative.md")
+    
+    assert len(written) == 3
+    with open(os.path.join(output, "rig_article.md")) as f:
+        assert f.read() == "AI (Score: 8.3/10), overall 5.3/10"
+    with open(os.path.join(output, "summary.md")) as f:
+        assert f.read() == "Rig 8.3 vs Eliza 6.0"
+    with open(os.path.join(output, "comparative.md")) as f:
+        comparative = f.read()
+    assert comparative.index("### rig") < comparative.index("### eliza")
+
+def test_partial_results_render_as_not_evaluated(temp_dir):
+    reports, templates = os.path.join(temp_dir, "reports"), os.path.join(temp_dir, "templates")
+    partial = make_result(0.9, 0.5)
+    partial.code_quality_score = partial.execution_score = partial.security_score = None
+    ReportGenerator(partial).save(reports, "eliza")
+    ReportGenerator(make_result(0.6, 0.1)).save(reports, "rig")
+    os.makedirs(templates)
+    with open(os.path.join(templates, "eliza_article.md"), "w") as f:
+        f.write("AI {ai_score}, code {code_score} ({code_band}), overall {overall_score}")
+
+    results = load_structured_results(reports)
+    assert results["eliza"]["overall_score"] is None and "code_quality" not in results["eliza"]["scores"]
+    rendered = ArticleRenderer(templates).render_all(results, comparative="comparative.md")
+    assert rendered["eliza_article.md"] == "AI 9.0, code n/a (n/a), overall n/a"
+
+    comparative = rendered["comparative.md"]
+    # The complete result ranks first overall; the partial one is ranked only on what it evaluated
+    assert comparative.index("### rig") < comparative.index("### eliza")
+    assert "- Code Quality: n/a" in comparative and "- Overall: n/a" in comparative
+    assert "1. **eliza** (9.0/10)" in comparative
+    assert comparative.split("### Security")[-1].count("**eliza**") == 0
+
+def test_markdown_reports_without_json_are_read(temp_dir):
+    reports, templates = os.path.join(temp_dir, "reports"), os.path.join(temp_dir, "templates")
+    os.makedirs(reports)
+    with open(os.path.join(reports, "aether_analysis_report.md"), "w") as f:
+        f.write("- **AI Framework Score**: 8.3/10\n- **Code Quality Score**: 0.0/10\n"
+                "- **Execution Score**: 9.5/10\n- **Security Score**: 0.1/10\n")
+    with open(os.path.join(reports, "notes_analysis_report.md"), "w") as f:
+        f.write("No scores yet\n")
+    ReportGenerator(make_result(0.83, 0.23)).save(reports, "rig")
+    os.makedirs(templates)
+    with open(os.path.join(templates, "comparative_article.md"), "w") as f:
+        f.write("Aether {aether_overall_score}, Rig {rig_overall_score}")
+    with open(os.path.join(templates, "eliza_vs_rig.md"), "w") as f:
+        f.write("Eliza {eliza_ai_score}, Rig {rig_ai_score}")
+
+    results = load_structured_results(reports)
+    assert set(results) == {"aether", "rig"}
+    assert results["aether"]["scores"]["execution"] == pytest.approx(0.95)
+    assert results["aether"]["overall_score"] == pytest.approx(0.535)
+    renderer = ArticleRenderer(templates)
+    rendered = renderer.render_all(results)
+    # The comparative article gets every project's fields; a template missing a project is not rendered
+    assert rendered == {"comparative_article.md": "Aether 5.4, Rig 5.3"}
+    assert renderer.missing_fields("eliza_vs_rig.md", results) == ["eliza_ai_score"]
@@ -0,0 +1,54 @@
+import pytest
+import os
+import tempfile
+import shutil
+from analyzer.code_analyzer import AnalysisResult
+from analyzer.result_store import ResultStore, band_range, score_band
+
+@pytest.fixture
+def store():
+    temp_dir = tempfile.mkdtemp()
+    yield ResultStore(os.path.join(temp_dir, "results.db"))
+    shutil.rmtree(temp_dir)
+
+def make_result(score: float) -> AnalysisResult:
+    return AnalysisResult(
+        code_quality_score=score,
+        ai_framework_score=score,
+        execution_score=score,
+        security_score=score,
+        issues=[],
+        recommendations=[]
+    )
+
+def test_history_and_latest(store):
+    store.save("https://github.com/a/one", make_result(0.2), commit_sha="c1", analyzed_at=1)
+    store.save("https://github.com/a/one", make_result(0.5), commit_sha="c2", analyzed_at=2)
+    
+    history = store.history("https://github.com/a/one")
+    assert [r.commit_sha for r in history] == ["c2", "c1"]
+    assert store.latest("https://github.com/a/one").overall_score == pytest.approx(0.5)
+    assert store.find("https://github.com/a/one", "c1").analyzed_at == 1
+
+def test_top_uses_latest_result_per_repo(store):
+    store.save("https://github.com/a/one", make_result(0.9))
+    store.save("https://github.com/a/one", make_result(0.1))
+    store.save("https://github.com/a/two", make_result(0.5))
+    
+    top = store.top(n=5)
+    assert [r.repo_url for r in top] == ["https://github.com/a/two", "https://github.com/a/one"]
+
+def test_query_by_band_and_range(store):
+    for i, score in enumerate([0.95, 0.65, 0.61, 0.3]):
+        store.save(f"https://github.com/a/{i}", make_result(score))
+        
+    assert len(store.query(band="good")) == 2
+    assert len(store.query(band="Exceptional")) == 1
+    assert len(store.query(component="security", max_score=0.5)) == 1
+    with pytest.raises(ValueError):
+        store.query(component="unknown")
+
+def test_score_bands():
+    assert score_band(0.83) == "Strong"
+    assert score_band(0.05) == "Limited"
+    assert band_range("Fair") == (0.4, 0.6)
@@ -0,0 +1,75 @@
+import pytest
+import random
+import os
+import tempfile
+import shutil
+from analyzer.code_analyzer import CodeAnalyzer
+from analyzer.sampling import AnalysisBudget, stratified_sample, stratum_key
+from analyzer.scanner import SourceFile, scan_source_files
+
+@pytest.fixture
+def temp_repo():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+def create_large_repo(repo_path: str):
+    """Create a repository with several language/directory strata"""
+    for directory in ("models", "utils"):
+        os.makedirs(os.path.join(repo_path, directory))
+        for i in range(30):
+            with open(os.path.join(repo_path, directory, f"mod_{i}.py"), "w") as f:
+                f.write("import torch\nclass Model(torch.nn.Module):\n    def forward(self, x):\n        return x\n")
+    os.makedirs(os.path.join(repo_path, "web"))
+    for i in range(10):
+        with open(os.path.join(repo_path, "web", f"page_{i}.ts"), "w") as f:
+            f.write("interface Props { name: string }\n")
+
+def test_stratified_sample_covers_every_stratum(temp_repo):
+    create_large_repo(temp_repo)
+    files = scan_source_files(temp_repo)
+    sample = stratified_sample(files, 14, random.Random(0))
+    
+    assert len(sample) == 14
+    assert {stratum_key(f) for f in sample} == {stratum_key(f) for f in files}
+
+def test_stratified_sample_stays_within_budget_on_skewed_strata():
+    files = [SourceFile(f"/r/core/m{i}.py", f"core/m{i}.py", "python", 10) for i in range(1000)]
+    files += [SourceFile(f"/r/d{i}/m.py", f"d{i}/m.py", "python", 10) for i in range(99)]
+    sample = stratified_sample(files, 100, random.Random(0))
+    
+    assert len(sample) <= 100
+    assert {stratum_key(f) for f in sample} == {stratum_key(f) for f in files}
+
+async def test_small_repo_is_fully_analyzed(temp_repo):
+    create_large_repo(temp_repo)
+    analyzer = CodeAnalyzer("dummy_url")
+    analyzer.repo_path = temp_repo
+    
+    result = await analyzer.analyze(budget=AnalysisBudget(max_files=1000))
+    assert not result.sampled
+    assert result.confidence_intervals is None
+    assert result.files_analyzed == 70
+
+async def test_large_repo_is_sampled_with_intervals(temp_repo):
+    create_large_repo(temp_repo)
+    analyzer = CodeAnalyzer("dummy_url")
+    analyzer.repo_path = temp_repo
+    
+    budget = AnalysisBudget(max_files=20, sample_size=20, max_interval_width=1.0, seed=1)
+    result = await analyzer.analyze(budget=budget)
+    assert result.sampled
+    assert result.files_analyzed == 20
+    assert result.files_total == 70
+    for low, high in result.confidence_intervals.values():
+        assert 0 <= low <= high <= 1
+
+async def test_wide_interval_escalates_to_full_scan(temp_repo):
+    create_large_repo(temp_repo)
+    analyzer = CodeAnalyzer("dummy_url")
+    analyzer.repo_path = temp_repo
+    
+    budget = AnalysisBudget(max_files=20, sample_size=20, max_interval_width=-1.0, seed=1)
+    result = await analyzer.analyze(budget=budget)
+    assert not result.sampled
+    assert result.files_analyzed == 70
@@ -0,0 +1,75 @@
+import pytest
+import os
+import subprocess
+import tempfile
+import shutil
+from analyzer.code_analyzer import CodeAnalyzer
+from analyzer.file_cache import FileResultCache
+from analyzer.secrets import SecretScanner, shannon_entropy
+
+AWS_KEY = "AKIA" + "Z7Q2M4N6P8R1T3V5"
+GITHUB_TOKEN = "ghp_" + "aB3dE5fG7hJ9kL1mN3pQ5rS7tU9vW1xY3zA5"
+GENERATED = "Zx8Qv2Lm7Rt4Kp9Wn3Hd6Fs1Jb5Gc0Ye"
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+def git(repo, *args):
+    subprocess.run(
+        ["git", "-c", "user.email=dev@example.com", "-c", "user.name=dev", *args],
+        cwd=repo, check=True, capture_output=True
+    )
+
+def commit_file(repo, name, content, message):
+    with open(os.path.join(repo, name), "w") as f:
+        f.write(content)
+    git(repo, "add", "-A")
+    git(repo, "commit", "-m", message)
+
+def test_provider_rules_and_entropy():
+    content = (
+        f'aws = "{AWS_KEY}"\n'
+        f'# token {GITHUB_TOKEN}\n'
+        f'client = Client(key="{GENERATED}")\n'
+        'digest = "0123456789abcdef0123456789abcdef01234567"\n'
+        'api_token = "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b"\n'
+        'label = "configuration_settings_for_the_model"\n'
+        f'not_a_key = "XAKIA{AWS_KEY[4:]}"\n'
+    )
+    findings = SecretScanner().scan(content, "app.py")
+    assert [(f.rule, f.line) for f in findings] == [
+        ("aws-access-key", 1), ("github-token", 2), ("high-entropy-string", 3), ("high-entropy-string", 5)
+    ]
+    assert all(f.path == "app.py" and GENERATED not in f.preview for f in findings)
+    assert shannon_entropy(["aaaa", "abcd"]) == pytest.approx([0.0, 2.0])
+
+async def test_history_secrets_are_scanned_once_per_blob(temp_dir, monkeypatch):
+    repo = os.path.join(temp_dir, "repo")
+    os.makedirs(repo)
+    git(repo, "init", "-q")
+    commit_file(repo, "config.py", f'KEY = "{AWS_KEY}"\n', "add key")
+    commit_file(repo, "config.py", 'KEY = os.environ["KEY"]\n', "remove key")
+    cache = FileResultCache(os.path.join(temp_dir, "cache.db"))
+    analyzer = CodeAnalyzer("https://example.com/repo", file_cache=cache)
+    analyzer.repo_path = repo
+
+    clean = await analyzer.analyze(components=["security"])
+    leaked = await analyzer.analyze(components=["security"], secret_history=True)
+    assert clean.issues == [] and clean.secret_history is None
+    assert [issue["rule"] for issue in leaked.issues] == ["aws-access-key"]
+    assert leaked.issues[0]["path"] == "config.py" and leaked.issues[0]["blob"]
+    assert leaked.security_score == pytest.approx(clean.security_score * 0.5)
+    assert leaked.secret_history["blobs_scanned"] == 2
+
+    scanned = []
+    original = SecretScanner.scan
+    monkeypatch.setattr(SecretScanner, "scan", lambda self, content, path="": scanned.append(path) or original(self, content, path))
+    commit_file(repo, "model.py", "import torch\n", "add model")
+    again = await analyzer.analyze(components=["security"], secret_history=True)
+    # Only the new blob is read from the history; the checkout is scanned by the file pass
+    assert scanned == ["model.py", "model.py"]
+    assert again.secret_history["incremental"] and again.secret_history["blobs_scanned"] == 3
+    assert [issue["rule"] for issue in again.issues] == ["aws-access-key"]
@@ -0,0 +1,56 @@
+import pytest
+import os
+import gzip
+import json
+import tempfile
+import shutil
+from analyzer import serialization
+from analyzer.file_cache import FileResultCache
+from analyzer.serialization import (
+    SerializationError, dumps, encode_response, loads, negotiate_encoding, negotiate_format
+)
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+ENTRY = {"code_quality": 0.5, "secrets": [["aws-access-key", 3, "AKIA****"]], "execution": [True, True, 2]}
+
+@pytest.mark.parametrize("format", serialization.available_formats())
+def test_payloads_round_trip_behind_a_versioned_header(format):
+    data = dumps(ENTRY, format)
+    assert data[2] == serialization.SCHEMA_VERSION
+    assert loads(data) == ENTRY
+    # Entries cached before the header are bare JSON
+    assert loads(json.dumps(ENTRY).encode()) == ENTRY
+    with pytest.raises(SerializationError):
+        loads(data[:2] + bytes((serialization.SCHEMA_VERSION + 1,)) + data[3:])
+
+def test_file_cache_reads_legacy_entries_and_skips_unreadable_ones(temp_dir):
+    cache = FileResultCache(os.path.join(temp_dir, "cache.db"), memory_entries=0)
+    cache.put("fresh", ENTRY)
+    assert cache.get("fresh") == ENTRY
+    with cache._connect() as conn:
+        conn.execute("INSERT INTO entries VALUES ('legacy', ?, 1, 0)", (json.dumps(ENTRY).encode(),))
+        conn.execute("INSERT INTO entries VALUES ('future', ?, 1, 0)", (serialization.MAGIC + b'\x63\x01{}',))
+    assert cache.get("legacy") == ENTRY
+    assert cache.get("future") is None
+
+def test_content_negotiation(monkeypatch):
+    assert negotiate_format(None) == "json"
+    assert negotiate_format("application/json, application/msgpack;q=0.5") == "json"
+    monkeypatch.setattr(serialization, "available_formats", lambda: ("msgpack", "json"))
+    assert negotiate_format("application/msgpack") == "msgpack"
+    assert negotiate_format("application/x-msgpack, */*;q=0.1") == "msgpack"
+
+    monkeypatch.setattr(serialization, "available_encodings", lambda: ("gzip",))
+    assert negotiate_encoding("gzip, deflate, br", 10) is None
+    assert negotiate_encoding("deflate, br", 10000) is None
+    assert negotiate_encoding("zstd, gzip;q=0.8", 10000) == "gzip"
+
+    report = {"success": True, "report": {"issues": [ENTRY] * 100}}
+    body, headers = encode_response(report, "application/json", "gzip")
+    assert headers["Content-Encoding"] == "gzip" and headers["Content-Type"] == "application/json"
+    assert json.loads(gzip.decompress(body)) == report
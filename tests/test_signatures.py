@@ -0,0 +1,58 @@
+import pytest
+import os
+import json
+import tempfile
+import shutil
+from analyzer.ai_detector import AIFrameworkDetector
+from analyzer.execution_verifier import ExecutionVerifier
+from analyzer.signatures import DEFAULT_SIGNATURES_PATH, SignatureRegistry, Signatures
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+def write_signatures(path, data, mtime):
+    with open(path, "w") as f:
+        json.dump(data, f)
+    os.utime(path, (mtime, mtime))
+
+def bundled():
+    with open(DEFAULT_SIGNATURES_PATH) as f:
+        return json.load(f)
+
+def test_bundled_signatures_drive_detection():
+    signatures = Signatures.load(DEFAULT_SIGNATURES_PATH)
+    assert signatures.version.startswith(f"{signatures.schema_version}-")
+    assert "pytorch" in signatures.frameworks
+
+    content = "import torch\nclass Net(torch.nn.Module):\n    def forward(self, x):\n        return x\n"
+    assert AIFrameworkDetector(signatures=signatures).score_content(content)["pytorch"] == 1.0
+    # model initialization and inference method checks pass
+    execution = ExecutionVerifier(signatures=signatures).check_content("net.py", content)
+    assert execution.checks_passed == 2 and execution.checks_total == len(signatures.execution_checks)
+
+def test_registry_reloads_changed_signatures_and_keeps_valid_ones(temp_dir):
+    path = os.path.join(temp_dir, "signatures.json")
+    data = bundled()
+    write_signatures(path, data, 1000)
+    registry = SignatureRegistry(path, reload_interval=0)
+    first = registry.current()
+    assert registry.current() is first
+
+    data["frameworks"]["jax"] = {"imports": ["import jax"], "patterns": ["jax.jit"]}
+    write_signatures(path, data, 2000)
+    second = registry.current()
+    assert second.version != first.version
+    assert AIFrameworkDetector(signatures=second).score_content("import jax\njax.jit(f)") == {"jax": 1.0}
+
+    data["security_patterns"]["broken"] = "(unclosed"
+    write_signatures(path, data, 3000)
+    assert registry.current() is second
+
+def test_invalid_signatures_are_rejected(temp_dir):
+    data = bundled()
+    del data["execution_checks"]
+    with pytest.raises(ValueError):
+        Signatures(data, "0" * 64)
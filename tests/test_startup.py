@@ -0,0 +1,24 @@
+import os
+import sys
+import subprocess
+from pathlib import Path
+
+SRC_DIR = str(Path(__file__).parent.parent / "src")
+
+def loaded_modules(statement: str) -> set:
+    """Run a statement in a fresh interpreter and return the modules it loaded"""
+    proc = subprocess.run(
+        [sys.executable, "-c", f"{statement}; import sys; print(' '.join(sys.modules))"],
+        env=dict(os.environ, PYTHONPATH=SRC_DIR),
+        capture_output=True, text=True, check=True
+    )
+    return set(proc.stdout.split())
+
+def test_package_import_is_lazy():
+    modules = loaded_modules("import analyzer")
+    assert "analyzer.code_analyzer" not in modules
+
+def test_analyzer_import_skips_heavy_dependencies():
+    modules = loaded_modules("from analyzer import CodeAnalyzer, ReportGenerator")
+    assert "analyzer.code_analyzer" in modules
+    assert not {"git", "radon", "numpy"} & modules
@@ -0,0 +1,107 @@
+import pytest
+from analyzer.engine import AnalysisEngine
+from analyzer.scanner import SourceFile
+from analyzer.syntax import SyntaxTreeCache, parse, parse_source
+
+RUST_SOURCE = '''//! Inference engine
+use std::io;
+
+/// Loads a model
+pub fn load(
+    path: &str,
+) -> Result<Model, io::Error> {
+    let s = "fn fake() {}";
+    let raw = r#"struct Hidden { }"#;
+    /* outer /* nested */ still comment fn ghost() {} */
+    Ok(Model::new())
+}
+
+// match commented_out { _ => () }
+impl<T: Clone> Runner for Engine<T> {
+    fn run(&self) {}
+}
+'''
+
+TS_SOURCE = '''/** Chat client */
+export default class Client {
+  send(text: string) { return text.replace(/[{]/g, ""); }
+}
+// function ghost() {}
+export const handler = async (req: Request): Promise<Response> => {
+  const pattern = "class Fake {";
+  return new Response();
+};
+'''
+
+def test_rust_items_span_lines_and_skip_comments_and_literals():
+    tree = parse('rust', RUST_SOURCE)
+    items = {(item.kind, item.name): item for item in tree.items}
+
+    assert set(items) == {('fn', 'load'), ('impl', 'Engine'), ('fn', 'run')}
+    load = items[('fn', 'load')]
+    assert load.public and (load.line, load.end_line) == (5, 12)
+    assert load.header == "pub fn load( path: &str, ) -> Result<Model, io::Error>"
+    assert tree.doc_lines == {1, 4}
+    assert 14 in tree.comment_lines
+    assert "match" not in tree.code and "ghost" not in tree.code
+
+def test_typescript_items_and_regex_literals():
+    tree = parse('typescript', TS_SOURCE)
+    items = {(item.kind, item.name): item for item in tree.items}
+
+    assert set(items) == {('class', 'Client'), ('function', 'handler')}
+    assert items[('class', 'Client')].public
+    assert items[('class', 'Client')].end_line == 4
+    assert items[('function', 'handler')].end_line == 9
+    assert tree.doc_lines == {1}
+
+def test_trees_are_cached_per_blob():
+    cache = SyntaxTreeCache(max_entries=1)
+    first = cache.parse('rust', RUST_SOURCE, 'a')
+    assert cache.parse('rust', "fn other() {}", 'a') is first
+    cache.parse('rust', "fn other() {}", 'b')
+    assert cache.parse('rust', RUST_SOURCE, 'a') is not first
+    assert parse_source('rust', RUST_SOURCE) is parse_source('rust', RUST_SOURCE)
+
+def test_rust_quality_matches_multiline_signatures_not_comments():
+    engine = AnalysisEngine()
+    commented = "// pub fn load() -> Result<(), Error> { match x {} }\nfn main() {}\n"
+    split = "pub fn load(\n    path: &str,\n) -> Result<\n    Model,\n    Error,\n> {\n    todo!()\n}\n"
+
+    assert engine._analyze_rust_quality(parse('rust', commented)) == pytest.approx(0.3 * 2 / 3)
+    assert engine._analyze_rust_quality(parse('rust', split)) > 0.3 * 0.4
+
+RUST_QUALITY_SOURCE = '''/// Wraps `try { x } catch (e) { log.info(e) }`, see match on Option<Model>
+pub fn load(path: &str) -> Result<Model, Error> {
+    let prompt = "system_prompt = assert test_ok";
+    Model::open(path, prompt)
+}
+'''
+
+TS_QUALITY_SOURCE = '''// try { run() } catch (e) { logger.error(e) } with useState<Props>
+export function load(path: string) {
+    const hint = "interface Hidden {} throw new Error('x') model_config = 1";
+    return fetch(path);
+}
+'''
+
+def test_rust_quality_score_ignores_doc_comments_but_not_strings():
+    source = SourceFile('lib.rs', 'lib.rs', 'rust', len(RUST_QUALITY_SOURCE))
+    score = AnalysisEngine().analyze_file_quality(source, RUST_QUALITY_SOURCE)
+
+    # docs 2/6 lines, error handling Result only (1/6), types pub fn (1/5)
+    base = min(1, 2 / 6 * 2) * 0.3 + 1 / 6 * 0.4 + 1 / 5 * 0.3
+    # prompt template and testing, both from the string (2/8)
+    assert score == pytest.approx(base * 0.4 + 2 / 8 * 0.6)
+    assert score == pytest.approx(0.280667, abs=1e-6)
+
+def test_typescript_quality_score_ignores_comments_but_not_strings():
+    source = SourceFile('load.ts', 'load.ts', 'typescript', len(TS_QUALITY_SOURCE))
+    score = AnalysisEngine().analyze_file_quality(source, TS_QUALITY_SOURCE)
+
+    # docs 1/6 lines, types ": string" and the quoted interface (2/5),
+    # react export function (1/5), error handling the quoted throw (1/5)
+    base = 1 / 6 * 2 * 0.2 + 2 / 5 * 0.3 + 1 / 5 * 0.3 + 1 / 5 * 0.2
+    # model configuration, type annotation and modular structure (3/8)
+    assert score == pytest.approx(base * 0.4 + 3 / 8 * 0.6)
+    assert score == pytest.approx(0.339667, abs=1e-6)
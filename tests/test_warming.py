@@ -0,0 +1,174 @@
+import pytest
+import os
+import fcntl
+import asyncio
+import tempfile
+import shutil
+import subprocess
+from analyzer.clone import checkout_path
+from analyzer.code_analyzer import CodeAnalyzer
+from analyzer.jobs import ServiceResources, run_analysis
+from analyzer.progress import AnalysisProgress
+from analyzer.result_store import ResultStore
+from analyzer.warming import CacheWarmer, RequestTracker
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+def git(repo, *args):
+    return subprocess.run(
+        ['git', '-c', 'user.name=t', '-c', 'user.email=t@t', *args],
+        cwd=repo, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+def commit(repo, rel_path, content):
+    with open(os.path.join(repo, rel_path), "w") as f:
+        f.write(content)
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-q', '-m', rel_path)
+    return git(repo, 'rev-parse', 'HEAD')
+
+def remove_clone(repo_url):
+    path = checkout_path(repo_url)
+    shutil.rmtree(path, ignore_errors=True)
+    if os.path.exists(f"{path}.lock"):
+        os.remove(f"{path}.lock")
+
+def test_requests_are_ranked_by_decayed_frequency():
+    now = [0.0]
+    tracker = RequestTracker(half_life=10.0, max_tracked=2, clock=lambda: now[0])
+    for _ in range(4):
+        tracker.record("old")
+    now[0] = 20.0
+    tracker.record("new")
+    tracker.record("new")
+    # Four requests two half-lives ago weigh as much as one today
+    assert tracker.top(2) == [("new", 2.0), ("old", 1.0)]
+    tracker.record("newest")
+    assert [url for url, _ in tracker.top(5)] == ["new", "newest"]
+    assert tracker.idle_for() == 0.0
+
+async def test_warmer_stores_results_of_new_commits(temp_dir):
+    repo = os.path.join(temp_dir, f"warm_{os.path.basename(temp_dir)}")
+    os.makedirs(repo)
+    git(repo, 'init', '-q')
+    first = commit(repo, "model.py", "import torch\nclass Model(torch.nn.Module):\n    def forward(self, x):\n        return x\n")
+    repo_url = f"file://{repo}"
+    resources = ServiceResources(ResultStore(os.path.join(temp_dir, "results.db")), fingerprints=False)
+    tracker = RequestTracker()
+    warmer = CacheWarmer(resources, tracker, quiet_period=0.0)
+    try:
+        assert await warmer.warm_once() == []
+        tracker.record(repo_url)
+        assert await warmer.warm_once() == [repo_url]
+        assert resources.result_store.latest(repo_url).commit_sha == first
+        # Nothing to do until the repository moves
+        assert await warmer.warm_once() == []
+
+        # A request for the warmed commit is served from the store
+        events = []
+        report = await run_analysis({"repo_url": repo_url}, resources, progress=AnalysisProgress(events.append))
+        assert [e["status"] for e in events] == ["hit"]
+        assert report["detailed_scores"]["AI Framework Integration"] == 1.0
+
+        second = commit(repo, "serve.py", "print('hi')\n")
+        assert await warmer.warm_once() == [repo_url]
+        latest = resources.result_store.latest(repo_url)
+        assert latest.commit_sha == second and latest.files_total == 2
+    finally:
+        remove_clone(repo_url)
+
+async def test_analyses_of_a_repository_hold_its_clone_in_turn(temp_dir):
+    # Repositories of the same name under different owners never share a clone
+    assert checkout_path("https://github.com/a/rig") != checkout_path("https://github.com/b/rig")
+
+    repo = os.path.join(temp_dir, f"turns_{os.path.basename(temp_dir)}")
+    os.makedirs(repo)
+    git(repo, 'init', '-q')
+    first = commit(repo, "model.py", "import torch\n")
+    repo_url = f"file://{repo}"
+    resources = ServiceResources(ResultStore(os.path.join(temp_dir, "results.db")), fingerprints=False)
+    try:
+        async with CodeAnalyzer(repo_url).checkout(commit=first) as path:
+            second = commit(repo, "serve.py", "print('hi')\n")
+            # A request for the new commit waits instead of checking it out under this reader
+            pending = asyncio.ensure_future(run_analysis({"repo_url": repo_url}, resources))
+            await asyncio.sleep(0.5)
+            assert not pending.done()
+            assert git(path, 'rev-parse', 'HEAD') == first
+        await pending
+        latest = resources.result_store.latest(repo_url)
+        assert latest.commit_sha == second and latest.files_total == 2
+    finally:
+        remove_clone(repo_url)
+
+async def test_concurrent_analyses_of_one_analyzer_read_their_own_clone(temp_dir):
+    repo = os.path.join(temp_dir, f"shared_{os.path.basename(temp_dir)}")
+    os.makedirs(repo)
+    git(repo, 'init', '-q')
+    commit(repo, "model.py", "import torch\n")
+    head = commit(repo, "serve.py", "print('hi')\n")
+    repo_url = f"file://{repo}"
+    analyzer = CodeAnalyzer(repo_url)
+    try:
+        # The first analysis returning must not take the clone from under the second
+        plain, with_history = await asyncio.gather(analyzer.analyze(), analyzer.analyze(secret_history=True))
+        assert plain.files_total == with_history.files_total == 2
+        assert with_history.secret_history["commit"] == head
+        assert with_history.secret_history["findings"] == 0
+        # No run leaves a path behind, and git is never asked about the working directory
+        assert analyzer.repo_path is None
+        with pytest.raises(ValueError):
+            analyzer.head_commit()
+    finally:
+        remove_clone(repo_url)
+
+async def test_clone_is_held_across_processes(temp_dir):
+    repo = os.path.join(temp_dir, f"procs_{os.path.basename(temp_dir)}")
+    os.makedirs(repo)
+    git(repo, 'init', '-q')
+    commit(repo, "model.py", "import torch\n")
+    repo_url = f"file://{repo}"
+    path = checkout_path(repo_url)
+    try:
+        # flock locks belong to an open file, so a second open stands in for another worker process
+        with open(f"{path}.lock", "a") as other_worker:
+            fcntl.flock(other_worker, fcntl.LOCK_EX)
+            pending = asyncio.ensure_future(CodeAnalyzer(repo_url).analyze())
+            await asyncio.sleep(0.5)
+            assert not pending.done() and not os.path.exists(path)
+        result = await pending
+        assert result.files_total == 1
+        assert not os.path.exists(f"{path}.partial")
+    finally:
+        remove_clone(repo_url)
+
+async def test_request_waiting_on_another_worker_serves_its_result(temp_dir):
+    repo = os.path.join(temp_dir, f"dup_{os.path.basename(temp_dir)}")
+    os.makedirs(repo)
+    git(repo, 'init', '-q')
+    head = commit(repo, "model.py", "import torch\nclass Model(torch.nn.Module):\n    def forward(self, x):\n        return x\n")
+    repo_url = f"file://{repo}"
+    resources = ServiceResources(ResultStore(os.path.join(temp_dir, "results.db")), fingerprints=False)
+    try:
+        # Another worker process holds the clone while it analyzes the same commit
+        with open(f"{checkout_path(repo_url)}.lock", "a") as other_worker:
+            fcntl.flock(other_worker, fcntl.LOCK_EX)
+            events = []
+            pending = asyncio.ensure_future(
+                run_analysis({"repo_url": repo_url}, resources, progress=AnalysisProgress(events.append))
+            )
+            await asyncio.sleep(0.5)
+            assert not pending.done()
+            other = CodeAnalyzer(repo_url)
+            other.repo_path = repo
+            resources.result_store.save(repo_url, await other.analyze(), commit_sha=head)
+        report = await pending
+        assert events[-1]["stage"] == "result_store" and events[-1]["status"] == "hit"
+        assert not any(e.get("stage") == "files" for e in events)
+        assert report["detailed_scores"]["AI Framework Integration"] == 1.0
+    finally:
+        remove_clone(repo_url)
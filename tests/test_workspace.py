@@ -0,0 +1,89 @@
+import pytest
+import os
+import tempfile
+import shutil
+from analyzer.code_analyzer import CodeAnalyzer
+from analyzer.file_cache import FileResultCache
+from analyzer.progress import AnalysisProgress
+from analyzer.scanner import read_manifests, scan_repository
+from analyzer.workspace import discover_workspace, partition_files
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+def write_tree(root, files):
+    for rel_path, content in files.items():
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+MONOREPO = {
+    "Cargo.toml": '[workspace]\nmembers = [\n    "crates/*",  # every crate\n]\nexclude = ["crates/legacy"]\n',
+    "crates/core/Cargo.toml": '[package]\nname = "rig-core"\n',
+    "crates/core/src/lib.rs": "pub fn infer() -> Result<(), String> { Ok(()) }\n",
+    "crates/legacy/Cargo.toml": '[package]\nname = "legacy"\n',
+    "crates/legacy/src/lib.rs": "fn old() {}\n",
+    "package.json": '{"private": true, "workspaces": {"packages": ["web/*", "!web/docs"]}}',
+    "web/app/package.json": '{"name": "@rig/app"}',
+    "web/app/src/index.ts": "export const x: number = 1;\n",
+    "web/docs/package.json": '{"name": "docs"}',
+    "web/docs/index.js": "",
+    "scripts/release.py": "print('release')\n",
+}
+
+def test_discovers_cargo_and_npm_members(temp_dir):
+    write_tree(temp_dir, MONOREPO)
+    scan = scan_repository(temp_dir)
+    members = discover_workspace(read_manifests(temp_dir, scan.manifests))
+
+    assert [(m.name, m.path, m.kind) for m in members] == [
+        ("rig-core", "crates/core", "cargo"), ("@rig/app", "web/app", "npm")
+    ]
+    partition, unassigned = partition_files(scan.files, members)
+    assert [f.rel_path for f in partition["crates/core"]] == ["crates/core/src/lib.rs"]
+    assert {f.rel_path for f in unassigned} == {"crates/legacy/src/lib.rs", "scripts/release.py", "web/docs/index.js"}
+
+def test_python_packages_and_pnpm_members():
+    manifests = {
+        "pnpm-workspace.yaml": "packages:\n  - 'packages/*'\n  # comment\n  - \"!packages/skip\"\ncatalog:\n  - ignored\n",
+        "packages/ui/package.json": "{}",
+        "packages/skip/package.json": "{}",
+        "ignored/package.json": "{}",
+        "services/api/pyproject.toml": '[project]\nname = "api"\n',
+        "services/worker/pyproject.toml": '[tool.poetry]\nname = "worker"\n',
+    }
+    assert [(m.name, m.path) for m in discover_workspace(manifests)] == [
+        ("ui", "packages/ui"), ("api", "services/api"), ("worker", "services/worker")
+    ]
+    assert discover_workspace({"pyproject.toml": '[project]\nname = "solo"\n'}) == []
+
+async def test_members_are_scored_and_cached_per_tree(temp_dir, monkeypatch):
+    write_tree(temp_dir, MONOREPO)
+    trees = {"crates/core": "tree-a", "web/app": "tree-b"}
+    monkeypatch.setattr(CodeAnalyzer, "_member_trees", lambda self, run, partition: dict(trees))
+    cache = FileResultCache(os.path.join(temp_dir, "cache.db"))
+    analyzer = CodeAnalyzer("dummy_url", file_cache=cache)
+    analyzer.repo_path = temp_dir
+
+    plain = await analyzer.analyze()
+    events = []
+    first = await analyzer.analyze(workspace=True, progress=AnalysisProgress(events.append))
+    assert plain.workspace is None
+    # Members are scored in turn, in the order they were discovered
+    assert [e["path"] for e in events if e["event"] == "member"] == ["crates/core", "web/app"]
+    assert first.code_quality_score == pytest.approx(plain.code_quality_score)
+    assert first.files_analyzed == plain.files_analyzed == 5
+    assert first.workspace["unassigned_files"] == 3
+    core, app = first.workspace["members"]
+    assert (core["name"], core["files"], core["cached"]) == ("rig-core", 1, False)
+    assert set(app["scores"]) == {"code_quality", "ai_framework", "execution", "security"}
+
+    # Only the member whose tree changed is scored again
+    trees["web/app"] = "tree-c"
+    second = await analyzer.analyze(workspace=True)
+    assert [m["cached"] for m in second.workspace["members"]] == [True, False]
+    assert second.workspace["members"][0]["scores"] == core["scores"]